@@ -1,3 +1,4 @@
+import argparse
 import logging
 import warnings
 
@@ -7,5 +8,38 @@ from modularizer.user_interface.console import Console
 if __name__ == '__main__':
     warnings.filterwarnings("ignore")
     logging.getLogger().setLevel(logging.FATAL)
+    parser = argparse.ArgumentParser(prog='modularizer')
+    parser.add_argument('--batch', metavar='CONFIG',
+                        help='analyze the databases of a JSON list of connection configs without interaction')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes in batch mode')
+    parser.add_argument('--serve', action='store_true',
+                        help='keep the analysis in memory and serve the menu operations as a JSON API on localhost')
+    parser.add_argument('--port', type=int, default=None, help='port of the service')
+    parser.add_argument('--connect', metavar='URL', help='use the menu of a running service')
+    parser.add_argument('--graph-reduction', action='store_true',
+                        help='cluster the graph after contracting its leaves, chains and twins')
+    args = parser.parse_args()
     ui = Console()
-    app = Modularizer(ui)
+    if args.graph_reduction:
+        Modularizer.graph_reduction = True
+    if args.serve:
+        from modularizer.service import DEFAULT_PORT, ModularizerService
+        from modularizer.user_interface.console import ServiceConsole
+        ui = ServiceConsole()
+        service = ModularizerService(Modularizer(ui), port=args.port if args.port is not None else DEFAULT_PORT)
+        ui.info_msg(f'Serving on {service.url}')
+        service.serve_forever()
+    elif args.connect is not None:
+        from modularizer.service import ServiceClient, client_menu_options
+        ui.load_menu_options(client_menu_options(ServiceClient(args.connect), ui))
+    elif args.batch is not None:
+        from modularizer.batch import load_batch_config, run_batch
+        configs = load_batch_config(args.batch)
+        if args.graph_reduction:
+            # the worker processes do not share the class attribute
+            for config in configs:
+                config.setdefault('graph_reduction', True)
+        summary = run_batch(configs, Modularizer.results_dir, args.workers, ui)
+        ui.info_msg(f'Batch summary saved: {summary["summary_path"]}')
+    else:
+        app = Modularizer(ui)
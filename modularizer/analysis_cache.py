@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import networkx as nx
+import pathlib
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from modularizer.data_source import DataSource
+from modularizer.hierarchy import ModuleTree
+from modularizer.path_table import PathTable
+
+# rough memory use of a node and an edge of a networkx multigraph with a few attributes, in bytes
+NODE_SIZE = 500
+EDGE_SIZE = 600
+
+
+def connection_key(connection: dict) -> Tuple:
+    """Identifies the database of a connection config, the same way as data_source_key does after connecting."""
+    if 'path' in connection.keys():
+        return 'path', str(pathlib.Path(connection['path']).resolve())
+    return 'database', str(connection.get('database')), str(connection.get('user')), str(connection.get('host')), \
+        str(connection.get('port'))
+
+
+def data_source_key(data_source: DataSource) -> Tuple:
+    if getattr(data_source, 'path', None) is not None:
+        return 'path', str(pathlib.Path(data_source.path).resolve())
+    return 'database', str(data_source.database), str(getattr(data_source, 'user', None)), \
+        str(getattr(data_source, 'host', None)), str(getattr(data_source, 'port', None))
+
+
+@dataclass
+class AnalysisState:
+    """Everything the analysis of a database produced, so that it can be switched back to without recomputing."""
+    data_source: DataSource
+    multi_di_graph: nx.MultiDiGraph
+    path_table: PathTable
+    communities: list
+    module_tree: Optional[ModuleTree]
+    project_root: str
+    dirs_to_exclude: List[str]
+    # results of the background tasks, including the prefetched file contents of the modules
+    background_results: Dict[Hashable, Any] = field(default_factory=dict)
+    # how long the steps of the analysis took and what the graph reduction did
+    timings: Dict[str, float] = field(default_factory=dict)
+    reduction_report: Dict[str, Any] = field(default_factory=dict)
+
+    def estimate_size(self) -> int:
+        """Rough estimate of the memory used by the state in bytes."""
+        size = self.multi_di_graph.number_of_nodes() * NODE_SIZE + self.multi_di_graph.number_of_edges() * EDGE_SIZE
+        size += sum(len(path) for path in self.path_table.paths()) + len(self.path_table) * 100
+        size += sum(getattr(community, 'nbytes', len(community) * 8) for community in self.communities)
+        for key, value in self.background_results.items():
+            if key[0] == 'module_files':
+                size += sum(file.size for file in value)
+        return size
+
+
+class AnalysisCache:
+    """Least recently used analysis states of databases that are not the current one.
+
+    At most max_entries states are kept, and if a memory budget (in bytes) is given the least recently used states
+    are evicted until the estimated size of the rest fits in it. The data source of an evicted state is closed.
+    """
+
+    def __init__(self, max_entries: int = 4, memory_budget: int = None):
+        self.max_entries = max_entries
+        self.memory_budget = memory_budget
+        self._states: OrderedDict[Tuple, AnalysisState] = OrderedDict()
+        self._sizes: Dict[Tuple, int] = dict()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, key: Tuple) -> bool:
+        return key in self._states
+
+    def keys(self) -> List[Tuple]:
+        """Returns the keys from the least to the most recently used."""
+        return list(self._states.keys())
+
+    def size(self) -> int:
+        return sum(self._sizes.values())
+
+    def put(self, key: Tuple, state: AnalysisState) -> None:
+        old_state = self.pop(key)
+        if old_state is not None and old_state.data_source is not state.data_source:
+            self._close(old_state)
+        self._states[key] = state
+        self._sizes[key] = state.estimate_size()
+        while len(self._states) > self.max_entries or (
+                self.memory_budget is not None and len(self._states) > 0 and self.size() > self.memory_budget):
+            self._evict(next(iter(self._states)))
+
+    def pop(self, key: Tuple) -> Optional[AnalysisState]:
+        """Removes and returns the state of a database, it is the current one from now on."""
+        self._sizes.pop(key, None)
+        return self._states.pop(key, None)
+
+    def _evict(self, key: Tuple) -> None:
+        self._close(self.pop(key))
+
+    @staticmethod
+    def _close(state: AnalysisState) -> None:
+        try:
+            state.data_source.close()
+        except Exception:
+            pass
+
+    def clear(self) -> None:
+        for key in self.keys():
+            self._evict(key)
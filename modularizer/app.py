@@ -1,24 +1,64 @@
-from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+import io
+import itertools
 import json
 import networkx as nx
 from numpy import long
 import os
 import pathlib
 import re
+import tempfile
+import threading
+import time
 from typing import *
 
-from modularizer.database_connection import DatabaseConnection
+from modularizer import modularization_file
+from modularizer.analysis_cache import AnalysisCache, AnalysisState, connection_key, data_source_key
+from modularizer.background_worker import BackgroundWorker, SkipTask
+from modularizer.balancing import balance_communities, balance_report, load_compile_times, set_node_weights
+from modularizer.data_source import DataSource, ENTITY_TABLES, create_data_source, escape_like
+from modularizer.directory_index import DirectoryIndex
+from modularizer.graph_export import EXPORT_FORMATS, export_graph
+from modularizer.graph_order import GraphOrderCache
+from modularizer.graph_reduction import reduced_louvain_communities
+from modularizer.hierarchy import ModuleTree, build_module_tree, name_modules
+from modularizer.module_dependencies import ModuleDependencyIndex
+from modularizer.offline_data_source import OfflineDataSource, export_data_source
+from modularizer.path_table import ModuleView, PathTable, node_path_getter, to_node_array
+from modularizer.search_index import SearchIndex
+from modularizer.symbol_export import export_declarations, exported_declaration_lines
 from modularizer.user_interface.user_interface import UserInterface
 
 
-@dataclass
 class File:
-    id: long
-    path: str
-    filename: str
-    content: str
+    """A file of a module; the content is kept as the database returned it, binary contents (e.g. memoryviews of
+    bytea columns) are decoded only when accessed, so they are not held as text and as bytes at the same time."""
+    __slots__ = ('id', 'path', 'filename', '_content')
+
+    def __init__(self, id: long, path: str, filename: str, content: Union[str, bytes, memoryview]):
+        self.id = id
+        self.path = path
+        self.filename = filename
+        self._content = content
+
+    @property
+    def content(self) -> str:
+        if isinstance(self._content, str):
+            return self._content
+        return str(self._content, 'utf-8', errors='replace')
+
+    @property
+    def size(self) -> int:
+        """Length of the stored content, without decoding it."""
+        return len(self._content)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, File) and (self.id, self.path, self.filename, self._content) == \
+            (other.id, other.path, other.filename, other._content)
+
+    def __repr__(self) -> str:
+        return f'File(id={self.id}, path={self.path!r}, filename={self.filename!r}, size={self.size})'
 
     def __str__(self):
         return self.path
@@ -39,8 +79,25 @@ class Modularizer:
 
     results_dir = pathlib.Path(__file__).resolve().parent.joinpath('results')
 
-    def __init__(self, ui: UserInterface, database_connection: DatabaseConnection = None):
+    # characters of file contents the background worker may prefetch for one modularization
+    prefetch_content_budget = 1 << 28
+
+    # number of analyses of other databases kept for switching back to them and their memory budget in bytes
+    analysis_cache_entries = 4
+    analysis_cache_memory_budget = None
+
+    # cluster the core left after contracting the leaves, chains and twins of the graph instead of the whole graph,
+    # faster on large graphs, but the modularization can differ from the default one
+    graph_reduction = False
+
+    def __init__(self, ui: UserInterface, database_connection: DataSource = None, background_tasks: bool = True,
+                 project_root: str = None, dirs_to_exclude: List[str] = None, graph_reduction: bool = None):
         self.ui = ui
+        if graph_reduction is not None:
+            self.graph_reduction = graph_reduction
+        # known in advance only in batch mode, otherwise they are detected and asked for every database
+        self._configured_project_root = project_root
+        self._configured_dirs_to_exclude = list(dirs_to_exclude) if dirs_to_exclude is not None else []
         if database_connection is None:
             self.database_connection = None
             try:
@@ -72,35 +129,63 @@ class Modularizer:
             self.database_connection = database_connection
 
         self.multi_di_graph = nx.MultiDiGraph()
+        self.edge_types = list(Modularizer._edge_type.keys())
+        self._graph_order_cache = GraphOrderCache()
+        self._data_source_lock = threading.Lock()
+        self._background_worker = BackgroundWorker() if background_tasks else None
+        self._analysis_cache = AnalysisCache(self.analysis_cache_entries, self.analysis_cache_memory_budget)
+        self.path_table = PathTable()
         self.communities = None
-        self.modules = dict()
+        self.modules = ModuleView(self.communities, self.path_table)
+        # the communities are its leaves in hierarchical mode
+        self.module_tree: Optional[ModuleTree] = None
+        self.project_root = ''
+        self.dirs_to_exclude = []
+        self.timings = dict()
+        self.reduction_report = dict()
+        self._search_index: Optional[SearchIndex] = None
+        self._search_index_lock = threading.Lock()
+        self._module_dependency_index: Optional[ModuleDependencyIndex] = None
+        self._module_dependency_lock = threading.Lock()
+        # the data source and whether it has the tables of the declarations to export
+        self._entity_tables: Optional[Tuple[DataSource, bool]] = None
         self._set_default_values()
         self.menu_options = [('Display dependency graph', self.display_dependency_graph),
                              ('Display modularization', self.display_modularization),
                              ('Display module', self.display_module),
                              ('Find module by file', self.find_module_by_file),
                              ('Print modularization', self.print_modularization),
+                             ('Display modularization metrics', self.display_metrics),
                              ('Save modularization to file', self.save_modularization_to_file),
                              ('Load modularization from file', self.load_modularization_from_file),
                              ('Reset default modularization', self.reset_default_modularization),
+                             ('Hierarchical modularization', self.hierarchical_modularization),
+                             ('Balance modules by compile cost', self.balance_modules),
                              # ("Generate all module files", self.generate_module_files),
                              ('Generate module file', self.generate_module_file),
+                             ('Export dependency graph', self.export_dependency_graph),
+                             ('Export database to offline dump', self.export_database),
+                             ('Batch analysis of databases', self.batch_analysis),
+                             ('Background tasks', self.display_background_tasks),
                              ('Switch database connection', self.switch_database_connection)]
         self.ui.load_menu_options(self.menu_options)
 
     def _connect_to_database(self, connection: dict):
         while True:
+            data_source = None
             try:
-                self.database_connection = DatabaseConnection(connection)
-                self.ui.info_msg("Successful database connection: " + str(self.database_connection))
-                self.database_connection.cursor.execute(
-                    "select relname from pg_class where relkind='r' and relname !~ '^(pg_|sql_)';")
-                tables = self.database_connection.cursor.fetchall()
+                data_source = create_data_source(connection)
+                self.ui.info_msg("Successful database connection: " + str(data_source))
+                tables = data_source.get_table_names()
                 for table in ['CppEdge', 'File', 'FileContent']:
-                    if (table,) not in tables:
+                    if table not in tables:
                         raise Exception(f"Table '{table}' not found in database")
+                # the current data source is replaced only by a usable one
+                self.database_connection = data_source
                 break
             except Exception as ex:
+                if data_source is not None:
+                    self._close_data_source(data_source)
                 if 'no password supplied' in str(ex):
                     connection['password'] = self.ui.get_password()
                 elif 'not found in database' in str(ex):
@@ -114,55 +199,63 @@ class Modularizer:
                         if 'password' in connection.keys():
                             connection['password'] = self.ui.get_password()
 
-    def _get_dirs_to_exclude(self, query_results, project_root, from_path_index, to_path_index):
-        build_dir = self.find_build_dir(query_results, project_root, from_path_index, to_path_index)
+    @staticmethod
+    def _close_data_source(data_source: DataSource) -> None:
+        try:
+            data_source.close()
+        except Exception:
+            pass
+
+    def _find_project_root(self, project_name: str) -> str:
+        """Finds the project root by the shortest path with the project name in the data source, so that the edges
+        can be filtered by it before they are queried."""
+        with self._data_source_lock:
+            path = self.database_connection.find_file_path(f'%{escape_like(project_name)}%/%')
+        if path is None:
+            return ''
+        return self.project_root_from_path(project_name, path)
+
+    def _get_dirs_to_exclude(self, project_root: str, index: DirectoryIndex) -> List[str]:
         dirs_to_exclude = []
-        if build_dir != '':
-            self.ui.info_msg(f'Build directory found: {build_dir}\n It will be excluded from analysis.')
-            dirs_to_exclude.append(build_dir)
+        found = index.find_directories_to_exclude(project_root)
+        if len(found) > 0:
+            self.ui.info_msg('Directories found that will be excluded from analysis:\n' + '\n'.join(
+                f' {directory.path} ({kind}, {directory.files} files, {directory.edges} dependencies)'
+                for directory, kind in found))
+            include = self.ui.closed_question('Include any of them in the analysis?')
+            for directory, kind in found:
+                if not include or not self.ui.closed_question(f'Include {directory.path}?'):
+                    dirs_to_exclude.append(directory.path)
         else:
-            self.ui.info_msg(f'Build directory not found under project root.')
+            self.ui.info_msg('No build, generated or third-party directory found under project root.')
+        largest = index.subdirectories(project_root)[:10]
+        if len(largest) > 0:
+            self.ui.info_msg('Largest directories under project root:\n' + '\n'.join(
+                f' {directory.name} ({directory.files} files, {directory.edges} dependencies)'
+                for directory in largest))
         while self.ui.closed_question('Do you want to exclude another directory or file?'):
             dir_to_exclude = self.ui.get_user_input("directory or file (relative to project root)")
-            dirs_to_exclude.append(pathlib.PurePosixPath(project_root).joinpath(dir_to_exclude))
+            dirs_to_exclude.append(str(pathlib.PurePosixPath(project_root).joinpath(dir_to_exclude)))
         return dirs_to_exclude
 
-    def _execute_query(self, query_file_path):
-        with open(query_file_path, "r") as f:
-            query = f.read()
-        self.database_connection.cursor.execute(query)
-        return self.database_connection.cursor.fetchall(), self.database_connection.cursor.description
-
     @staticmethod
     def find_project_root(project_name, query_results, from_path_index, to_path_index):
-        project_root = ''
-        for record in query_results:
-            if project_name in record[from_path_index]:
-                project_root = record[from_path_index]
-                break
-            elif project_name in record[to_path_index]:
-                project_root = record[to_path_index]
-                break
-        if project_root != '':
-            project_root = project_root[0:project_root.find('/', project_root.find(project_name))]
-        return project_root
+        return DirectoryIndex.from_query_results(query_results, from_path_index, to_path_index).find_project_root(
+            project_name)
+
+    @staticmethod
+    def project_root_from_path(project_name: str, path: str) -> str:
+        return path[0:path.find('/', path.find(project_name))]
 
     @staticmethod
     def find_build_dir(query_results, project_root, from_path_index, to_path_index) -> str:
-        for folder in ['build', 'Build']:
-            build_dir = pathlib.PurePosixPath(project_root).joinpath(folder)
-            i = 0
-            while i < len(query_results) and not (
-                    str(build_dir) in str(pathlib.PurePosixPath(query_results[i][from_path_index]))) \
-                    and not (str(build_dir) in str(pathlib.PurePosixPath(query_results[i][to_path_index]))):
-                i += 1
-            if i < len(query_results):
-                return str(build_dir)
-        return ''
+        index = DirectoryIndex.from_query_results(query_results, from_path_index, to_path_index)
+        found = index.find_directories_to_exclude(project_root, ['build'])
+        return found[0][0].path if len(found) > 0 else ''
 
     @staticmethod
     def graph_from_query_results(query_results, project_root, dirs_to_exclude, from_path_index,
-                                 to_path_index) -> nx.MultiDiGraph:
+                                 to_path_index, type_index=6) -> nx.MultiDiGraph:
         graph = nx.MultiDiGraph()
         for record in query_results:
             if project_root in record[from_path_index] and all(
@@ -175,105 +268,337 @@ class Modularizer:
                     graph.add_node(from_node, path=record[from_path_index])
                 if not graph.has_node(to_node):
                     graph.add_node(to_node, path=record[to_path_index])
-                graph.add_edges_from([(from_node, to_node)], label=Modularizer._edge_type[record[6]])
+                graph.add_edges_from([(from_node, to_node)], label=Modularizer._edge_type[record[type_index]])
         return graph
 
+    @staticmethod
+    def compact_graph_from_query_results(query_results, project_root, dirs_to_exclude, from_path_index,
+                                         to_path_index, type_index=6) -> Tuple[nx.MultiDiGraph, PathTable]:
+        """Same as graph_from_query_results, but the nodes are the ids of the paths interned in the returned table."""
+        path_table = PathTable(project_root)
+        graph = nx.MultiDiGraph()
+        for record in query_results:
+            if project_root in record[from_path_index] and all(
+                    str(path) not in record[to_path_index] for path in dirs_to_exclude) and \
+                    project_root in record[to_path_index] and all(
+                str(path) not in record[from_path_index] for path in dirs_to_exclude):
+                from_node = path_table.intern(record[from_path_index])
+                to_node = path_table.intern(record[to_path_index])
+                graph.add_edge(from_node, to_node, label=Modularizer._edge_type[record[type_index]])
+        return graph, path_table
+
     def _build_graph(self) -> None:
-        query_file_path = pathlib.Path(__file__).resolve().parent.joinpath('data', 'cpp_edge_query.txt')
-        query_results, description = self._execute_query(query_file_path)
+        # the project root, the edge types and the exclusions known in advance are filtered by the data source, the
+        # other excluded directories are chosen from the directory tree of the returned edges and filtered while
+        # building the graph
+        project_root = self._configured_project_root
+        if project_root is None:
+            project_root = self._find_project_root(self.database_connection.database)
+        known_dirs_to_exclude = [str(pathlib.PurePosixPath(project_root).joinpath(path))
+                                 for path in self._configured_dirs_to_exclude] if project_root != '' else []
+        # a cancelled background task may still be using the data source
+        with self._data_source_lock:
+            query_results, description = self.database_connection.query_cpp_edges(
+                project_root, known_dirs_to_exclude, self.edge_types)
         from_path_index = self.find_column_index(description, 'frompath')
         to_path_index = self.find_column_index(description, 'topath')
-        project_name = self.database_connection.database
-        project_root = self.find_project_root(project_name, query_results, from_path_index, to_path_index)
+        type_index = self.find_column_index(description, 'type')
+        index = DirectoryIndex.from_query_results(query_results, from_path_index, to_path_index)
         if project_root == '':
+            # the edges are not filtered then, the graph is built from the ones under the given root
             project_root = self.ui.get_user_input(
                 f"Could not identify project root.\nEnter the parsed project's root directory")
-        else:
+            known_dirs_to_exclude = [str(pathlib.PurePosixPath(project_root).joinpath(path))
+                                     for path in self._configured_dirs_to_exclude]
+        elif self._configured_project_root is None:
             self.ui.info_msg(f'Project root: {project_root}')
-
-        dirs_to_exclude = self._get_dirs_to_exclude(query_results, project_root, from_path_index, to_path_index)
-
-        self.multi_di_graph = \
-            self.graph_from_query_results(query_results, project_root, dirs_to_exclude, from_path_index, to_path_index)
+        dirs_to_exclude = known_dirs_to_exclude + [path for path in self._get_dirs_to_exclude(project_root, index)
+                                                   if path not in known_dirs_to_exclude]
+        self.multi_di_graph, self.path_table = self.compact_graph_from_query_results(
+            query_results, project_root, dirs_to_exclude, from_path_index, to_path_index, type_index)
+        self._graph_order_cache.clear()
+        self.project_root = project_root
+        self.dirs_to_exclude = dirs_to_exclude
 
     @staticmethod
     def get_communities(multi_graph: nx.MultiGraph) -> list:
         return nx.community.louvain_communities(nx.MultiGraph(multi_graph), seed=3, resolution=1.1)
 
     def _set_default_values(self) -> None:
+        if self._background_worker is not None:
+            self._background_worker.cancel(timeout=0)
+        start = time.perf_counter()
         self._build_graph()
+        self.timings['graph'] = time.perf_counter() - start
+        self._cluster()
+        self._start_background_tasks()
+
+    def _cluster(self) -> None:
+        start = time.perf_counter()
         # self.communities = nx.community.louvain_communities(nx.MultiGraph(self.multi_di_graph), seed=3, resolution=1.1)
-        self.communities = Modularizer.get_communities(self.multi_di_graph)
-        self.modules = self._modules_to_dict()
+        if self.graph_reduction:
+            communities, self.reduction_report = reduced_louvain_communities(self.multi_di_graph)
+            self.ui.info_msg(f'Graph reduced from {self.reduction_report["nodes"]} to '
+                             f'{self.reduction_report["core nodes"]} nodes before clustering')
+        else:
+            communities = Modularizer.get_communities(self.multi_di_graph)
+            self.reduction_report = dict()
+        self.communities = [to_node_array(c) for c in communities]
+        self.modules = ModuleView(self.communities, self.path_table)
+        self.module_tree = None
+        self.timings['clustering'] = time.perf_counter() - start
+        for key in ('reduction time', 'expansion time'):
+            if key in self.reduction_report.keys():
+                self.timings[key.replace(' time', '')] = self.reduction_report[key]
+
+    def recluster(self) -> None:
+        """Computes the default modularization of the current graph again, without querying the database."""
+        if self._background_worker is not None:
+            self._background_worker.cancel(timeout=0)
+        self._cluster()
+        self._start_background_tasks()
+
+    def _start_background_tasks(self, results: Dict[Hashable, Any] = None) -> None:
+        """Prefetches what the menu options need while the user is reading the menu, except the given results."""
+        if self._background_worker is None:
+            return
+        graph = self.multi_di_graph
+        communities = self.communities
+        budget = [self.prefetch_content_budget]
+        tasks = [(('graph_order',), lambda cancelled: self._graph_order_cache.get(graph)),
+                 (('search_index',), lambda cancelled: self._get_search_index()),
+                 (('module_dependencies',), lambda cancelled: self._get_module_dependency_index()),
+                 (('metrics',), lambda cancelled: self.get_metrics(graph, communities))]
+        if not self.ui.headless:
+            tasks.append((('layout',), lambda cancelled: self.ui.prefetch_layout(graph, self.path_table.relative_path)))
+        for i in range(len(communities)):
+            tasks.append((('module_files', i),
+                          lambda cancelled, module_id=i: self._prefetch_module_files(module_id, budget, cancelled)))
+        self._background_worker.start(tasks, results)
+
+    def _prefetch_module_files(self, module_id: int, budget: List[int], cancelled: threading.Event) -> List[File]:
+        if budget[0] <= 0 or cancelled.is_set():
+            raise SkipTask()
+        files = self._query_module_files(module_id)
+        budget[0] -= sum(file.size for file in files)
+        return files
+
+    def _background_result(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        if self._background_worker is None:
+            return compute()
+        return self._background_worker.get(key, compute)
+
+    def display_background_tasks(self) -> None:
+        if self._background_worker is None:
+            self.ui.info_msg('Background tasks are disabled')
+            return
+        done, total, current = self._background_worker.progress()
+        msg = f'Background tasks: {done}/{total} done'
+        if self._background_worker.skipped > 0:
+            msg += f', {self._background_worker.skipped} skipped'
+        if len(self._background_worker.errors) > 0:
+            msg += f', {len(self._background_worker.errors)} failed'
+        if current is not None:
+            msg += f'\nRunning: {current}'
+        self.ui.info_msg(msg)
+        if self._background_worker.is_running() and self.ui.closed_question('Cancel background tasks?'):
+            self._background_worker.cancel(timeout=0)
+            self.ui.info_msg('Background tasks cancelled')
+
+    def _analysis_state(self) -> AnalysisState:
+        results = self._background_worker.snapshot() if self._background_worker is not None else dict()
+        return AnalysisState(self.database_connection, self.multi_di_graph, self.path_table, self.communities,
+                             self.module_tree, self.project_root, self.dirs_to_exclude, results, dict(self.timings),
+                             dict(self.reduction_report))
+
+    def _restore_analysis_state(self, state: AnalysisState) -> None:
+        if self._background_worker is not None:
+            self._background_worker.cancel(timeout=0)
+        self.database_connection = state.data_source
+        self.multi_di_graph = state.multi_di_graph
+        self._graph_order_cache.clear()
+        self.path_table = state.path_table
+        self.communities = state.communities
+        self.modules = ModuleView(self.communities, self.path_table)
+        self.module_tree = state.module_tree
+        self.project_root = state.project_root
+        self.dirs_to_exclude = state.dirs_to_exclude
+        self.timings = state.timings
+        self.reduction_report = state.reduction_report
+        self._start_background_tasks(state.background_results)
 
     def switch_database_connection(self) -> None:
+        # the analysis of the current database is cached once the switch succeeded, so switching back is instant
+        current_key = data_source_key(self.database_connection)
+        current_state = self._analysis_state()
         while True:
             try:
                 connection = self.ui.get_database_connection()
+                key = connection_key(connection)
+                state = self._analysis_cache.pop(key) if key != current_key else None
+                if state is not None:
+                    self._analysis_cache.put(current_key, current_state)
+                    self._restore_analysis_state(state)
+                    self.ui.info_msg(f'Analysis restored: {self.database_connection}')
+                    return
                 self._connect_to_database(connection)
                 break
             except Exception:
                 if not self.ui.closed_question('Connect to an other database?'):
                     self.ui.info_msg('Closing the application...')
                     raise SystemExit()
+        if key != current_key:
+            self._analysis_cache.put(current_key, current_state)
+        else:
+            # reconnected to the same database, its analysis is computed again
+            self._close_data_source(current_state.data_source)
+        self._configured_project_root = None
+        self._configured_dirs_to_exclude = []
         self._set_default_values()
 
+    @staticmethod
+    def get_metrics(graph: nx.MultiDiGraph, communities: list) -> dict:
+        communities = [set(community) for community in communities]
+        module_ids = dict()
+        for i in range(len(communities)):
+            for node in communities[i]:
+                module_ids[node] = i
+        cross_module_edges = sum(1 for u, v in graph.edges() if module_ids.get(u, -1) != module_ids.get(v, -1)
+                                 or u not in module_ids)
+        sizes = [len(community) for community in communities]
+        metrics = {'files': graph.number_of_nodes(),
+                   'dependencies': graph.number_of_edges(),
+                   'modules': len(communities),
+                   'cross-module dependencies': cross_module_edges,
+                   'largest module': max(sizes, default=0),
+                   'smallest module': min(sizes, default=0),
+                   'files without module': graph.number_of_nodes() - len(module_ids)}
+        if len(module_ids) == graph.number_of_nodes() and graph.number_of_edges() > 0:
+            metrics['modularity'] = nx.community.modularity(nx.MultiGraph(graph), communities)
+            metrics['coverage'], metrics['performance'] = nx.community.partition_quality(nx.Graph(graph),
+                                                                                         communities)
+        return metrics
+
+    def display_metrics(self) -> None:
+        graph = self.multi_di_graph
+        communities = self.communities
+        metrics = self._background_result(('metrics',), lambda: self.get_metrics(graph, communities))
+        if len(self.reduction_report) > 0:
+            metrics = dict(metrics, **{'graph reduction': self.reduction_report})
+        self.ui.info_msg(json.dumps(metrics, indent=4))
+
+    def _labeled_graph(self, nodes: Iterable[int] = None) -> nx.MultiDiGraph:
+        """Copy of the dependency graph (or a part of it) with the relative paths as nodes for the user interface,
+        built only when it is displayed."""
+        graph = self.multi_di_graph if nodes is None else self.multi_di_graph.subgraph(int(n) for n in nodes)
+        return nx.relabel_nodes(graph, {n: self.path_table.relative_path(n) for n in graph.nodes}, copy=True)
+
     def display_dependency_graph(self) -> None:
-        self.ui.display_dependency_graph(self.multi_di_graph)
+        self.ui.display_dependency_graph(self._labeled_graph())
 
     def display_modularization(self) -> None:
-        self.ui.display_all_modules(self.multi_di_graph, self.communities)
+        communities = [[self.path_table.relative_path(n) for n in community] for community in self.communities]
+        self.ui.display_all_modules(self._labeled_graph(), communities)
 
     def display_module(self) -> None:
         module_id = self.ui.get_module_id(len(self.communities))
-        community = self.multi_di_graph.subgraph(self.communities[module_id])
-        self.ui.display_module(community)
-
-    def _modules_to_dict(self) -> Dict[int, List[str]]:
-        modules = dict()
-        for i in range(len(self.communities)):
-            paths = [self.multi_di_graph.nodes[c]['path'] for c in self.communities[i]]
-            modules[i] = paths
-        return modules
+        self.ui.display_module(self._labeled_graph(self.communities[module_id]))
 
     @staticmethod
     def modules_to_json(modules: dict) -> str:
         return json.dumps(modules, indent=4)
 
     def print_modularization(self) -> None:
-        self.ui.info_msg(self.modules_to_json(self.modules))
+        self.ui.info_msg(self.modules_to_json(dict(self.modules)))
+
+    @staticmethod
+    def modularization_to_assignment(dependency_graph: nx.MultiDiGraph, communities: list,
+                                     path_table: PathTable = None) -> Tuple[List[str], List[int]]:
+        module_ids = dict()
+        for i in range(len(communities)):
+            for node in communities[i]:
+                module_ids[node] = i
+        path_of = node_path_getter(dependency_graph, path_table)
+        paths = [path_of(node) for node in dependency_graph.nodes]
+        assignment = [module_ids.get(node, -1) for node in dependency_graph.nodes]
+        return paths, assignment
 
     def save_modularization_to_file(self):
         os.makedirs(self.results_dir, exist_ok=True)
-        file_path = os.path.join(self.results_dir,
-                                 f'{self.database_connection.database}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(self.modules_to_json(self.modules))
+        file_name = f'{self.database_connection.database}_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+        if self.ui.closed_question('Save in compact binary format?'):
+            file_path = os.path.join(self.results_dir, file_name + modularization_file.SUFFIX)
+        else:
+            file_path = os.path.join(self.results_dir, file_name + '.json')
+        self.save_modularization(file_path)
         self.ui.info_msg(f'file saved: {file_path}')
 
+    def save_modularization(self, file_path: str) -> None:
+        """Saves the modularization in the compact binary format if the file has its suffix, as JSON otherwise."""
+        if str(file_path).endswith(modularization_file.SUFFIX):
+            paths, assignment = self.modularization_to_assignment(self.multi_di_graph, self.communities,
+                                                                  self.path_table)
+            modularization_file.save_binary_modularization(file_path, self.database_connection.database, paths,
+                                                           assignment, len(self.communities))
+        else:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(self.modules_to_json(dict(self.modules)))
+
     @staticmethod
-    def load_modules_from_file(file_path: str, dependency_graph: nx.MultiDiGraph) -> list:
+    def load_modules_from_file(file_path: str, dependency_graph: nx.MultiDiGraph, path_table: PathTable = None,
+                               database: str = None) -> list:
+        if modularization_file.is_binary_modularization_file(file_path):
+            return Modularizer.load_modules_from_binary_file(file_path, dependency_graph, path_table=path_table,
+                                                             database=database)
         with open(file_path, 'r') as f:
             modules = json.load(f)
+        path_of = node_path_getter(dependency_graph, path_table)
+        node_by_path = {path_of(node): node for node in dependency_graph.nodes}
         communities = []
         for module_id, files in modules.items():
             nodes = []
             for file in files:
-                i = 0
-                for node, data in dependency_graph.nodes(data=True):
-                    if data['path'] == file:
-                        break
-                    i += 1
-                if i < len(dependency_graph):
-                    nodes.append(node)
+                if file in node_by_path:
+                    nodes.append(node_by_path[file])
                 else:
                     raise Exception(f'Node not found for file: {file}')
             communities.append(dependency_graph.subgraph(nodes))
         return communities
 
+    @staticmethod
+    def load_modules_from_binary_file(file_path: str, dependency_graph: nx.MultiDiGraph, use_mmap: bool = True,
+                                      path_table: PathTable = None, database: str = None) -> list:
+        """Loads a binary modularization, if database is given it must have been saved for that database."""
+        with modularization_file.load_binary_modularization(file_path, use_mmap) as modularization:
+            if database is not None and modularization.database != database:
+                raise Exception(f'The modularization was saved for the database {modularization.database}, '
+                                f'not for {database}')
+            path_of = node_path_getter(dependency_graph, path_table)
+            nodes = sorted(dependency_graph.nodes, key=path_of)
+            # if the graph has the same files the saved path table does not have to be decoded and matched
+            if modularization.fingerprint != modularization_file.fingerprint(path_of(n) for n in nodes):
+                node_by_path = {path_of(node): node for node in dependency_graph.nodes}
+                nodes = []
+                for file in modularization.paths():
+                    if file in node_by_path:
+                        nodes.append(node_by_path[file])
+                    else:
+                        raise Exception(f'Node not found for file: {file}')
+            module_count = modularization.module_count
+            assignment = modularization.assignment.tolist()
+        members = [[] for _ in range(module_count)]
+        for node, module_id in zip(nodes, assignment):
+            if module_id >= 0:
+                members[module_id].append(node)
+        return [dependency_graph.subgraph(m) for m in members]
+
     def _load_modules_from_file(self, file_path: str):
-        self.communities = Modularizer.load_modules_from_file(file_path, self.multi_di_graph)
-        self.modules = self._modules_to_dict()
+        communities = Modularizer.load_modules_from_file(file_path, self.multi_di_graph, self.path_table,
+                                                         self.database_connection.database)
+        self.communities = [to_node_array(c) for c in communities]
+        self.modules = ModuleView(self.communities, self.path_table)
+        self.module_tree = None
+        self._start_background_tasks()
 
     def load_modularization_from_file(self):
         file_path = self.ui.get_existing_file_path()
@@ -283,21 +608,110 @@ class Modularizer:
     def reset_default_modularization(self):
         self._set_default_values()
 
-    def _query_file_contents(self, paths):
-        query_file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'file_content_query.txt')
-        with open(query_file_path, 'r') as f:
-            query = f.read().replace('<LIST_OF_PATHS>', ','.join([f"'{path}'" for path in paths]))
-        self.database_connection.cursor.execute(query)
-        results = self.database_connection.cursor.fetchall()
-        return self.database_connection.cursor.description, results
+    def _get_positive_number(self, msg: str, optional: bool = False) -> Optional[int]:
+        str_number = self.ui.get_user_input(msg).strip()
+        if optional and str_number == '':
+            return None
+        if str_number.isdigit() and int(str_number) > 0:
+            return int(str_number)
+        raise Exception('Invalid number')
+
+    def hierarchical_modularization(self):
+        max_size = self._get_positive_number('maximum number of files in a module')
+        max_cost = self._get_positive_number('maximum compile cost of a module (empty for no limit)', optional=True)
+        min_size = self._get_positive_number('minimum number of files in a module')
+        self.module_tree = build_module_tree(self.multi_di_graph, [c.tolist() for c in self.communities], max_size,
+                                             max_cost, min_size, path_of=self.path_table.path)
+        self.communities = [leaf.nodes for leaf in self.module_tree.leaves()]
+        self.modules = ModuleView(self.communities, self.path_table)
+        self._start_background_tasks()
+        lines = []
+        for name, module in self.module_tree.walk():
+            lines.append(f'{"  " * name.count(".")}{name} ({module.size()} files)')
+        self.ui.info_msg('\n'.join(lines))
+
+    def _node_id_of_path(self, path: str) -> Optional[int]:
+        node = self.path_table.id(path)
+        if node is None:
+            node = self.path_table.id(str(pathlib.PurePosixPath(self.project_root).joinpath(path)))
+        return node
+
+    def _set_node_weights(self) -> None:
+        compile_times = None
+        if self.ui.closed_question('Load per-file compile times (CSV of path, seconds)?'):
+            compile_times = dict()
+            for path, compile_time in load_compile_times(self.ui.get_existing_file_path()).items():
+                node = self._node_id_of_path(path)
+                if node is not None:
+                    compile_times[node] = compile_time
+            self.ui.info_msg(f'Compile times of {len(compile_times)} files loaded')
+        with self._data_source_lock:
+            file_sizes = self.database_connection.query_file_sizes(self.project_root)
+        sizes = dict()
+        for path, size in file_sizes:
+            node = self.path_table.id(path)
+            if node is not None:
+                sizes[node] = size
+        set_node_weights(self.multi_di_graph, sizes, compile_times)
+
+    def balance_modules(self):
+        self._set_node_weights()
+        graph = self.multi_di_graph
+        report = {'before': balance_report(graph, self.communities)}
+        communities = balance_communities(graph, [c.tolist() for c in self.communities])
+        self.communities = [to_node_array(c) for c in communities]
+        self.modules = ModuleView(self.communities, self.path_table)
+        self.module_tree = None
+        self._start_background_tasks()
+        report['after'] = balance_report(graph, self.communities)
+        self.ui.info_msg(json.dumps(report, indent=4))
+
+    def _get_search_index(self) -> SearchIndex:
+        """Returns the search index of the path table, with the module ids of the current communities."""
+        with self._search_index_lock:
+            if self._search_index is None or self._search_index.path_table is not self.path_table:
+                self._search_index = SearchIndex(self.path_table)
+            self._search_index.update_modules(self.communities)
+            return self._search_index
+
+    def _get_module_dependency_index(self) -> ModuleDependencyIndex:
+        """Returns the dependency index of the current modularization, built once for all generated modules."""
+        with self._module_dependency_lock:
+            index = self._module_dependency_index
+            if index is None or index.communities is not self.communities:
+                self._module_dependency_index = ModuleDependencyIndex(self.multi_di_graph, self.communities)
+            return self._module_dependency_index
+
+    def _entity_tables_available(self) -> bool:
+        if self._entity_tables is None or self._entity_tables[0] is not self.database_connection:
+            with self._data_source_lock:
+                table_names = self.database_connection.get_table_names()
+            self._entity_tables = (self.database_connection, all(table in table_names for table in ENTITY_TABLES))
+        return self._entity_tables[1]
+
+    def _query_exported_declarations(self, module_id: int) -> List[Tuple[str, Hashable, int]]:
+        """Returns (path, entity hash, line) of the declarations of the module used by other modules, in one query."""
+        paths = self.modules[module_id]
+        with self._data_source_lock:
+            description, rows = self.database_connection.query_exported_declarations(paths)
+        path_index = self.find_column_index(description, 'path')
+        hash_index = self.find_column_index(description, 'entityhash')
+        line_index = self.find_column_index(description, 'line')
+        return [(row[path_index], row[hash_index], row[line_index]) for row in rows]
+
+    def _exported_declaration_lines(self, module_id: int, files: List[File]) -> Optional[Dict[str, Set[int]]]:
+        """Returns the lines of the declarations to export per file, or None if the entity tables are missing."""
+        if not self._entity_tables_available():
+            return None
+        rows = self._background_result(('exported_declarations', module_id),
+                                       lambda: self._query_exported_declarations(module_id))
+        return exported_declaration_lines(rows, [file.path for file in files])
 
     def _find_module_id_by_file_path(self, file_path: str) -> int:
-        for i in range(len(self.communities)):
-            for node in self.communities[i]:
-                full_path = self.multi_di_graph.nodes[node]['path']
-                if file_path in full_path:
-                    return i
-        return None
+        results = self._get_search_index().search(file_path, limit=1)
+        if len(results) == 0 or results[0].module_id < 0 or results[0].rank[0] == SearchIndex.FUZZY:
+            return None
+        return results[0].module_id
 
     @staticmethod
     def find_column_index(description, column_name: str) -> int:
@@ -308,11 +722,12 @@ class Modularizer:
 
     @staticmethod
     def convert_graph_to_dag(graph: nx.Graph) -> nx.Graph:
+        if nx.is_directed_acyclic_graph(graph):
+            return graph
+        graph = nx.MultiDiGraph(graph)
         while not nx.is_directed_acyclic_graph(graph):
             cycle = nx.find_cycle(graph)
-            new_graph = nx.MultiDiGraph(graph)
-            new_graph.remove_edge(cycle[1][0], cycle[1][1])
-            graph = new_graph
+            graph.remove_edge(cycle[1][0], cycle[1][1])
         return graph
 
     @staticmethod
@@ -321,27 +736,31 @@ class Modularizer:
         return list(nx.topological_sort(dag))
 
     def _collect_file_contents_for_module(self, module_id: int) -> List[File]:
-        community = self.multi_di_graph.subgraph(self.communities[module_id])
-        sorted_nodes = self.get_topologically_sorted_nodes(community)
+        return self._background_result(('module_files', module_id), lambda: self._query_module_files(module_id))
+
+    def _query_module_files(self, module_id: int) -> List[File]:
+        sorted_nodes = self._graph_order_cache.get(self.multi_di_graph).sort(self.communities[module_id])
         sorted_nodes.reverse()
-        paths = [self.multi_di_graph.nodes[n]['path'] for n in sorted_nodes]
-        descriptor, results = self._query_file_contents(paths)
-        path_index = self.find_column_index(descriptor, 'path')
-        filename_index = self.find_column_index(descriptor, 'filename')
-        content_index = self.find_column_index(descriptor, 'content')
-        id_index = self.find_column_index(descriptor, 'id')
-        files = [File(id=result[id_index], path=result[path_index], filename=result[filename_index],
-                      content=result[content_index]) for result in results]
-        sorted_files = []
-        for path in paths:
-            i = 0
-            while files[i].path != path:
-                i += 1
-            if files[i].path == path:
-                sorted_files.append(files[i])
-            else:
-                raise Exception(f'Content of file {path} not found in database')
-        return sorted_files
+        paths = self.path_table.paths(sorted_nodes)
+        # the rows may be streamed from the cursor of the data source, which is shared with the background worker
+        with self._data_source_lock:
+            descriptor, results = self.database_connection.query_file_contents(paths)
+            return self.files_in_order(descriptor, results, paths)
+
+    @staticmethod
+    def files_in_order(descriptor: tuple, rows: Iterable[tuple], paths: List[str]) -> List[File]:
+        """Joins the rows of the file content query to the paths in one pass, returns the files in the order of the
+        paths. Raises an exception listing every path that has no row."""
+        path_index = Modularizer.find_column_index(descriptor, 'path')
+        filename_index = Modularizer.find_column_index(descriptor, 'filename')
+        content_index = Modularizer.find_column_index(descriptor, 'content')
+        id_index = Modularizer.find_column_index(descriptor, 'id')
+        files = {row[path_index]: File(id=row[id_index], path=row[path_index], filename=row[filename_index],
+                                       content=row[content_index]) for row in rows}
+        missing = [path for path in paths if path not in files]
+        if len(missing) > 0:
+            raise Exception(f'Content of {len(missing)} file(s) not found in database: {", ".join(missing)}')
+        return [files[path] for path in paths]
 
     @staticmethod
     def separate_headers_and_source_files(files) -> Tuple[List[File], List[File]]:
@@ -381,6 +800,22 @@ class Modularizer:
                         break
         return lines
 
+    @staticmethod
+    def comment_out_imported_includes(imported_files: List[str], lines: List[str]) -> List[str]:
+        """Comments out the includes of the files of imported modules the file uses, the include has to match the end
+        of the path."""
+        if len(imported_files) == 0:
+            return lines
+        suffixes = set()
+        for path in imported_files:
+            parts = pathlib.PurePosixPath(path).parts
+            suffixes.update('/'.join(parts[i:]) for i in range(1, len(parts)))
+        for line_index in range(len(lines)):
+            match = re.match(r'#[^\S\n\r]*include[^\S\n\r]*(?:<([^>]+)>|"([^"]+)")', lines[line_index])
+            if match is not None and pathlib.PurePosixPath(match.group(1) or match.group(2)).as_posix() in suffixes:
+                lines[line_index] = f'// {lines[line_index]}'
+        return lines
+
     @staticmethod
     def comment_out_duplicate_includes(global_module_fragment: List[str], preprocessing_directives: List[str]) \
             -> List[str]:
@@ -422,18 +857,110 @@ class Modularizer:
                 pds.append(stripped_pd)
         return pds
 
-    def _generate_module(self, module_id: int, module_name: str) -> List[str]:
+    @staticmethod
+    def collapse_blank_lines(chunks: Iterable[str]) -> Iterator[str]:
+        """Streaming equivalent of re.sub(r'\\n{3,}', '\\n\\n', ''.join(chunks))."""
+        pending_newlines = 0
+        for chunk in chunks:
+            for part in re.split(r'(\n+)', chunk):
+                if part == '':
+                    continue
+                if part[0] == '\n':
+                    pending_newlines += len(part)
+                else:
+                    yield '\n' * min(pending_newlines, 2) + part
+                    pending_newlines = 0
+        if pending_newlines > 0:
+            yield '\n' * min(pending_newlines, 2)
+
+    @staticmethod
+    def _read_chunks(f: TextIO, chunk_size: int = 1 << 16) -> Iterator[str]:
+        f.seek(0)
+        while True:
+            chunk = f.read(chunk_size)
+            if chunk == '':
+                break
+            yield chunk
+
+    @staticmethod
+    def import_name(module_name: str, dependency_name: Optional[str]) -> Optional[str]:
+        """Returns the name a module imports a named dependency by: the partition name within the same module."""
+        if dependency_name is None:
+            return None
+        module = module_name.partition(':')[0]
+        dependency, _, partition = dependency_name.partition(':')
+        if dependency == module:
+            return f':{partition}' if partition != '' else None
+        return dependency
+
+    def default_module_names(self) -> Dict[int, str]:
+        """Returns the names of the modules after the most characteristic directory of their files, in hierarchical
+        mode the leaves are the partitions of their top level module."""
+        if self.module_tree is None:
+            tree = ModuleTree(children=[ModuleTree(nodes=community) for community in self.communities])
+            name_modules(tree, self.path_table.path)
+            return {i: tree.children[i].name for i in range(len(tree.children))}
+        names = dict()
+        for i, module in enumerate(self.module_tree.children):
+            for module_id, partition_name in zip(self.module_tree.leaf_range(i), module.leaf_names()):
+                names[module_id] = f'{module.name}:{partition_name}' if partition_name != '' else module.name
+        return names
+
+    def _module_imports(self, module_id: int, module_name: str, module_names: Dict[int, str]) \
+            -> Tuple[List[str], Dict[str, List[str]]]:
+        """Returns the names of the modules the module imports, dependencies first, and per file of the module the
+        paths of the files it uses from them. The dependencies are imported by their names in module_names."""
+        index = self._get_module_dependency_index()
+        names = []
+        imported = []
+        for dependency in index.imports(module_id):
+            name = self.import_name(module_name, module_names.get(dependency))
+            if name is None:
+                continue
+            if name not in names:
+                names.append(name)
+            imported.append(dependency)
+        imported_files = dict()
+        if len(imported) > 0:
+            for node in self.communities[module_id]:
+                used = index.used_files(node, imported)
+                if len(used) > 0:
+                    imported_files[self.path_table.path(node)] = self.path_table.paths(sorted(used))
+        return names, imported_files
+
+    def _generate_module_chunks(self, module_id: int, module_name: str, module_body: TextIO,
+                                module_names: Dict[int, str] = None) -> Iterator[str]:
+        """Yields the global module fragment line by line while the module body is written to module_body.
+
+        The lines are separated by a newline the same way as '\\n'.join would do it; blank lines are not
+        collapsed here. The dependencies are imported by their default names unless module_names names them.
+        """
         files = self._collect_file_contents_for_module(module_id)
         headers, source_files = self.separate_headers_and_source_files(files)
         files = headers + source_files
-        global_module_fragment = ['module;', '\n']
-        module_content = [f'export module {module_name};', '\n']
+        header_filenames = {header.filename for header in headers}
+        if module_names is None:
+            module_names = self.default_module_names()
+        imports, imported_files = self._module_imports(module_id, module_name, module_names)
+        module_files = [file.path for file in files]
+        exported_lines = self._exported_declaration_lines(module_id, files)
+        # lines of the global module fragment emitted so far, used for finding the duplicate includes
+        global_module_fragment = {'module;', '\n'}
+        yield 'module;'
+        yield '\n'
+        module_body.write(f'\nexport module {module_name};\n\n')
+        for name in imports:
+            module_body.write(f'import {name};\n')
         for file in files:
-            file_content = file.content
+            if exported_lines is None:
+                file_content = file.content
+            else:
+                # the lines of the declarations are the lines of the original content
+                file_content = export_declarations(file.content, exported_lines.get(file.path, ()))
             comments = re.findall(RegexPattern.COMMENT.value, file_content, re.RegexFlag.MULTILINE)
             for comment in comments:
                 file_content = file_content.replace(comment, '')
-            global_module_fragment.append(f'// {file.filename}')
+            global_module_fragment.add(f'// {file.filename}')
 
             preprocessing_directives = re.findall(RegexPattern.PREPROCESSING_DIRECTIVE.value, file_content,
                                                   re.RegexFlag.MULTILINE)
@@ -441,54 +968,150 @@ class Modularizer:
                 file_content = file_content.replace(pd, '')
             pds = self.comment_out_include_guards(file.filename, preprocessing_directives)
             pds = self.comment_out_duplicate_includes(global_module_fragment, pds)
-            global_module_fragment = global_module_fragment + pds
+            global_module_fragment.update(pds)
+            lines = self.comment_out_unnecessary_includes(module_files, [f'// {file.filename}'] + pds + [''])
+            for line in self.comment_out_imported_includes(imported_files.get(file.path, []), lines):
+                yield f'\n{line}'
 
-            global_module_fragment.append('\n')
-            module_content.append(f'// {file.filename}')
-            if any(header.filename == file.filename for header in headers):
+            module_body.write(f'\n// {file.filename}')
+            if exported_lines is None and file.filename in header_filenames:
+                # without the entity tables the first namespace of every header is exported
                 file_content = file_content.replace('namespace', 'export namespace', 1)
-                # TODO: export symbols based on CppEntity
-            module_content = module_content + file_content.splitlines()
-            module_content.append('\n')
-        global_module_fragment = self.comment_out_unnecessary_includes([file.path for file in files],
-                                                                       global_module_fragment)
-        global_module_fragment.append('\n')
-        module = global_module_fragment + module_content
-        module = '\n'.join(module)
-        module = re.sub(r'\n{3,}', '\n\n', module, flags=re.RegexFlag.MULTILINE)
-        return module
+            for line in file_content.splitlines():
+                module_body.write(f'\n{line}')
+            module_body.write('\n\n')
+        yield '\n\n'
+
+    def _module_chunks(self, module_id: int, module_name: str, module_body: TextIO,
+                       module_names: Dict[int, str] = None) -> Iterator[str]:
+        return self.collapse_blank_lines(itertools.chain(
+            self._generate_module_chunks(module_id, module_name, module_body, module_names),
+            self._read_chunks(module_body)))
+
+    def _generate_module(self, module_id: int, module_name: str, module_names: Dict[int, str] = None) -> str:
+        module_body = io.StringIO()
+        return ''.join(self._module_chunks(module_id, module_name, module_body, module_names))
+
+    def _check_entity_tables(self) -> None:
+        if not self._entity_tables_available():
+            self.ui.info_msg(f'{" and ".join(ENTITY_TABLES)} tables not found, '
+                             f'the first namespace of every header is exported')
 
     def generate_module_files(self) -> None:
-        for i in range(len(self.communities)):
-            if len(self.modules[i]) > 0:
-                self._get_name_and_generate_module_file(i)
+        self._check_entity_tables()
+        # every module is named before any of them is generated, so the imports do not depend on the order
+        module_names = self.default_module_names()
+        module_ids = [i for i in self._get_module_dependency_index().dependency_order()
+                      if len(self.communities[i]) > 0]
+        for i in module_ids:
+            module_names[i] = self.ui.get_module_name(self.modules[i], module_names[i])
+        for i in module_ids:
+            self._generate_module_file_and_report(i, module_names)
 
-    def _generate_and_write_module_file(self, module_id: int, module_name: str) -> pathlib.PurePosixPath:
-        module = self._generate_module(module_id, module_name)
+    def _generate_and_write_module_file(self, module_id: int, module_name: str, file_name: str = None,
+                                        module_names: Dict[int, str] = None) -> pathlib.PurePosixPath:
         path = pathlib.PurePosixPath(self.results_dir).joinpath(self.database_connection.database)
         os.makedirs(path, exist_ok=True)
-        full_path = path.joinpath(f'{module_name}.cpp')
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(module)
+        full_path = path.joinpath(f'{file_name if file_name is not None else module_name}.cpp')
+        # the module body is spooled to a temporary file until the global module fragment is written
+        with open(full_path, 'w', encoding='utf-8') as f, \
+                tempfile.TemporaryFile('w+', encoding='utf-8') as module_body:
+            for chunk in self._module_chunks(module_id, module_name, module_body, module_names):
+                f.write(chunk)
+        if self._background_worker is not None:
+            self._background_worker.discard(('module_files', module_id))
         return full_path
 
+    @staticmethod
+    def primary_module_interface(module_name: str, partition_names: List[str]) -> str:
+        lines = [f'export module {module_name};', '']
+        lines += [f'export import :{partition_name};' for partition_name in partition_names]
+        return '\n'.join(lines) + '\n'
+
+    def _generate_and_write_module_partitions(self, top_module_id: int, module_name: str) \
+            -> List[pathlib.PurePosixPath]:
+        """Writes the leaves of a top level module of the module tree as partitions and the primary interface."""
+        module = self.module_tree.children[top_module_id]
+        leaf_ids = self.module_tree.leaf_range(top_module_id)
+        if module.is_leaf():
+            return [self._generate_and_write_module_file(leaf_ids[0], module_name)]
+        partition_names = module.leaf_names()
+        module_names = self.default_module_names()
+        for module_id, partition_name in zip(leaf_ids, partition_names):
+            module_names[module_id] = f'{module_name}:{partition_name}'
+        paths = [self._generate_and_write_module_file(module_id, module_names[module_id],
+                                                      f'{module_name}-{partition_name}', module_names)
+                 for module_id, partition_name in zip(leaf_ids, partition_names)]
+        full_path = pathlib.PurePosixPath(self.results_dir).joinpath(self.database_connection.database,
+                                                                     f'{module_name}.cpp')
+        with open(full_path, 'w', encoding='utf-8') as f:
+            f.write(self.primary_module_interface(module_name, partition_names))
+        return [full_path] + paths
+
+    def _generate_module_file_and_report(self, module_id: int, module_names: Dict[int, str]) -> None:
+        full_path = self._generate_and_write_module_file(module_id, module_names[module_id],
+                                                         module_names=module_names)
+        self.ui.info_msg(f'Module file generated: {full_path}')
+        cycle = [i for i in self._get_module_dependency_index().cycle(module_id) if i != module_id]
+        if len(cycle) > 0:
+            self.ui.info_msg(f'The module is in a dependency cycle with the modules {cycle}, '
+                             f'their files are included instead of imported')
+
     def _get_name_and_generate_module_file(self, module_id):
-        if len(self.modules[module_id]) > 0:
-            module_name = self.ui.get_module_name(self.modules[module_id])
-            full_path = self._generate_and_write_module_file(module_id, module_name)
-            self.ui.info_msg(f'Module file generated: {full_path}')
+        if len(self.communities[module_id]) > 0:
+            # the other modules are imported by their default names, so they are suggested for every module
+            module_names = self.default_module_names()
+            module_names[module_id] = self.ui.get_module_name(self.modules[module_id], module_names[module_id])
+            self._generate_module_file_and_report(module_id, module_names)
         else:
             self.ui.info_msg('No file in module')
 
     def generate_module_file(self):
+        self._check_entity_tables()
+        if self.module_tree is not None:
+            top_module_id = self.ui.get_module_id(len(self.module_tree.children))
+            files = [path for i in self.module_tree.leaf_range(top_module_id) for path in self.modules[i]]
+            module_name = self.ui.get_module_name(files, self.module_tree.children[top_module_id].name)
+            for full_path in self._generate_and_write_module_partitions(top_module_id, module_name):
+                self.ui.info_msg(f'Module file generated: {full_path}')
+            return
         module_id = self.ui.get_module_id(len(self.communities))
         self._get_name_and_generate_module_file(module_id)
 
     def find_module_by_file(self):
         file_path = self.ui.get_user_input('file')
-        module_id = self._find_module_id_by_file_path(file_path)
-        if module_id is not None:
-            self.ui.info_msg(json.dumps(self.modules[module_id], indent=4))
-            self.ui.info_msg(f'module id: {module_id}')
-        else:
+        results = self._get_search_index().search(file_path)
+        if len(results) == 0:
             raise Exception('File not found')
+        if len(results) == 1 and results[0].module_id >= 0:
+            self.ui.info_msg(json.dumps(self.modules[results[0].module_id], indent=4))
+        lines = []
+        for result in results:
+            module = str(result.module_id) if result.module_id >= 0 else '-'
+            fuzzy = ' (similar)' if result.rank[0] == SearchIndex.FUZZY else ''
+            lines.append(f'module id: {module:>4}  {self.path_table.relative_path(result.node_id)}{fuzzy}')
+        self.ui.info_msg('\n'.join(lines))
+
+    def export_database(self):
+        file_format = ''
+        while file_format not in OfflineDataSource.formats:
+            file_format = self.ui.get_user_input(f'format ({", ".join(OfflineDataSource.formats)})').strip().lower()
+        path = pathlib.Path(self.results_dir).joinpath(self.database_connection.database)
+        with self._data_source_lock:
+            path = export_data_source(self.database_connection, path, file_format)
+        self.ui.info_msg(f'Offline dump saved: {path}')
+
+    def export_dependency_graph(self):
+        file_format = ''
+        while file_format not in EXPORT_FORMATS.keys():
+            file_format = self.ui.get_user_input(f'format ({", ".join(EXPORT_FORMATS.keys())})').strip().lower()
+        os.makedirs(self.results_dir, exist_ok=True)
+        path = pathlib.Path(self.results_dir).joinpath(self.database_connection.database)
+        path = export_graph(self.multi_di_graph, path, file_format, self.path_table, self.communities)
+        self.ui.info_msg(f'Dependency graph saved: {path}')
+
+    def batch_analysis(self):
+        from modularizer.batch import load_batch_config, run_batch
+        configs = load_batch_config(self.ui.get_existing_file_path())
+        summary = run_batch(configs, self.results_dir, ui=self.ui)
+        self.ui.info_msg(f'Batch summary saved: {summary["summary_path"]}')
@@ -0,0 +1,126 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+Task = Tuple[Hashable, Callable[[threading.Event], Any]]
+
+
+class SkipTask(Exception):
+    """Raised by a task that decides not to compute its result, e.g. because a prefetch budget is used up."""
+    pass
+
+
+class BackgroundWorker:
+    """Runs tasks one after the other in a daemon thread and keeps their results in a shared cache.
+
+    Every task gets the cancellation event of its run, so long tasks can check it and return early. The results
+    of a cancelled run are not cached.
+    """
+
+    def __init__(self):
+        self.cache: Dict[Hashable, Any] = dict()
+        self.errors: Dict[Hashable, Exception] = dict()
+        self.skipped = 0
+        self._condition = threading.Condition()
+        self._cancelled = threading.Event()
+        self._thread = None
+        self._task_count = 0
+        self._done = 0
+        self._current = None
+
+    def start(self, tasks: List[Task], cache: Dict[Hashable, Any] = None) -> None:
+        """Cancels the running tasks, clears the cache and starts running the given tasks.
+
+        The tasks whose results are in the given cache are not run again. A cancelled task that is still running is
+        not waited for, it finishes in the background without touching the state of the new run.
+        """
+        self.cancel(timeout=0)
+        with self._condition:
+            self.cache = dict(cache) if cache is not None else dict()
+            self.errors = dict()
+            self.skipped = 0
+            self._cancelled = threading.Event()
+            self._task_count = len(tasks)
+            self._done = 0
+            self._current = None
+            self._thread = threading.Thread(target=self._run, args=(tasks, self._cancelled), daemon=True,
+                                            name='modularizer-background-worker')
+            self._condition.notify_all()
+        self._thread.start()
+
+    def _run(self, tasks: List[Task], cancelled: threading.Event) -> None:
+        for key, task in tasks:
+            with self._condition:
+                if cancelled.is_set():
+                    return
+                if key in self.cache:
+                    self._done += 1
+                    continue
+                self._current = key
+            result = None
+            error = None
+            skipped = False
+            try:
+                result = task(cancelled)
+            except SkipTask:
+                skipped = True
+            except Exception as ex:
+                error = ex
+            with self._condition:
+                if cancelled.is_set():
+                    return
+                self._current = None
+                if skipped:
+                    self.skipped += 1
+                elif error is None:
+                    self.cache[key] = result
+                else:
+                    self.errors[key] = error
+                self._done += 1
+                self._condition.notify_all()
+
+    def get(self, key: Hashable, compute: Callable[[], Any] = None) -> Any:
+        """Returns the cached result of a task.
+
+        If the task is running it waits for it, if it has not run yet (or failed or was skipped) compute is
+        called in the calling thread and its result is cached.
+        """
+        with self._condition:
+            while self._current == key and not self._cancelled.is_set():
+                self._condition.wait(0.1)
+            if key in self.cache:
+                return self.cache[key]
+        if compute is None:
+            return None
+        result = compute()
+        with self._condition:
+            self.cache[key] = result
+        return result
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._condition:
+            self.cache[key] = value
+
+    def discard(self, key: Hashable) -> None:
+        with self._condition:
+            self.cache.pop(key, None)
+
+    def snapshot(self) -> Dict[Hashable, Any]:
+        """Returns a copy of the cached results."""
+        with self._condition:
+            return dict(self.cache)
+
+    def progress(self) -> Tuple[int, int, Optional[Hashable]]:
+        """Returns the number of finished tasks, the number of all tasks and the key of the running task."""
+        with self._condition:
+            return self._done, self._task_count, self._current
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._cancelled.is_set()
+
+    def cancel(self, timeout: float = None) -> None:
+        with self._condition:
+            self._cancelled.set()
+            self._current = None
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread() and timeout != 0:
+            self._thread.join(timeout)
@@ -0,0 +1,243 @@
+from collections import Counter
+import csv
+import heapq
+import itertools
+import networkx as nx
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+WEIGHT = 'node_weight'
+
+
+def load_compile_times(file_path: str) -> Dict[str, float]:
+    """Loads a CSV file of path, compile time (seconds) rows, a header row is skipped."""
+    compile_times = dict()
+    with open(file_path, 'r', newline='') as f:
+        for row in csv.reader(f):
+            if len(row) < 2:
+                continue
+            try:
+                compile_times[row[0].strip()] = float(row[1])
+            except ValueError:
+                if len(compile_times) > 0:
+                    raise Exception(f'Invalid compile time: {row[1]}')
+    return compile_times
+
+
+def set_node_weights(graph: nx.MultiDiGraph, sizes: Dict[Hashable, int], compile_times: Dict[Hashable, float] = None,
+                     size_unit: int = 1024, fan_in_cost: float = 0.1, fan_out_cost: float = 0.5) -> None:
+    """Sets the estimated compile cost of every file as its node_weight attribute.
+
+    The estimate is one unit per size_unit characters of content (at least one unit) plus fan_out_cost for every
+    dependency of the file (the parsing of what it includes) and fan_in_cost for every file depending on it. The
+    files with a known compile time get that instead, and the estimates of the others are scaled to the unit of
+    the compile times.
+    """
+    estimates = {node: max(sizes.get(node, 0) / size_unit, 1.0) + fan_out_cost * graph.out_degree(node) +
+                 fan_in_cost * graph.in_degree(node) for node in graph.nodes}
+    scale = 1.0
+    if compile_times:
+        timed = [node for node in graph.nodes if node in compile_times]
+        estimated_total = sum(estimates[node] for node in timed)
+        if estimated_total > 0:
+            scale = sum(compile_times[node] for node in timed) / estimated_total
+    for node in graph.nodes:
+        if compile_times and node in compile_times:
+            graph.nodes[node][WEIGHT] = compile_times[node]
+        else:
+            graph.nodes[node][WEIGHT] = estimates[node] * scale
+
+
+def module_costs(graph: nx.MultiDiGraph, communities: List[Iterable[Hashable]]) -> List[float]:
+    return [sum(graph.nodes[node].get(WEIGHT, 1) for node in community) for community in communities]
+
+
+def cut_edges(graph: nx.MultiDiGraph, communities: List[Iterable[Hashable]]) -> int:
+    module_ids = {node: i for i in range(len(communities)) for node in communities[i]}
+    return sum(1 for u, v in graph.edges() if module_ids.get(u, -1) != module_ids.get(v, -1))
+
+
+def _coupling(graph: nx.MultiDiGraph, node: Hashable, module_ids: Dict[Hashable, int]) -> Counter:
+    """Number of edges between the node and each module, in both directions."""
+    coupling = Counter()
+    for u, v in itertools.chain(graph.out_edges(node), graph.in_edges(node)):
+        other = v if u == node else u
+        if other != node and other in module_ids:
+            coupling[module_ids[other]] += 1
+    return coupling
+
+
+def balance_communities(graph: nx.MultiDiGraph, communities: List[Iterable[Hashable]], tolerance: float = 0.2,
+                        max_cut_increase: float = 0.1, max_moves: int = None) -> List[Set[Hashable]]:
+    """Moves files out of the modules whose compile cost exceeds the average by more than the tolerance.
+
+    A file is moved to a lighter module it has dependencies with, the moves that cut the fewest edges first. The
+    number of cut edges may grow by at most max_cut_increase of the original cut (moves that do not cut new edges
+    are always allowed). The lighter module stays lighter than the heavier one was, so every move decreases the
+    sum of the squared module costs and the balancing terminates.
+
+    The coupling of the files with the modules and a queue of the candidate moves of every heavy module are kept
+    up to date after each move, only the moved file and its neighbours are reconsidered.
+    """
+    communities = [set(community) for community in communities]
+    if len(communities) < 2:
+        return communities
+    module_ids = {node: i for i in range(len(communities)) for node in communities[i]}
+    costs = module_costs(graph, communities)
+    limit = sum(costs) / len(communities) * (1 + tolerance)
+    cut_budget = max_cut_increase * cut_edges(graph, communities)
+    cut_increase = 0
+    moves = 0
+    # computed for the files of the heavy modules when they are first needed
+    coupling: Dict[Hashable, Counter] = dict()
+    # module -> heap of (key of the best move, sequence number, file, version of the file when it was pushed)
+    queues: List[Optional[list]] = [None] * len(communities)
+    versions: Counter = Counter()
+    sequence = itertools.count()
+
+    def best_move(node: Hashable) -> Optional[Tuple[Tuple[int, float, float], int]]:
+        i = module_ids[node]
+        weight = graph.nodes[node].get(WEIGHT, 1)
+        if node not in coupling:
+            coupling[node] = _coupling(graph, node, module_ids)
+        node_coupling = coupling[node]
+        best = None
+        for j in node_coupling.keys():
+            if j == i or costs[j] + weight >= costs[i]:
+                continue
+            delta = node_coupling[i] - node_coupling[j]
+            if delta > 0 and cut_increase + delta > cut_budget:
+                continue
+            key = (delta, -weight, costs[j])
+            if best is None or key < best[0]:
+                best = (key, j)
+        return best
+
+    def push(node: Hashable) -> None:
+        queue = queues[module_ids[node]]
+        if queue is not None:
+            move = best_move(node)
+            if move is not None:
+                heapq.heappush(queue, (move[0], next(sequence), node, versions[node]))
+
+    def pop_best_move(i: int) -> Optional[Tuple[Hashable, int]]:
+        if queues[i] is None:
+            queues[i] = []
+            for node in communities[i]:
+                push(node)
+        queue = queues[i]
+        while len(queue) > 0:
+            key, _, node, version = queue[0]
+            if module_ids[node] != i or versions[node] != version:
+                heapq.heappop(queue)
+                continue
+            # the moves get worse as the costs and the cut change, the queued key is updated when it is outdated
+            move = best_move(node)
+            if move is None:
+                heapq.heappop(queue)
+            elif move[0] != key:
+                heapq.heapreplace(queue, (move[0], next(sequence), node, version))
+            else:
+                heapq.heappop(queue)
+                return node, move[1]
+        return None
+
+    while max_moves is None or moves < max_moves:
+        best = None
+        for i in sorted(range(len(communities)), key=lambda i: -costs[i]):
+            if costs[i] <= limit:
+                break
+            best = pop_best_move(i)
+            if best is not None:
+                break
+        if best is None:
+            break
+        node, j = best
+        i = module_ids[node]
+        weight = graph.nodes[node].get(WEIGHT, 1)
+        cut_increase += coupling[node][i] - coupling[node][j]
+        communities[i].remove(node)
+        communities[j].add(node)
+        module_ids[node] = j
+        costs[i] -= weight
+        costs[j] += weight
+        moves += 1
+        neighbours = Counter(v if u == node else u for u, v in itertools.chain(graph.out_edges(node),
+                                                                                graph.in_edges(node)))
+        neighbours.pop(node, None)
+        for neighbour, count in neighbours.items():
+            if neighbour not in module_ids:
+                continue
+            if neighbour in coupling:
+                neighbour_coupling = coupling[neighbour]
+                neighbour_coupling[i] -= count
+                if neighbour_coupling[i] == 0:
+                    del neighbour_coupling[i]
+                neighbour_coupling[j] += count
+            versions[neighbour] += 1
+            push(neighbour)
+        versions[node] += 1
+        push(node)
+    return [community for community in communities if len(community) > 0]
+
+
+def module_dependency_graph(graph: nx.MultiDiGraph, communities: List[Iterable[Hashable]]) -> nx.DiGraph:
+    """Graph of the modules, an edge i -> j means a file of module i depends on a file of module j.
+
+    The edges have the number of file dependencies as weight, the modules their compile cost.
+    """
+    module_ids = {node: i for i in range(len(communities)) for node in communities[i]}
+    module_graph = nx.DiGraph()
+    for i, cost in enumerate(module_costs(graph, communities)):
+        module_graph.add_node(i, cost=cost)
+    for u, v in graph.edges():
+        i = module_ids.get(u)
+        j = module_ids.get(v)
+        if i is not None and j is not None and i != j:
+            if module_graph.has_edge(i, j):
+                module_graph[i][j]['weight'] += 1
+            else:
+                module_graph.add_edge(i, j, weight=1)
+    return module_graph
+
+
+def critical_path(module_graph: nx.DiGraph) -> Tuple[float, List[List[int]]]:
+    """Returns the cost of the most expensive chain of module builds and the modules on it.
+
+    A module can be built when the modules it depends on are built. Modules in a dependency cycle cannot be built
+    separately, so a cycle is one step of the chain with the total cost of its modules.
+    """
+    condensation = nx.condensation(module_graph)
+    cost = {c: sum(module_graph.nodes[m]['cost'] for m in condensation.nodes[c]['members'])
+            for c in condensation.nodes}
+    # finish[c]: cost of the most expensive chain ending with building c, its dependencies (successors) first
+    finish = dict()
+    previous = dict()
+    for c in reversed(list(nx.topological_sort(condensation))):
+        dependency = max(condensation.successors(c), key=lambda d: finish[d], default=None)
+        finish[c] = cost[c] + (finish[dependency] if dependency is not None else 0)
+        previous[c] = dependency
+    if len(finish) == 0:
+        return 0.0, []
+    c = max(finish.keys(), key=lambda c: finish[c])
+    length = finish[c]
+    path = []
+    while c is not None:
+        path.append(sorted(condensation.nodes[c]['members']))
+        c = previous[c]
+    path.reverse()
+    return length, path
+
+
+def balance_report(graph: nx.MultiDiGraph, communities: List[Iterable[Hashable]]) -> dict:
+    costs = module_costs(graph, communities)
+    total = sum(costs)
+    length, path = critical_path(module_dependency_graph(graph, communities))
+    mean = total / len(costs) if len(costs) > 0 else 0
+    return {'total cost': total,
+            'largest module cost': max(costs, default=0),
+            'smallest module cost': min(costs, default=0),
+            'imbalance (largest / mean)': max(costs, default=0) / mean if mean > 0 else 0,
+            'cross-module dependencies': cut_edges(graph, communities),
+            'critical path cost': length,
+            'critical path': path,
+            'parallelism (total / critical path)': total / length if length > 0 else 0}
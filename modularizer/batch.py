@@ -0,0 +1,150 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import json
+import multiprocessing
+import os
+import pathlib
+import time
+from typing import List
+
+from modularizer import modularization_file
+from modularizer.user_interface.user_interface import UserInterface
+
+# keys of a batch connection config that are not passed on as connection parameters
+_BATCH_KEYS = ['name', 'project_root', 'dirs_to_exclude', 'graph_reduction']
+
+
+def load_batch_config(file_path: str) -> List[dict]:
+    """Loads a JSON list of connection configs.
+
+    Besides the connection parameters (or the 'path' of an offline dump) a config may have a 'name' for its result
+    files, a 'project_root' and a list of 'dirs_to_exclude' (relative to the project root). Without a project root
+    it is detected the same way as in the interactive mode. 'graph_reduction': true clusters the reduced graph.
+    """
+    with open(file_path, 'r') as f:
+        configs = json.load(f)
+    if not isinstance(configs, list) or not all(isinstance(config, dict) for config in configs):
+        raise Exception(f'Batch config must be a list of connection configs: {file_path}')
+    return configs
+
+
+def _config_name(config: dict) -> str:
+    if 'name' in config.keys():
+        return str(config['name'])
+    if 'path' in config.keys():
+        return pathlib.Path(config['path']).stem
+    return str(config.get('database', ''))
+
+
+def analyze_database(config: dict, results_dir: str) -> dict:
+    """Builds the default modularization of one database and saves it with its metrics.
+
+    It runs in a worker process with its own connection, every error is reported in the returned result.
+    """
+    from modularizer.app import Modularizer
+    from modularizer.data_source import create_data_source
+    from modularizer.user_interface.batch import BatchUserInterface
+
+    name = _config_name(config)
+    result = {'name': name, 'timings': dict()}
+    ui = BatchUserInterface()
+    data_source = None
+    start = time.perf_counter()
+    try:
+        connection = {key: value for key, value in config.items() if key not in _BATCH_KEYS}
+        data_source = create_data_source(connection)
+        tables = data_source.get_table_names()
+        for table in ['CppEdge', 'File', 'FileContent']:
+            if table not in tables:
+                raise Exception(f"Table '{table}' not found in database")
+        result['database'] = data_source.database
+        result['timings']['connect'] = time.perf_counter() - start
+
+        modularizer = Modularizer(ui, data_source, background_tasks=False, project_root=config.get('project_root'),
+                                  dirs_to_exclude=config.get('dirs_to_exclude'),
+                                  graph_reduction=config.get('graph_reduction'))
+        result['timings'].update(modularizer.timings)
+        result['project_root'] = modularizer.project_root
+        result['dirs_to_exclude'] = modularizer.dirs_to_exclude
+
+        step = time.perf_counter()
+        result['metrics'] = Modularizer.get_metrics(modularizer.multi_di_graph, modularizer.communities)
+        result['timings']['metrics'] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        path = pathlib.Path(results_dir).joinpath(name)
+        os.makedirs(path, exist_ok=True)
+        result['files'] = [str(path.joinpath('modularization.json')),
+                           str(path.joinpath('modularization' + modularization_file.SUFFIX)),
+                           str(path.joinpath('metrics.json'))]
+        modularizer.save_modularization(result['files'][0])
+        modularizer.save_modularization(result['files'][1])
+        with open(result['files'][2], 'w', encoding='utf-8') as f:
+            f.write(json.dumps(result['metrics'], indent=4))
+        result['timings']['save'] = time.perf_counter() - step
+    except BaseException as ex:
+        # SystemExit included, a worker must always report back
+        result['error'] = str(ex) or type(ex).__name__
+    finally:
+        if data_source is not None:
+            data_source.close()
+    result['timings']['total'] = time.perf_counter() - start
+    result['messages'] = ui.messages
+    return result
+
+
+def summarize(results: List[dict], wall_time: float) -> dict:
+    succeeded = [result for result in results if 'error' not in result.keys()]
+    totals = dict()
+    for key in ['files', 'dependencies', 'modules', 'cross-module dependencies']:
+        totals[key] = sum(result['metrics'][key] for result in succeeded)
+    return {'databases': len(results),
+            'succeeded': len(succeeded),
+            'failed': len(results) - len(succeeded),
+            'wall time': wall_time,
+            # wall-clock time of the analyses summed over the workers, not the CPU time they used
+            'worker time': sum(result['timings']['total'] for result in results),
+            'totals': totals,
+            'results': results}
+
+
+def run_batch(configs: List[dict], results_dir: str, max_workers: int = None, ui: UserInterface = None) -> dict:
+    """Analyzes the databases concurrently in worker processes and saves an aggregate summary.
+
+    The results of a run are saved under results_dir/batch_<timestamp>/<name>/, the summary next to them.
+    """
+    names = [_config_name(config) for config in configs]
+    if len(set(names)) != len(names):
+        raise Exception('The names of the databases in a batch must be unique, set a name in the configs')
+    batch_dir = pathlib.Path(results_dir).joinpath(f'batch_{datetime.now().strftime("%Y%m%d_%H%M%S")}')
+    os.makedirs(batch_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = []
+    if len(configs) > 0:
+        max_workers = min(max_workers or os.cpu_count() or 1, len(configs))
+        # spawn, because the parent process may have background threads running
+        with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {executor.submit(analyze_database, config, str(batch_dir)): name
+                       for config, name in zip(configs, names)}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as ex:
+                    result = {'name': futures[future], 'timings': {'total': 0.0}, 'error': str(ex)}
+                results.append(result)
+                if ui is not None:
+                    if 'error' in result.keys():
+                        ui.info_msg(f'[{len(results)}/{len(configs)}] {result["name"]} failed: {result["error"]}')
+                    else:
+                        ui.info_msg(f'[{len(results)}/{len(configs)}] {result["name"]} done in '
+                                    f'{result["timings"]["total"]:.1f} s')
+    results.sort(key=lambda result: names.index(result['name']))
+    summary = summarize(results, time.perf_counter() - start)
+    summary_path = batch_dir.joinpath('summary.json')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(summary, indent=4))
+    summary['summary_path'] = str(summary_path)
+    if ui is not None:
+        ui.info_msg(f'{summary["succeeded"]}/{summary["databases"]} databases analyzed in '
+                    f'{summary["wall time"]:.1f} s')
+    return summary
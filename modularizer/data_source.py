@@ -0,0 +1,119 @@
+from abc import ABCMeta, abstractmethod
+from collections import namedtuple
+import os
+import pathlib
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+Column = namedtuple('Column', ['name', 'type_code'])
+
+REQUIRED_TABLES = ['CppEdge', 'File', 'FileContent']
+
+SQLITE_SUFFIXES = ['.sqlite', '.sqlite3', '.db']
+
+# tables of the C++ parser the declarations used by other modules are queried from, exported symbols need them
+ENTITY_TABLES = ['CppAstNode', 'CppEntity']
+
+# columns of the CodeCompass tables used by the analysis, in the order they are exported
+EXPORTED_COLUMNS = {'CppEdge': ['from', 'to', 'type'],
+                    'File': ['id', 'path', 'filename', 'content'],
+                    'FileContent': ['hash', 'content']}
+
+
+class DataSource(metaclass=ABCMeta):
+    database = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls is DataSource:
+            raise TypeError(f"only children of '{cls.__name__}' may be instantiated")
+        return object.__new__(cls)
+
+    @abstractmethod
+    def get_table_names(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    def find_file_path(self, pattern: str) -> Optional[str]:
+        """Returns the shortest path of the files matching the LIKE pattern (escaped with a backslash) or None."""
+        pass
+
+    @abstractmethod
+    def query_cpp_edges(self, project_root: str = '', dirs_to_exclude: Iterable = (),
+                        edge_types: Iterable[int] = None) -> Tuple[list, tuple]:
+        """Returns the rows (frompath, topath, type) and the description of the edges between the files under
+        project_root, skipping the excluded directories and the edges of unwanted types."""
+        pass
+
+    @abstractmethod
+    def query_file_contents(self, paths: List[str]) -> Tuple[tuple, Iterable[tuple]]:
+        """Returns the description and the rows (id, path, filename, content) of the given files. The rows may be
+        iterated only once, before the next query."""
+        pass
+
+    @abstractmethod
+    def query_exported_declarations(self, paths: List[str]) -> Tuple[tuple, list]:
+        """Returns the description and the rows (path, entityhash, line) of the declarations and definitions in the
+        given files whose entity is used in other files. It needs the ENTITY_TABLES."""
+        pass
+
+    @abstractmethod
+    def query_file_sizes(self, project_root: str = '') -> List[Tuple[str, int]]:
+        """Returns the path and the length of the content of every file under the project root."""
+        pass
+
+    @abstractmethod
+    def iter_table(self, table: str, chunk_size: int = 10000) -> Iterator[list]:
+        """Yields the rows of a table (restricted to EXPORTED_COLUMNS) in chunks."""
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def create_data_source(connection: dict) -> DataSource:
+    """Creates an offline data source if the connection refers to a local dump, a database connection otherwise."""
+    if 'path' in connection.keys():
+        from modularizer.offline_data_source import OfflineDataSource
+        return OfflineDataSource(pathlib.Path(connection['path']), connection.get('database'))
+    from modularizer.database_connection import DatabaseConnection
+    return DatabaseConnection(connection)
+
+
+def is_offline_dump(path: str) -> bool:
+    """Tells whether a path names an offline dump: a SQLite file by its suffix or a table directory by a trailing /."""
+    return pathlib.Path(path).suffix.lower() in SQLITE_SUFFIXES or path.endswith(('/', os.sep))
+
+
+def escape_like(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def root_like_pattern(project_root: str = '') -> str:
+    """LIKE pattern of the files under the project root, or of every file if it is empty."""
+    if project_root == '':
+        return '%'
+    return escape_like(str(project_root).rstrip('/')) + '/%'
+
+
+def build_cpp_edge_query(query_template: str, project_root: str = '', dirs_to_exclude: Iterable = (),
+                         edge_types: Iterable[int] = None) -> Tuple[str, list]:
+    """Fills the <CONDITIONS> of data/cpp_edge_query.txt with the filters and returns the query with its
+    (pyformat) parameters. Directories are matched with prefix LIKE predicates, so an index on "File".path
+    (with text_pattern_ops on PostgreSQL) can be used to evaluate them."""
+    conditions = []
+    params = []
+    for column in ['fromFile.path', 'toFile.path']:
+        if project_root != '':
+            conditions.append(f"{column} like %s escape '\\'")
+            params.append(root_like_pattern(project_root))
+        for path in dirs_to_exclude:
+            conditions.append(f"{column} <> %s and {column} not like %s escape '\\'")
+            params += [str(path).rstrip('/'), escape_like(str(path).rstrip('/')) + '/%']
+    if edge_types is not None:
+        edge_types = list(edge_types)
+        if len(edge_types) > 0:
+            conditions.append(f'"CppEdge".type in ({", ".join(["%s"] * len(edge_types))})')
+            params += edge_types
+        else:
+            conditions.append('1 = 0')
+    where_clause = ('where ' + '\n  and '.join(conditions)) if len(conditions) > 0 else ''
+    return query_template.replace('<CONDITIONS>', where_clause), params
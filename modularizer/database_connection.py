@@ -1,7 +1,13 @@
+import pathlib
 import psycopg2
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+from modularizer.data_source import DataSource, EXPORTED_COLUMNS, build_cpp_edge_query, root_like_pattern
+
+
+class DatabaseConnection(DataSource):
+    _data_dir = pathlib.Path(__file__).resolve().parent.joinpath('data')
 
-class DatabaseConnection:
     def __init__(self, connection: dict) -> None:
         self.database = connection["database"]
         self.user = connection["user"]
@@ -17,4 +23,57 @@ class DatabaseConnection:
         self.cursor = self.connection.cursor()
 
     def __str__(self) -> str:
-        return "database=" + self.database + ", user=" + self.user + ", host=" + self.host + ", port=" + self.port
\ No newline at end of file
+        return "database=" + self.database + ", user=" + self.user + ", host=" + self.host + ", port=" + self.port
+
+    def get_table_names(self) -> List[str]:
+        self.cursor.execute("select relname from pg_class where relkind='r' and relname !~ '^(pg_|sql_)';")
+        return [record[0] for record in self.cursor.fetchall()]
+
+    def find_file_path(self, pattern: str) -> Optional[str]:
+        with open(self._data_dir.joinpath('file_path_query.txt'), 'r') as f:
+            query = f.read()
+        self.cursor.execute(query, [pattern])
+        record = self.cursor.fetchone()
+        return record[0] if record is not None else None
+
+    def query_cpp_edges(self, project_root: str = '', dirs_to_exclude: Iterable = (),
+                        edge_types: Iterable[int] = None) -> Tuple[list, tuple]:
+        with open(self._data_dir.joinpath('cpp_edge_query.txt'), 'r') as f:
+            query, params = build_cpp_edge_query(f.read(), project_root, dirs_to_exclude, edge_types)
+        self.cursor.execute(query, params)
+        return self.cursor.fetchall(), self.cursor.description
+
+    def query_file_contents(self, paths: List[str]) -> Tuple[tuple, Iterable[tuple]]:
+        with open(self._data_dir.joinpath('file_content_query.txt'), 'r') as f:
+            query = f.read().replace('<LIST_OF_PATHS>', ','.join([f"'{path}'" for path in paths]))
+        self.cursor.execute(query)
+        # iterating the cursor converts the rows one by one instead of building the list of all of them
+        return self.cursor.description, self.cursor
+
+    def query_exported_declarations(self, paths: List[str]) -> Tuple[tuple, list]:
+        # astType 2 and 3: declaration and definition, symbolType 5 and 8: macro and namespace (not exportable)
+        with open(self._data_dir.joinpath('exported_declaration_query.txt'), 'r') as f:
+            query = f.read()
+        self.cursor.execute(query, [list(paths), list(paths)])
+        return self.cursor.description, self.cursor.fetchall()
+
+    def query_file_sizes(self, project_root: str = '') -> List[Tuple[str, int]]:
+        with open(self._data_dir.joinpath('file_size_query.txt'), 'r') as f:
+            query = f.read()
+        self.cursor.execute(query, [root_like_pattern(project_root)])
+        return self.cursor.fetchall()
+
+    def iter_table(self, table: str, chunk_size: int = 10000) -> Iterator[list]:
+        columns = ', '.join(f'"{column}"' for column in EXPORTED_COLUMNS[table])
+        # a named (server side) cursor streams the table instead of transferring it at once
+        with self.connection.cursor(name=f'export_{table.lower()}') as cursor:
+            cursor.itersize = chunk_size
+            cursor.execute(f'select {columns} from "{table}"')
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if len(rows) == 0:
+                    break
+                yield rows
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,132 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class Directory:
+    __slots__ = ('path', 'name', 'parent', 'children', 'files', 'edges')
+
+    def __init__(self, path: str, name: str, parent: Optional['Directory']):
+        self.path = path
+        self.name = name
+        self.parent = parent
+        self.children: Dict[str, Directory] = dict()
+        # both counts include the subdirectories
+        self.files = 0
+        self.edges = 0
+
+
+class DirectoryIndex:
+    """Directory tree of the files of the edge rows with the number of files and edges under each directory.
+
+    An edge is counted for a directory if at least one of its files is under it.
+    """
+    exclusion_patterns = [('build', re.compile(r'^(_?build|build[-_.].*|cmake-build-.*)$', re.IGNORECASE)),
+                          ('generated', re.compile(r'^(gen|gen-.*|generated|autogen|.*_autogen)$', re.IGNORECASE)),
+                          ('third-party', re.compile(r'^(3rd[-_]?party|third[-_]?party|external|vendor'
+                                                     r'|submodules)$', re.IGNORECASE))]
+    # names that are common in the sources too, they are matched only directly under the project root
+    root_exclusion_patterns = [('build', re.compile(r'^(out|bin|obj)$', re.IGNORECASE)),
+                               ('third-party', re.compile(r'^(extern|deps|contrib)$', re.IGNORECASE))]
+
+    def __init__(self):
+        self.root = Directory('', '', None)
+        self._directories: Dict[str, Directory] = {'': self.root}
+        self._files = set()
+
+    @staticmethod
+    def from_query_results(query_results, from_path_index: int, to_path_index: int) -> 'DirectoryIndex':
+        index = DirectoryIndex()
+        for record in query_results:
+            index.add_edge(record[from_path_index], record[to_path_index])
+        return index
+
+    def _directory(self, path: str) -> Directory:
+        directory = self._directories.get(path)
+        if directory is None:
+            # the root directory ('/' of absolute paths) is stored with an empty path
+            separator = path.rfind('/')
+            parent = self._directory(path[:separator] if separator > 0 else '')
+            name = path[separator + 1:]
+            directory = Directory(path, name, parent)
+            parent.children[name] = directory
+            self._directories[path] = directory
+        return directory
+
+    def _file_directory(self, file_path: str) -> Directory:
+        separator = file_path.rfind('/')
+        return self._directory(file_path[:separator]) if separator > 0 else self.root
+
+    def _add_file(self, file_path: str, directory: Directory) -> None:
+        if file_path not in self._files:
+            self._files.add(file_path)
+            while directory is not None:
+                directory.files += 1
+                directory = directory.parent
+
+    def add_edge(self, from_path: str, to_path: str) -> None:
+        from_directory = self._file_directory(from_path)
+        to_directory = self._file_directory(to_path)
+        self._add_file(from_path, from_directory)
+        self._add_file(to_path, to_directory)
+        counted = set()
+        directory = from_directory
+        while directory is not None:
+            directory.edges += 1
+            counted.add(id(directory))
+            directory = directory.parent
+        directory = to_directory
+        while directory is not None and id(directory) not in counted:
+            directory.edges += 1
+            directory = directory.parent
+
+    def find(self, path: str) -> Optional[Directory]:
+        return self._directories.get(str(path).rstrip('/'))
+
+    def file_count(self, path: str) -> int:
+        directory = self.find(path)
+        return directory.files if directory is not None else 0
+
+    def edge_count(self, path: str) -> int:
+        directory = self.find(path)
+        return directory.edges if directory is not None else 0
+
+    def subdirectories(self, path: str) -> List[Directory]:
+        """Returns the subdirectories of a directory, the largest first."""
+        directory = self.find(path)
+        if directory is None:
+            return []
+        return sorted(directory.children.values(), key=lambda d: (-d.files, d.name))
+
+    def find_project_root(self, project_name: str) -> str:
+        """Returns the shallowest directory with project_name in its name or an empty string."""
+        level = [self.root]
+        while len(level) > 0:
+            for directory in level:
+                if project_name != '' and project_name in directory.name:
+                    return directory.path
+            level = [child for directory in level for child in directory.children.values()]
+        return ''
+
+    def find_directories_to_exclude(self, project_root: str, kinds: Iterable[str] = None) \
+            -> List[Tuple[Directory, str]]:
+        """Returns the build, generated and third-party directories under the project root with their kinds.
+
+        The subdirectories of a found directory are not searched.
+        """
+        patterns = [(kind, pattern) for kind, pattern in self.exclusion_patterns if kinds is None or kind in kinds]
+        root_patterns = patterns + [(kind, pattern) for kind, pattern in self.root_exclusion_patterns
+                                    if kinds is None or kind in kinds]
+        project_directory = self.find(project_root)
+        if project_directory is None:
+            return []
+        found = []
+        stack = list(reversed(self.subdirectories(project_root)))
+        while len(stack) > 0:
+            directory = stack.pop()
+            candidates = root_patterns if directory.parent is project_directory else patterns
+            kind = next((kind for kind, pattern in candidates if pattern.match(directory.name)), None)
+            if kind is not None:
+                found.append((directory, kind))
+            else:
+                stack += reversed(self.subdirectories(directory.path))
+        return found
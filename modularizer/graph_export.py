@@ -0,0 +1,139 @@
+import networkx as nx
+import pathlib
+from typing import Dict, Hashable, Iterator, List, TextIO, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from modularizer.path_table import PathTable, node_path_getter
+
+# file format -> suffix
+EXPORT_FORMATS = {'graphml': '.graphml', 'gexf': '.gexf', 'arrow': '.arrow', 'parquet': '.parquet'}
+
+
+def module_ids_of(communities: list) -> Dict[Hashable, int]:
+    module_ids = dict()
+    if communities is not None:
+        for i in range(len(communities)):
+            for node in communities[i]:
+                module_ids[int(node) if not isinstance(node, str) else node] = i
+    return module_ids
+
+
+def _node_records(graph: nx.MultiDiGraph, path_table: PathTable, module_ids: Dict[Hashable, int]) \
+        -> Iterator[Tuple[Hashable, str, int]]:
+    path_of = node_path_getter(graph, path_table)
+    for node in graph.nodes:
+        yield node, path_of(node), module_ids.get(node, -1)
+
+
+def _write_graphml(graph: nx.MultiDiGraph, f: TextIO, path_table: PathTable, module_ids: Dict[Hashable, int]) \
+        -> None:
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+            'xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns '
+            'http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">\n'
+            '  <key id="path" for="node" attr.name="path" attr.type="string"/>\n'
+            '  <key id="community" for="node" attr.name="community" attr.type="int">'
+            '<default>-1</default></key>\n'
+            '  <key id="type" for="edge" attr.name="type" attr.type="string"/>\n'
+            '  <graph id="G" edgedefault="directed">\n')
+    for node, path, module_id in _node_records(graph, path_table, module_ids):
+        f.write(f'    <node id={quoteattr(str(node))}><data key="path">{escape(path)}</data>'
+                f'<data key="community">{module_id}</data></node>\n')
+    for i, (u, v, label) in enumerate(graph.edges(data='label', default='')):
+        f.write(f'    <edge id="e{i}" source={quoteattr(str(u))} target={quoteattr(str(v))}>'
+                f'<data key="type">{escape(str(label))}</data></edge>\n')
+    f.write('  </graph>\n</graphml>\n')
+
+
+def _write_gexf(graph: nx.MultiDiGraph, f: TextIO, path_table: PathTable, module_ids: Dict[Hashable, int]) -> None:
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<gexf xmlns="http://gexf.net/1.3" version="1.3">\n'
+            '  <graph mode="static" defaultedgetype="directed">\n'
+            '    <attributes class="node">\n'
+            '      <attribute id="0" title="community" type="integer"><default>-1</default></attribute>\n'
+            '    </attributes>\n'
+            '    <nodes>\n')
+    for node, path, module_id in _node_records(graph, path_table, module_ids):
+        f.write(f'      <node id={quoteattr(str(node))} label={quoteattr(path)}><attvalues>'
+                f'<attvalue for="0" value="{module_id}"/></attvalues></node>\n')
+    f.write('    </nodes>\n'
+            '    <edges>\n')
+    for i, (u, v, label) in enumerate(graph.edges(data='label', default='')):
+        f.write(f'      <edge id="{i}" source={quoteattr(str(u))} target={quoteattr(str(v))} '
+                f'label={quoteattr(str(label))}/>\n')
+    f.write('    </edges>\n'
+            '  </graph>\n'
+            '</gexf>\n')
+
+
+def write_xml(graph: nx.MultiDiGraph, path: pathlib.Path, file_format: str = 'graphml', path_table: PathTable = None,
+              communities: list = None) -> None:
+    """Writes the graph node by node and edge by edge as GraphML or GEXF, the document is never built in memory.
+
+    The nodes have their full path and module id (-1 if they are not in a module), the edges their type.
+    """
+    writers = {'graphml': _write_graphml, 'gexf': _write_gexf}
+    if file_format not in writers.keys():
+        raise Exception(f'Unknown XML graph format: {file_format}')
+    with open(path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        writers[file_format](graph, f, path_table, module_ids_of(communities))
+
+
+def _edge_batches(graph: nx.MultiDiGraph, path_table: PathTable, module_ids: Dict[Hashable, int],
+                  batch_size: int) -> Iterator[Dict[str, List]]:
+    path_of = node_path_getter(graph, path_table)
+    columns = ['source', 'target', 'type', 'source_community', 'target_community']
+    batch = {column: [] for column in columns}
+    for u, v, label in graph.edges(data='label', default=''):
+        batch['source'].append(path_of(u))
+        batch['target'].append(path_of(v))
+        batch['type'].append(str(label))
+        batch['source_community'].append(module_ids.get(u, -1))
+        batch['target_community'].append(module_ids.get(v, -1))
+        if len(batch['source']) == batch_size:
+            yield batch
+            batch = {column: [] for column in columns}
+    if len(batch['source']) > 0:
+        yield batch
+
+
+def write_edge_list(graph: nx.MultiDiGraph, path: pathlib.Path, file_format: str = 'parquet',
+                    path_table: PathTable = None, communities: list = None, batch_size: int = 65536) -> None:
+    """Writes the edges as an Arrow IPC file or a Parquet file one record batch at a time.
+
+    The columns are the source and target paths, the edge type and the module ids of the source and the target.
+    """
+    import pyarrow
+    schema = pyarrow.schema([('source', pyarrow.string()),
+                             ('target', pyarrow.string()),
+                             ('type', pyarrow.string()),
+                             ('source_community', pyarrow.int32()),
+                             ('target_community', pyarrow.int32())])
+    if file_format == 'arrow':
+        import pyarrow.ipc
+        writer = pyarrow.ipc.new_file(str(path), schema)
+    elif file_format == 'parquet':
+        import pyarrow.parquet
+        writer = pyarrow.parquet.ParquetWriter(str(path), schema)
+    else:
+        raise Exception(f'Unknown edge list format: {file_format}')
+    with writer:
+        for batch in _edge_batches(graph, path_table, module_ids_of(communities), batch_size):
+            arrays = [pyarrow.array(batch[field.name], type=field.type) for field in schema]
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+
+
+def export_graph(graph: nx.MultiDiGraph, path: pathlib.Path, file_format: str, path_table: PathTable = None,
+                 communities: list = None) -> pathlib.Path:
+    """Exports the dependency graph with the module ids and the edge types, returns the path of the written file."""
+    if file_format not in EXPORT_FORMATS.keys():
+        raise Exception(f'Unknown graph export format: {file_format}')
+    path = pathlib.Path(path)
+    if path.suffix != EXPORT_FORMATS[file_format]:
+        path = path.with_name(path.name + EXPORT_FORMATS[file_format])
+    if file_format in ['graphml', 'gexf']:
+        write_xml(graph, path, file_format, path_table, communities)
+    else:
+        write_edge_list(graph, path, file_format, path_table, communities)
+    return path
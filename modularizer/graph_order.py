@@ -0,0 +1,74 @@
+import networkx as nx
+import threading
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List
+
+
+class GraphOrder:
+    """Topological order of a whole dependency graph.
+
+    The strongly connected components are ordered topologically and the files of a component are ordered by a
+    depth-first search inside it, which drops the back edges of its cycles. Restricting the order to a set of files
+    keeps the order of the components, but a part of a component can have other cycles than the whole component
+    (or none), so such a part is ordered again on its own subgraph.
+    """
+
+    def __init__(self, graph: nx.DiGraph):
+        condensation = nx.condensation(graph)
+        order = []
+        for component in nx.topological_sort(condensation):
+            members = condensation.nodes[component]['members']
+            if len(members) == 1:
+                order += members
+            else:
+                postorder = list(nx.dfs_postorder_nodes(graph.subgraph(members)))
+                postorder.reverse()
+                order += postorder
+        self.order = order
+        self.position: Dict[Hashable, int] = {node: i for i, node in enumerate(order)}
+        self.component: Dict[Hashable, int] = condensation.graph['mapping']
+        self._component_sizes = Counter(self.component.values())
+        self._graph = graph
+
+    def sort(self, nodes: Iterable[Hashable]) -> List[Hashable]:
+        """Returns the files in a topological order of their subgraph after its cycles are broken."""
+        nodes = sorted(nodes, key=self.position.__getitem__)
+        result = []
+        start = 0
+        while start < len(nodes):
+            # the files of a component are next to each other in the order
+            component = self.component[nodes[start]]
+            end = start + 1
+            while end < len(nodes) and self.component[nodes[end]] == component:
+                end += 1
+            part = nodes[start:end]
+            if 1 < len(part) < self._component_sizes[component]:
+                part = GraphOrder(self._graph.subgraph(part)).order
+            result += part
+            start = end
+        return result
+
+
+class GraphOrderCache:
+    """Keeps the GraphOrder of the last graph it was asked for until the graph is replaced.
+
+    The graph is not watched for changes, whoever adds or removes its nodes or edges has to clear the cache. It can
+    be shared between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._graph = None
+        self._order = None
+
+    def get(self, graph: nx.DiGraph) -> GraphOrder:
+        with self._lock:
+            if self._order is None or self._graph is not graph:
+                self._order = GraphOrder(graph)
+                self._graph = graph
+            return self._order
+
+    def clear(self) -> None:
+        with self._lock:
+            self._graph = None
+            self._order = None
@@ -0,0 +1,196 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import multiprocessing
+import networkx as nx
+import re
+from typing import Callable, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+from modularizer.path_table import to_node_array
+
+# C++ keywords, alternative operator names and the identifiers with a special meaning in module declarations,
+# none of them can be a component of a module name
+CPP_KEYWORDS = {'alignas', 'alignof', 'and', 'and_eq', 'asm', 'auto', 'bitand', 'bitor', 'bool', 'break', 'case',
+                'catch', 'char', 'char8_t', 'char16_t', 'char32_t', 'class', 'compl', 'concept', 'const', 'consteval',
+                'constexpr', 'constinit', 'const_cast', 'continue', 'co_await', 'co_return', 'co_yield', 'decltype',
+                'default', 'delete', 'do', 'double', 'dynamic_cast', 'else', 'enum', 'explicit', 'export', 'extern',
+                'false', 'final', 'float', 'for', 'friend', 'goto', 'if', 'import', 'inline', 'int', 'long', 'module',
+                'mutable', 'namespace', 'new', 'noexcept', 'not', 'not_eq', 'nullptr', 'operator', 'or', 'or_eq',
+                'override', 'private', 'protected', 'public', 'register', 'reinterpret_cast', 'requires', 'return',
+                'short', 'signed', 'sizeof', 'static', 'static_assert', 'static_cast', 'struct', 'switch', 'template',
+                'this', 'thread_local', 'throw', 'true', 'try', 'typedef', 'typeid', 'typename', 'union', 'unsigned',
+                'using', 'virtual', 'void', 'volatile', 'wchar_t', 'while', 'xor', 'xor_eq'}
+
+
+class ModuleTree:
+    """Nested modules, only the leaves have files.
+
+    The root has no name, the dotted name of a module is the names of its ancestors below the root and its own.
+    """
+
+    def __init__(self, name: str = '', nodes: Iterable[int] = None, children: List['ModuleTree'] = None):
+        self.name = name
+        self.nodes = to_node_array(nodes) if nodes is not None else to_node_array([])
+        self.children: List[ModuleTree] = children if children is not None else []
+
+    def is_leaf(self) -> bool:
+        return len(self.children) == 0
+
+    def size(self) -> int:
+        if self.is_leaf():
+            return len(self.nodes)
+        return sum(child.size() for child in self.children)
+
+    def leaves(self) -> List['ModuleTree']:
+        """Returns the leaves depth-first, so the leaves of a module are next to each other."""
+        if self.is_leaf():
+            return [self]
+        return [leaf for child in self.children for leaf in child.leaves()]
+
+    def walk(self, prefix: str = '') -> Iterator[Tuple[str, 'ModuleTree']]:
+        """Yields the dotted names and the modules below this one depth-first."""
+        for child in self.children:
+            name = f'{prefix}.{child.name}' if prefix != '' else child.name
+            yield name, child
+            yield from child.walk(name)
+
+    def leaf_names(self) -> List[str]:
+        """Returns the dotted names of the leaves relative to this module in the order of leaves()."""
+        if self.is_leaf():
+            return ['']
+        return [name for name, module in self.walk() if module.is_leaf()]
+
+    def leaf_range(self, child_index: int) -> range:
+        """Returns the indices of the leaves of a child in the leaves() of this module."""
+        start = sum(len(child.leaves()) for child in self.children[:child_index])
+        return range(start, start + len(self.children[child_index].leaves()))
+
+
+def node_cost(graph: nx.Graph, nodes: Iterable[Hashable], weight: str = 'node_weight') -> float:
+    """Sum of the weights of the nodes, a node without weight counts as 1."""
+    return sum(graph.nodes[node].get(weight, 1) for node in nodes)
+
+
+def merge_small_modules(graph: nx.MultiDiGraph, communities: List[Iterable[Hashable]], min_size: int) \
+        -> List[Set[Hashable]]:
+    """Merges the communities smaller than min_size into the community they have the most edges with.
+
+    The smallest communities are merged first. The small communities without edges to any other community are
+    merged together.
+    """
+    communities = [set(community) for community in communities]
+    module_ids = {node: i for i in range(len(communities)) for node in communities[i]}
+    uncoupled = []
+    for i in sorted(range(len(communities)), key=lambda i: len(communities[i])):
+        if not 0 < len(communities[i]) < min_size:
+            continue
+        coupling = Counter()
+        for node in communities[i]:
+            for u, v in itertools.chain(graph.out_edges(node), graph.in_edges(node)):
+                j = module_ids.get(v if u == node else u)
+                if j is not None and j != i:
+                    coupling[j] += 1
+        if len(coupling) == 0:
+            uncoupled.append(i)
+            continue
+        j = max(coupling.keys(), key=lambda j: (coupling[j], -j))
+        for node in communities[i]:
+            module_ids[node] = j
+        communities[j] |= communities[i]
+        communities[i] = set()
+    if len(uncoupled) > 1:
+        for i in uncoupled[1:]:
+            communities[uncoupled[0]] |= communities[i]
+            communities[i] = set()
+    return [community for community in communities if len(community) > 0]
+
+
+def split_module(graph: nx.MultiDiGraph, nodes: Iterable[Hashable], max_size: int, max_cost: float = None,
+                 min_size: int = 1, resolution: float = 1.1, max_depth: int = 8, seed: int = 3) -> ModuleTree:
+    """Splits a module recursively with Louvain until its parts are not larger than max_size and max_cost.
+
+    If a module cannot be split even with a higher resolution it stays a leaf, however large it is.
+    """
+    nodes = list(nodes)
+    if max_depth <= 0 or (len(nodes) <= max_size and (max_cost is None or node_cost(graph, nodes) <= max_cost)):
+        return ModuleTree(nodes=nodes)
+    subgraph = nx.MultiGraph(graph.subgraph(nodes))
+    parts = [nodes]
+    for attempt in range(4):
+        parts = nx.community.louvain_communities(subgraph, seed=seed, resolution=resolution * 2 ** attempt)
+        if len(parts) > 1:
+            break
+    if len(parts) > 1:
+        parts = merge_small_modules(graph.subgraph(nodes), parts, min_size)
+    if len(parts) <= 1:
+        return ModuleTree(nodes=nodes)
+    return ModuleTree(children=[split_module(graph, part, max_size, max_cost, min_size, resolution, max_depth - 1,
+                                             seed) for part in parts])
+
+
+def build_module_tree(graph: nx.MultiDiGraph, communities: list, max_size: int, max_cost: float = None,
+                      min_size: int = 1, max_workers: int = None, path_of: Callable[[Hashable], str] = None) \
+        -> ModuleTree:
+    """Builds a module tree from the communities of the graph.
+
+    The tiny communities are merged into their most coupled neighbours first, then the communities above the caps
+    are split recursively, different communities in parallel worker processes. The modules are named after the
+    directories of their files if path_of is given.
+    """
+    communities = merge_small_modules(graph, communities, min_size)
+    oversized = [i for i in range(len(communities)) if len(communities[i]) > max_size or (
+            max_cost is not None and node_cost(graph, communities[i]) > max_cost)]
+    children: List[Optional[ModuleTree]] = [None if i in oversized else ModuleTree(nodes=communities[i])
+                                            for i in range(len(communities))]
+    if len(oversized) > 1 and max_workers != 1:
+        # spawn, because the parent process may have background threads running
+        with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {i: executor.submit(split_module, graph.subgraph(communities[i]).copy(), communities[i],
+                                          max_size, max_cost, min_size) for i in oversized}
+            for i, future in futures.items():
+                children[i] = future.result()
+    else:
+        for i in oversized:
+            children[i] = split_module(graph, communities[i], max_size, max_cost, min_size)
+    tree = ModuleTree(children=children)
+    if path_of is not None:
+        name_modules(tree, path_of)
+    return tree
+
+
+def _identifier(name: str) -> str:
+    name = re.sub(r'\W+', '_', name).strip('_').lower()
+    if name == '' or name[0].isdigit():
+        name = f'm{name}'
+    if name in CPP_KEYWORDS:
+        name = f'{name}_'
+    return name
+
+
+def _directory_counts(module: ModuleTree, path_of: Callable[[Hashable], str]) -> Counter:
+    """Counts the files of the module under each directory name."""
+    directories = Counter()
+    for leaf in module.leaves():
+        for node in leaf.nodes:
+            directories.update(set(path_of(int(node)).split('/')[:-1]))
+    return directories
+
+
+def name_modules(tree: ModuleTree, path_of: Callable[[Hashable], str]) -> None:
+    """Names every module after its most characteristic directory compared to its siblings, uniquely among them."""
+    counts = [_directory_counts(child, path_of) for child in tree.children]
+    sizes = [max(child.size(), 1) for child in tree.children]
+    total = sum(counts, Counter())
+    total_size = sum(sizes)
+    used = Counter()
+    for i in range(len(tree.children)):
+        child = tree.children[i]
+        name = f'part{i}'
+        if len(counts[i]) > 0:
+            # share of the files of the module in the directory minus the share of all the files of the parent
+            name = max(counts[i].keys(), key=lambda d: (counts[i][d] / sizes[i] - total[d] / total_size,
+                                                        counts[i][d], d))
+            name = _identifier(name)
+        used[name] += 1
+        child.name = name if used[name] == 1 else f'{name}{used[name]}'
+        name_modules(child, path_of)
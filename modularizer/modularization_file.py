@@ -0,0 +1,151 @@
+import hashlib
+import mmap
+import numpy as np
+import struct
+from typing import Iterable, List
+
+# layout (little endian):
+#   header: magic, version, path count, module count, size of the suffix blob, database name length
+#   database name (utf-8), fingerprint (sha256 of the sorted paths)
+#   prefix lengths (uint16[path count]), suffix offsets (uint32[path count + 1]), suffix blob (utf-8)
+#   module assignment (int32[path count], -1 for files without a module)
+# The paths are sorted and front coded: each path stores only the part that differs from the previous one.
+MAGIC = b'MDLZ'
+VERSION = 1
+SUFFIX = '.mdlz'
+_header = struct.Struct('<4sHIIQH')
+
+
+def fingerprint(paths: Iterable[str]) -> bytes:
+    """Identifies the set of files a modularization was made for, so node ids can be reused when it matches."""
+    return hashlib.sha256('\0'.join(sorted(paths)).encode('utf-8')).digest()
+
+
+def is_binary_modularization_file(file_path) -> bool:
+    with open(file_path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class BinaryModularization:
+    """A loaded modularization, close it (or use it in a with statement) to unmap the file it was loaded from."""
+
+    def __init__(self, database: str, digest: bytes, module_count: int, assignment: np.ndarray,
+                 prefix_lengths: np.ndarray, suffix_offsets: np.ndarray, suffixes: memoryview,
+                 mapped_file: mmap.mmap = None):
+        self.database = database
+        self.fingerprint = digest
+        self.module_count = module_count
+        self.assignment = assignment
+        self._prefix_lengths = prefix_lengths
+        self._suffix_offsets = suffix_offsets
+        self._suffixes = suffixes
+        self._mapped_file = mapped_file
+
+    def __enter__(self) -> 'BinaryModularization':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmaps the file, the arrays are views of it so they are dropped too."""
+        self.assignment = self._prefix_lengths = self._suffix_offsets = None
+        if self._suffixes is not None:
+            self._suffixes.release()
+            self._suffixes = None
+        if self._mapped_file is not None:
+            self._mapped_file.close()
+            self._mapped_file = None
+
+    def paths(self) -> List[str]:
+        """Decodes the path table; not needed when the fingerprint matches the current graph."""
+        paths = []
+        previous = b''
+        for i in range(len(self._prefix_lengths)):
+            path = previous[:self._prefix_lengths[i]] + \
+                bytes(self._suffixes[self._suffix_offsets[i]:self._suffix_offsets[i + 1]])
+            paths.append(path.decode('utf-8'))
+            previous = path
+        return paths
+
+
+def _common_prefix_length(a: bytes, b: bytes) -> int:
+    low, high = 0, min(len(a), len(b), np.iinfo(np.uint16).max)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def save_binary_modularization(file_path, database: str, paths: List[str], assignment: List[int],
+                               module_count: int = None) -> None:
+    """Saves the module id of every file; paths[i] is assigned to module assignment[i].
+
+    The module count includes the empty modules, by default it is the number of the modules with files.
+    """
+    order = sorted(range(len(paths)), key=lambda i: paths[i])
+    encoded_paths = [paths[i].encode('utf-8') for i in order]
+    prefix_lengths = np.zeros(len(paths), dtype='<u2')
+    suffix_offsets = np.zeros(len(paths) + 1, dtype='<u4')
+    suffixes = []
+    previous = b''
+    offset = 0
+    for i, path in enumerate(encoded_paths):
+        prefix_length = _common_prefix_length(previous, path)
+        prefix_lengths[i] = prefix_length
+        suffixes.append(path[prefix_length:])
+        offset += len(path) - prefix_length
+        suffix_offsets[i + 1] = offset
+        previous = path
+    module_ids = np.asarray(assignment, dtype='<i4')[order] if len(paths) > 0 else np.zeros(0, dtype='<i4')
+    if module_count is None:
+        module_count = int(module_ids.max()) + 1 if len(module_ids) > 0 else 0
+    encoded_database = database.encode('utf-8')
+    with open(file_path, 'wb') as f:
+        f.write(_header.pack(MAGIC, VERSION, len(paths), module_count, offset, len(encoded_database)))
+        f.write(encoded_database)
+        f.write(fingerprint(paths))
+        f.write(prefix_lengths.tobytes())
+        f.write(suffix_offsets.tobytes())
+        f.write(b''.join(suffixes))
+        f.write(module_ids.tobytes())
+
+
+def load_binary_modularization(file_path, use_mmap: bool = True) -> BinaryModularization:
+    """Loads a modularization saved with save_binary_modularization.
+
+    With use_mmap the arrays are views of the memory mapped file instead of copies, valid until it is closed.
+    """
+    mapped_file = None
+    with open(file_path, 'rb') as f:
+        if use_mmap:
+            mapped_file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            buffer = memoryview(mapped_file)
+        else:
+            buffer = memoryview(f.read())
+    magic, version, path_count, module_count, suffixes_size, database_length = _header.unpack_from(buffer) \
+        if len(buffer) >= _header.size else (None, None, 0, 0, 0, 0)
+    size = _header.size + database_length + 32 + 2 * path_count + 4 * (path_count + 1) + suffixes_size + \
+        4 * path_count
+    if magic != MAGIC or version != VERSION or len(buffer) < size:
+        buffer.release()
+        if mapped_file is not None:
+            mapped_file.close()
+        raise Exception(f'Not a modularization file (version {VERSION}): {file_path}')
+    offset = _header.size
+    database = bytes(buffer[offset:offset + database_length]).decode('utf-8')
+    offset += database_length
+    digest = bytes(buffer[offset:offset + 32])
+    offset += 32
+    prefix_lengths = np.frombuffer(buffer, dtype='<u2', count=path_count, offset=offset)
+    offset += prefix_lengths.nbytes
+    suffix_offsets = np.frombuffer(buffer, dtype='<u4', count=path_count + 1, offset=offset)
+    offset += suffix_offsets.nbytes
+    suffixes = buffer[offset:offset + suffixes_size]
+    offset += suffixes_size
+    assignment = np.frombuffer(buffer, dtype='<i4', count=path_count, offset=offset)
+    return BinaryModularization(database, digest, module_count, assignment, prefix_lengths, suffix_offsets, suffixes,
+                                mapped_file)
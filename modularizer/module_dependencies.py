@@ -0,0 +1,67 @@
+import networkx as nx
+from typing import Dict, Hashable, Iterable, List, Set
+
+
+class ModuleDependencyIndex:
+    """Dependencies between the modules of a modularization, computed once from the edges of the graph.
+
+    An edge u -> v of the graph between two modules makes the module of u depend on the module of v. Modules in a
+    dependency cycle cannot import each other, their files keep including each other's files textually; every other
+    dependency can be imported, and the modules can be generated in dependency order, dependencies first.
+    """
+
+    def __init__(self, graph: nx.MultiDiGraph, communities: List[Iterable[Hashable]]):
+        self.communities = communities
+        self.module_ids = {node: i for i in range(len(communities)) for node in communities[i]}
+        module_ids = self.module_ids
+        # module -> module it depends on -> files of that module it uses
+        self.targets: List[Dict[int, Set[Hashable]]] = [dict() for _ in range(len(communities))]
+        # file -> files of other modules it uses
+        self._file_targets: Dict[Hashable, Set[Hashable]] = dict()
+        self.graph = nx.DiGraph()
+        self.graph.add_nodes_from(range(len(communities)))
+        for u, v in graph.edges():
+            i = module_ids.get(u)
+            j = module_ids.get(v)
+            if i is not None and j is not None and i != j:
+                self.targets[i].setdefault(j, set()).add(v)
+                self._file_targets.setdefault(u, set()).add(v)
+                if self.graph.has_edge(i, j):
+                    self.graph[i][j]['weight'] += 1
+                else:
+                    self.graph.add_edge(i, j, weight=1)
+        condensation = nx.condensation(self.graph)
+        self._cycle_id: Dict[int, int] = condensation.graph['mapping']
+        self._cycles: Dict[int, List[int]] = {cycle_id: sorted(condensation.nodes[cycle_id]['members'])
+                                              for cycle_id in condensation.nodes}
+        # the dependencies of a module are ranked lower than the module itself
+        order = list(nx.lexicographical_topological_sort(condensation, key=lambda c: self._cycles[c][0]))
+        self._rank: Dict[int, int] = {module_id: len(order) - 1 - i
+                                      for i, cycle_id in enumerate(order) for module_id in self._cycles[cycle_id]}
+
+    def dependency_order(self) -> List[int]:
+        """Returns the modules in an order in which every module comes after the modules it imports."""
+        return sorted(range(len(self.communities)), key=lambda module_id: (self._rank[module_id], module_id))
+
+    def cycle(self, module_id: int) -> List[int]:
+        """Returns the modules in a dependency cycle with the module, including itself."""
+        return self._cycles[self._cycle_id[module_id]]
+
+    def cycles(self) -> List[List[int]]:
+        return [members for members in self._cycles.values() if len(members) > 1]
+
+    def imports(self, module_id: int) -> List[int]:
+        """Returns the modules the module depends on outside of its dependency cycle, dependencies first."""
+        cycle_id = self._cycle_id[module_id]
+        return sorted((dependency for dependency in self.targets[module_id].keys()
+                       if self._cycle_id[dependency] != cycle_id),
+                      key=lambda dependency: (self._rank[dependency], dependency))
+
+    def imported_files(self, module_id: int, dependency: int) -> Set[Hashable]:
+        """Returns the files of the dependency used by the files of the module."""
+        return self.targets[module_id].get(dependency, set())
+
+    def used_files(self, node: Hashable, dependencies: Iterable[int]) -> Set[Hashable]:
+        """Returns the files of the dependencies used by a file."""
+        dependencies = set(dependencies)
+        return {target for target in self._file_targets.get(node, ()) if self.module_ids[target] in dependencies}
@@ -0,0 +1,225 @@
+import json
+import os
+import pandas
+import pathlib
+import re
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from modularizer.data_source import Column, DataSource, ENTITY_TABLES, EXPORTED_COLUMNS, REQUIRED_TABLES, \
+    SQLITE_SUFFIXES, build_cpp_edge_query, root_like_pattern
+
+
+class OfflineDataSource(DataSource):
+    """Reads the CppEdge, File and FileContent tables from a local dump instead of a live database.
+
+    A dump is either a single SQLite file or a directory holding one CSV or Parquet file per table
+    (e.g. CppEdge.parquet). Both can be created from any data source with export_data_source.
+    """
+    formats = ['sqlite', 'csv', 'parquet']
+    _sqlite_suffixes = SQLITE_SUFFIXES
+    _data_dir = pathlib.Path(__file__).resolve().parent.joinpath('data')
+    _cpp_edge_columns = ['frompath', 'topath', 'type']
+    _file_content_columns = ['id', 'path', 'filename', 'content']
+    _sqlite_max_variables = 900
+
+    def __init__(self, path: pathlib.Path, database: str = None) -> None:
+        self.path = pathlib.Path(path)
+        if not self.path.exists():
+            raise Exception(f'Offline dump not found: {self.path}')
+        self.database = database if database else self.path.stem
+        self.format = self.detect_format(self.path)
+        self._tables: Dict[str, pandas.DataFrame] = dict()
+        self.connection = None
+        if self.format == 'sqlite':
+            self.connection = sqlite3.connect(f'{self.path.resolve().as_uri()}?mode=ro', uri=True,
+                                              check_same_thread=False)
+            # let SQLite read the pages straight from the page cache
+            self.connection.execute(f'PRAGMA mmap_size = {os.path.getsize(self.path)}')
+            # LIKE has to be case sensitive to match PostgreSQL and to use the index on "File".path
+            self.connection.execute('PRAGMA case_sensitive_like = ON')
+
+    def __str__(self) -> str:
+        return f'database={self.database}, path={self.path}, format={self.format}'
+
+    @staticmethod
+    def detect_format(path: pathlib.Path) -> str:
+        if path.is_file():
+            if path.suffix.lower() in OfflineDataSource._sqlite_suffixes:
+                return 'sqlite'
+            raise Exception(f'Unknown offline dump format: {path}')
+        for file_format in ['parquet', 'csv']:
+            if any(path.joinpath(f'{table}.{file_format}').exists() for table in REQUIRED_TABLES):
+                return file_format
+        raise Exception(f'No CSV or Parquet table found in {path}')
+
+    @staticmethod
+    def like_to_regex(pattern: str) -> str:
+        regex = []
+        for token in re.findall(r'\\.|.', pattern, re.DOTALL):
+            if token == '%':
+                regex.append('.*')
+            elif token == '_':
+                regex.append('.')
+            else:
+                regex.append(re.escape(token[-1]))
+        return ''.join(regex)
+
+    def _table(self, table: str) -> pandas.DataFrame:
+        if table not in self._tables.keys():
+            file_path = self.path.joinpath(f'{table}.{self.format}')
+            if self.format == 'parquet':
+                self._tables[table] = pandas.read_parquet(file_path, columns=EXPORTED_COLUMNS[table], memory_map=True)
+            else:
+                self._tables[table] = pandas.read_csv(file_path, usecols=EXPORTED_COLUMNS[table], memory_map=True,
+                                                      keep_default_na=False)
+        return self._tables[table]
+
+    def get_table_names(self) -> List[str]:
+        if self.format == 'sqlite':
+            tables = self.connection.execute("select name from sqlite_master where type='table'")
+            return [record[0] for record in tables]
+        return [table for table in REQUIRED_TABLES if self.path.joinpath(f'{table}.{self.format}').exists()]
+
+    def find_file_path(self, pattern: str) -> Optional[str]:
+        if self.format == 'sqlite':
+            with open(self._data_dir.joinpath('file_path_query.txt'), 'r') as f:
+                query = f.read().replace('%s', '?')
+            record = self.connection.execute(query, [pattern]).fetchone()
+            return record[0] if record is not None else None
+        paths = self._table('File')['path']
+        matches = paths[paths.str.fullmatch(self.like_to_regex(pattern))]
+        return matches.loc[matches.str.len().idxmin()] if len(matches) > 0 else None
+
+    def query_cpp_edges(self, project_root: str = '', dirs_to_exclude: Iterable = (),
+                        edge_types: Iterable[int] = None) -> Tuple[list, tuple]:
+        description = tuple(Column(name=name, type_code=None) for name in self._cpp_edge_columns)
+        if self.format == 'sqlite':
+            with open(self._data_dir.joinpath('cpp_edge_query.txt'), 'r') as f:
+                query, params = build_cpp_edge_query(f.read(), project_root, dirs_to_exclude, edge_types)
+            return self.connection.execute(query.replace('%s', '?'), params).fetchall(), description
+        # filtering the files before the joins keeps the merged frames small
+        files = self._table('File')[['id', 'path']]
+        if project_root != '':
+            files = files[files['path'].str.startswith(str(project_root).rstrip('/') + '/')]
+        for path in dirs_to_exclude:
+            path = str(path).rstrip('/')
+            files = files[(files['path'] != path) & ~files['path'].str.startswith(path + '/')]
+        edges = self._table('CppEdge')
+        if edge_types is not None:
+            edges = edges[edges['type'].isin(list(edge_types))]
+        edges = edges \
+            .merge(files.rename(columns={'id': 'from', 'path': 'frompath'}), on='from') \
+            .merge(files.rename(columns={'id': 'to', 'path': 'topath'}), on='to')
+        edges = edges[self._cpp_edge_columns].drop_duplicates()
+        return list(edges.itertuples(index=False, name=None)), description
+
+    def query_file_contents(self, paths: List[str]) -> Tuple[tuple, Iterable[tuple]]:
+        description = tuple(Column(name=name, type_code=None) for name in self._file_content_columns)
+        if self.format == 'sqlite':
+            with open(self._data_dir.joinpath('file_content_query.txt'), 'r') as f:
+                query = f.read()
+            results = []
+            for i in range(0, len(paths), self._sqlite_max_variables):
+                chunk = paths[i:i + self._sqlite_max_variables]
+                results += self.connection.execute(query.replace('<LIST_OF_PATHS>', ','.join('?' * len(chunk))),
+                                                   chunk).fetchall()
+            return description, results
+        files = self._table('File')
+        files = files[files['path'].isin(paths)].rename(columns={'content': 'hash'})
+        contents = files.merge(self._table('FileContent'), on='hash')[self._file_content_columns]
+        return description, list(contents.itertuples(index=False, name=None))
+
+    def query_exported_declarations(self, paths: List[str]) -> Tuple[tuple, list]:
+        if self.format != 'sqlite' or not all(table in self.get_table_names() for table in ENTITY_TABLES):
+            raise Exception(f'The offline dump has no {" and ".join(ENTITY_TABLES)} tables')
+        with open(self._data_dir.joinpath('exported_declaration_query.txt'), 'r') as f:
+            # the paths are passed as a JSON array, a list of parameters would hit the limit of SQLite on large modules
+            query = f.read().replace('= any(%s)', 'in (select value from json_each(?))')
+        paths = json.dumps(list(paths))
+        cursor = self.connection.execute(query, [paths, paths])
+        return cursor.description, cursor.fetchall()
+
+    def query_file_sizes(self, project_root: str = '') -> List[Tuple[str, int]]:
+        if self.format == 'sqlite':
+            with open(self._data_dir.joinpath('file_size_query.txt'), 'r') as f:
+                query = f.read().replace('%s', '?')
+            return self.connection.execute(query, [root_like_pattern(project_root)]).fetchall()
+        files = self._table('File')
+        if project_root != '':
+            files = files[files['path'].str.startswith(str(project_root).rstrip('/') + '/')]
+        files = files[['path', 'content']].rename(columns={'content': 'hash'}).merge(self._table('FileContent'),
+                                                                                     on='hash')
+        return list(zip(files['path'], files['content'].str.len()))
+
+    def iter_table(self, table: str, chunk_size: int = 10000) -> Iterator[list]:
+        if self.format == 'sqlite':
+            columns = ', '.join(f'"{column}"' for column in EXPORTED_COLUMNS[table])
+            cursor = self.connection.execute(f'select {columns} from "{table}"')
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if len(rows) == 0:
+                    break
+                yield rows
+        else:
+            frame = self._table(table)
+            for i in range(0, len(frame), chunk_size):
+                yield list(frame.iloc[i:i + chunk_size].itertuples(index=False, name=None))
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+
+
+def export_data_source(data_source: DataSource, path: pathlib.Path, file_format: str = 'sqlite',
+                       chunk_size: int = 10000) -> pathlib.Path:
+    """Dumps the tables used by the analysis so that they can be loaded with OfflineDataSource."""
+    path = pathlib.Path(path)
+    if file_format not in OfflineDataSource.formats:
+        raise Exception(f'Unknown offline dump format: {file_format}')
+    if file_format == 'sqlite':
+        if path.suffix.lower() not in OfflineDataSource._sqlite_suffixes:
+            path = path.with_suffix('.sqlite')
+        os.makedirs(path.parent, exist_ok=True)
+        connection = sqlite3.connect(path)
+        try:
+            for table in REQUIRED_TABLES:
+                columns = ', '.join(f'"{column}"' for column in EXPORTED_COLUMNS[table])
+                connection.execute(f'drop table if exists "{table}"')
+                connection.execute(f'create table "{table}" ({columns})')
+                insert = f'insert into "{table}" values ({",".join("?" * len(EXPORTED_COLUMNS[table]))})'
+                for rows in data_source.iter_table(table, chunk_size):
+                    connection.executemany(insert, rows)
+            connection.execute('create index if not exists "File_id" on "File" ("id")')
+            connection.execute('create index if not exists "File_path" on "File" ("path")')
+            connection.execute('create index if not exists "FileContent_hash" on "FileContent" ("hash")')
+            connection.execute('create index if not exists "CppEdge_from" on "CppEdge" ("from")')
+            connection.commit()
+        finally:
+            connection.close()
+        return path
+
+    os.makedirs(path, exist_ok=True)
+    for table in REQUIRED_TABLES:
+        file_path = path.joinpath(f'{table}.{file_format}')
+        writer = None
+        first_chunk = True
+        for rows in data_source.iter_table(table, chunk_size):
+            frame = pandas.DataFrame.from_records(rows, columns=EXPORTED_COLUMNS[table])
+            if file_format == 'csv':
+                frame.to_csv(file_path, mode='w' if first_chunk else 'a', header=first_chunk, index=False)
+            else:
+                import pyarrow
+                import pyarrow.parquet
+                chunk = pyarrow.Table.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(file_path, chunk.schema)
+                writer.write_table(chunk)
+            first_chunk = False
+        if writer is not None:
+            writer.close()
+        elif first_chunk and file_format == 'csv':
+            pandas.DataFrame(columns=EXPORTED_COLUMNS[table]).to_csv(file_path, index=False)
+        elif first_chunk:
+            pandas.DataFrame(columns=EXPORTED_COLUMNS[table]).to_parquet(file_path, index=False)
+    return path
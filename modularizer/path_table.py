@@ -0,0 +1,72 @@
+from collections.abc import Mapping
+import networkx as nx
+import numpy as np
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional
+
+
+class PathTable:
+    """Interns the file paths of a dependency graph.
+
+    The nodes of the graph are the ids of their paths, so every path is stored exactly once and string paths are
+    only materialized for the user interface and for saving.
+    """
+
+    def __init__(self, project_root: str = ''):
+        self.project_root = str(project_root)
+        self._paths: List[str] = []
+        self._ids: Dict[str, int] = dict()
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def intern(self, path: str) -> int:
+        node_id = self._ids.get(path)
+        if node_id is None:
+            node_id = len(self._paths)
+            self._paths.append(path)
+            self._ids[path] = node_id
+        return node_id
+
+    def id(self, path: str) -> Optional[int]:
+        return self._ids.get(path)
+
+    def path(self, node_id: int) -> str:
+        return self._paths[node_id]
+
+    def relative_path(self, node_id: int) -> str:
+        return self._paths[node_id].replace(self.project_root, '').strip('/')
+
+    def paths(self, node_ids: Iterable[int] = None) -> List[str]:
+        if node_ids is None:
+            return list(self._paths)
+        return [self._paths[node_id] for node_id in node_ids]
+
+
+def node_path_getter(graph: nx.Graph, path_table: PathTable = None) -> Callable[[Hashable], str]:
+    """Returns the full path of a node, whether it is an interned id or a path string with a path attribute."""
+    if path_table is not None:
+        return path_table.path
+    return lambda node: graph.nodes[node]['path']
+
+
+def to_node_array(nodes: Iterable[int]) -> np.ndarray:
+    return np.fromiter(sorted(int(node) for node in nodes), dtype=np.int32)
+
+
+class ModuleView(Mapping):
+    """Read-only module id -> list of file paths mapping, materialized module by module from the communities."""
+
+    def __init__(self, communities: list, path_table: PathTable):
+        self._communities = communities if communities is not None else []
+        self._path_table = path_table
+
+    def __getitem__(self, module_id: int) -> List[str]:
+        if not isinstance(module_id, int) or not 0 <= module_id < len(self._communities):
+            raise KeyError(module_id)
+        return self._path_table.paths(int(node) for node in self._communities[module_id])
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self._communities)))
+
+    def __len__(self) -> int:
+        return len(self._communities)
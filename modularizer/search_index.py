@@ -0,0 +1,145 @@
+import heapq
+import numpy as np
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from modularizer.path_table import PathTable
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchResult:
+    __slots__ = ('node_id', 'path', 'module_id', 'rank')
+
+    def __init__(self, node_id: int, path: str, module_id: int, rank: Tuple):
+        self.node_id = node_id
+        self.path = path
+        self.module_id = module_id
+        self.rank = rank
+
+    def __repr__(self) -> str:
+        return f'SearchResult({self.path!r}, module_id={self.module_id})'
+
+
+class SearchIndex:
+    """Trigram and basename index of the relative paths of a path table with the module id of every file.
+
+    The paths are indexed incrementally as they are interned in the path table, and the module ids are updated
+    only for the modules that changed. Queries are case-insensitive; the matches are ranked by where the query
+    matches: the whole basename, the start of the basename, the basename, the end of the path, anywhere in the path.
+    If nothing contains the query the paths sharing the most trigrams with it are returned as fuzzy matches.
+    """
+
+    # rank of the fuzzy matches
+    FUZZY = 5
+
+    def __init__(self, path_table: PathTable):
+        self.path_table = path_table
+        self._lock = threading.Lock()
+        self._paths: List[str] = []
+        self._basename_start: List[int] = []
+        self._postings: Dict[str, List[int]] = dict()
+        self._basenames: Dict[str, List[int]] = dict()
+        self._module_ids = np.full(0, -1, dtype=np.int32)
+        self._communities: list = []
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def refresh(self) -> None:
+        """Indexes the paths interned since the last refresh."""
+        with self._lock:
+            for node_id in range(len(self._paths), len(self.path_table)):
+                path = self.path_table.relative_path(node_id).lower()
+                self._paths.append(path)
+                self._basename_start.append(path.rfind('/') + 1)
+                for trigram in trigrams(path):
+                    self._postings.setdefault(trigram, []).append(node_id)
+                self._basenames.setdefault(path[path.rfind('/') + 1:], []).append(node_id)
+            if len(self._module_ids) < len(self._paths):
+                self._module_ids = np.concatenate(
+                    [self._module_ids, np.full(len(self._paths) - len(self._module_ids), -1, dtype=np.int32)])
+
+    def update_modules(self, communities: list) -> int:
+        """Updates the module ids of the files of the modules that changed, returns the number of changed modules."""
+        self.refresh()
+        with self._lock:
+            changed = 0
+            for module_id in range(max(len(communities), len(self._communities))):
+                old = self._communities[module_id] if module_id < len(self._communities) else None
+                new = communities[module_id] if module_id < len(communities) else None
+                if old is new or (old is not None and new is not None and np.array_equal(old, new)):
+                    continue
+                changed += 1
+                if old is not None:
+                    old = np.asarray(old, dtype=np.int64)
+                    self._module_ids[old[self._module_ids[old] == module_id]] = -1
+                if new is not None:
+                    self._module_ids[np.asarray(new, dtype=np.int64)] = module_id
+            self._communities = list(communities)
+            return changed
+
+    def module_id(self, node_id: int) -> int:
+        return int(self._module_ids[node_id])
+
+    def _rank(self, node_id: int, query: str) -> Optional[Tuple]:
+        path = self._paths[node_id]
+        basename = path[self._basename_start[node_id]:]
+        if basename == query:
+            kind = 0
+        elif basename.startswith(query):
+            kind = 1
+        elif query in basename:
+            kind = 2
+        elif path.endswith(query):
+            kind = 3
+        elif query in path:
+            kind = 4
+        else:
+            return None
+        return kind, len(path), path
+
+    def search(self, query: str, limit: int = 20) -> List[SearchResult]:
+        query = query.strip().lower().replace('\\', '/')
+        project_root = self.path_table.project_root.lower().rstrip('/')
+        if project_root != '' and query.startswith(project_root + '/'):
+            query = query[len(project_root) + 1:]
+        if query == '':
+            return []
+        with self._lock:
+            # enough files with exactly this name: nothing else can rank higher
+            candidates = self._basenames.get(query, [])
+            if len(candidates) < limit:
+                query_trigrams = trigrams(query)
+                if len(query_trigrams) == 0:
+                    candidates = range(len(self._paths))
+                else:
+                    postings = sorted((self._postings.get(trigram, []) for trigram in query_trigrams), key=len)
+                    candidates = set(postings[0])
+                    for posting in postings[1:]:
+                        candidates.intersection_update(posting)
+                        if len(candidates) == 0:
+                            break
+            ranked = []
+            for node_id in candidates:
+                rank = self._rank(node_id, query)
+                if rank is not None:
+                    ranked.append((rank, node_id))
+            if len(ranked) == 0:
+                ranked = self._fuzzy(query)
+            return [SearchResult(node_id, self.path_table.path(node_id), int(self._module_ids[node_id]), rank)
+                    for rank, node_id in heapq.nsmallest(limit, ranked)]
+
+    def _fuzzy(self, query: str) -> List[Tuple[Tuple, int]]:
+        """Ranks the paths sharing at least half of the trigrams of the query by the number of shared trigrams."""
+        query_trigrams = trigrams(query)
+        shared = dict()
+        for trigram in query_trigrams:
+            for node_id in self._postings.get(trigram, []):
+                shared[node_id] = shared.get(node_id, 0) + 1
+        minimum = max((len(query_trigrams) + 1) // 2, 1)
+        return [((self.FUZZY, -count, len(self._paths[node_id]), self._paths[node_id]), node_id)
+                for node_id, count in shared.items() if count >= minimum]
@@ -0,0 +1,265 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib import error, parse, request
+
+from modularizer.app import Modularizer
+from modularizer.search_index import SearchIndex
+from modularizer.user_interface.batch import BatchUserInterface
+from modularizer.user_interface.user_interface import UserInterface
+
+DEFAULT_PORT = 8765
+
+
+class ModularizerService:
+    """Keeps the analysis of a database (graph, communities, search index, prefetched contents) in memory and
+    serves the menu operations as a JSON API over HTTP on localhost.
+
+    The operations are serialized, and while one runs the user interface of the modularizer is replaced by a batch
+    one, whose messages are returned in the response instead of being printed on the console of the service.
+    """
+
+    def __init__(self, modularizer: Modularizer, host: str = '127.0.0.1', port: int = DEFAULT_PORT):
+        self.modularizer = modularizer
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self.server.service = self
+        self.started = time.time()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def serve_forever(self) -> None:
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def shutdown(self) -> None:
+        # serve_forever has to return in another thread than the one handling the request
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    def call(self, operation: str, **kwargs) -> dict:
+        with self._lock:
+            ui = self.modularizer.ui
+            self.modularizer.ui = BatchUserInterface()
+            try:
+                start = time.perf_counter()
+                result = getattr(self, operation)(**kwargs)
+                result['time'] = time.perf_counter() - start
+                if len(self.modularizer.ui.messages) > 0:
+                    result['messages'] = self.modularizer.ui.messages
+                return result
+            finally:
+                self.modularizer.ui = ui
+
+    def status(self) -> dict:
+        modularizer = self.modularizer
+        status = {'database': modularizer.database_connection.database,
+                  'project root': modularizer.project_root,
+                  'files': modularizer.multi_di_graph.number_of_nodes(),
+                  'edges': modularizer.multi_di_graph.number_of_edges(),
+                  'modules': len(modularizer.communities),
+                  'hierarchical': modularizer.module_tree is not None,
+                  'timings': modularizer.timings,
+                  'uptime': time.time() - self.started}
+        if len(modularizer.reduction_report) > 0:
+            status['graph reduction'] = modularizer.reduction_report
+        if modularizer._background_worker is not None:
+            done, total, current = modularizer._background_worker.progress()
+            status['background tasks'] = {'done': done, 'total': total, 'running': current}
+        return status
+
+    def modules(self, module_id: Optional[int] = None) -> dict:
+        modules = self.modularizer.modules
+        if module_id is None:
+            return {'modules': [{'id': i, 'files': len(modules[i])} for i in range(len(modules))]}
+        self._check_module_id(module_id, len(modules))
+        return {'id': module_id, 'files': modules[module_id]}
+
+    def find(self, path: str, limit: int = 20) -> dict:
+        results = self.modularizer._get_search_index().search(path, limit)
+        return {'results': [{'path': result.path,
+                             'module id': result.module_id,
+                             'similar': result.rank[0] == SearchIndex.FUZZY} for result in results]}
+
+    def generate(self, module_id: int, name: str) -> dict:
+        modularizer = self.modularizer
+        if not name.replace('.', '').replace(':', '').isidentifier():
+            raise ValueError(f'Invalid module name: {name}')
+        if modularizer.module_tree is not None:
+            self._check_module_id(module_id, len(modularizer.module_tree.children))
+            paths = modularizer._generate_and_write_module_partitions(module_id, name)
+        else:
+            self._check_module_id(module_id, len(modularizer.communities))
+            paths = [modularizer._generate_and_write_module_file(module_id, name)]
+        return {'files': [str(path) for path in paths]}
+
+    def recluster(self, graph_reduction: Optional[bool] = None) -> dict:
+        if graph_reduction is not None:
+            self.modularizer.graph_reduction = graph_reduction
+        self.modularizer.recluster()
+        return {'modules': len(self.modularizer.communities), 'timings': self.modularizer.timings}
+
+    @staticmethod
+    def _check_module_id(module_id: int, module_count: int) -> None:
+        if not isinstance(module_id, int) or not 0 <= module_id < module_count:
+            raise ValueError(f'Invalid module id: {module_id}')
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = 'modularizer'
+
+    # (method, path) -> operation of the service and the parameters it takes
+    routes = {('GET', '/status'): ('status', {}),
+              ('GET', '/modules'): ('modules', {'id': int}),
+              ('GET', '/find'): ('find', {'path': str, 'limit': int}),
+              ('POST', '/generate'): ('generate', {'id': int, 'name': str}),
+              ('POST', '/recluster'): ('recluster', {'graph_reduction': bool})}
+
+    def do_GET(self) -> None:
+        url = parse.urlsplit(self.path)
+        self._handle('GET', url.path, {key: values[-1] for key, values in parse.parse_qs(url.query).items()})
+
+    def do_POST(self) -> None:
+        url = parse.urlsplit(self.path)
+        # a browser sends a cross-origin form or text/plain POST without asking first, a JSON one it does not
+        if self.headers.get_content_type() != 'application/json':
+            return self._respond(415, {'error': 'The content type has to be application/json'})
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length)) if length > 0 else dict()
+        except json.JSONDecodeError as ex:
+            return self._respond(400, {'error': f'Invalid JSON: {ex}'})
+        if not isinstance(body, dict):
+            return self._respond(400, {'error': 'The body has to be a JSON object'})
+        if url.path == '/shutdown':
+            self._respond(200, {'shutdown': True})
+            return self.server.service.shutdown()
+        self._handle('POST', url.path, body)
+
+    def _handle(self, method: str, path: str, params: Dict[str, Any]) -> None:
+        if (method, path) not in self.routes.keys():
+            return self._respond(404, {'error': f'Unknown operation: {method} {path}'})
+        operation, types = self.routes[(method, path)]
+        try:
+            kwargs = {self._argument_name(key): self._convert(params[key], types[key])
+                      for key in params.keys() if key in types.keys()}
+            self._respond(200, self.server.service.call(operation, **kwargs))
+        except ValueError as ex:
+            self._respond(400, {'error': str(ex)})
+        except Exception as ex:
+            self._respond(500, {'error': str(ex)})
+
+    @staticmethod
+    def _argument_name(key: str) -> str:
+        return 'module_id' if key == 'id' else key
+
+    @staticmethod
+    def _convert(value: Any, value_type: type) -> Any:
+        if value_type is bool and isinstance(value, str):
+            return value.lower() in ('1', 'true', 'yes')
+        if value_type is int and not isinstance(value, int):
+            if not str(value).isdigit():
+                raise ValueError(f'Invalid number: {value}')
+            return int(value)
+        return value
+
+    def _respond(self, status: int, body: dict) -> None:
+        data = json.dumps(body, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class ServiceClient:
+    """Client of a running modularizer service, the errors of the service are raised as exceptions."""
+
+    def __init__(self, url: str = f'http://127.0.0.1:{DEFAULT_PORT}', timeout: float = 600):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, params: dict = None) -> dict:
+        params = {key: value for key, value in (params or dict()).items() if value is not None}
+        data = None
+        if method == 'GET' and len(params) > 0:
+            path += '?' + parse.urlencode(params)
+        elif method == 'POST':
+            data = json.dumps(params).encode('utf-8')
+        req = request.Request(self.url + path, data=data, method=method, headers={'Content-Type': 'application/json'})
+        try:
+            with request.urlopen(req, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except error.HTTPError as ex:
+            try:
+                message = json.loads(ex.read())['error']
+            except Exception:
+                message = str(ex)
+            raise Exception(message)
+        except error.URLError as ex:
+            raise Exception(f'Could not connect to the service at {self.url}: {ex.reason}')
+
+    def status(self) -> dict:
+        return self._request('GET', '/status')
+
+    def modules(self, module_id: int = None) -> dict:
+        return self._request('GET', '/modules', {'id': module_id})
+
+    def find(self, path: str, limit: int = 20) -> dict:
+        return self._request('GET', '/find', {'path': path, 'limit': limit})
+
+    def generate(self, module_id: int, name: str) -> dict:
+        return self._request('POST', '/generate', {'id': module_id, 'name': name})
+
+    def recluster(self, graph_reduction: bool = None) -> dict:
+        return self._request('POST', '/recluster', {'graph_reduction': graph_reduction})
+
+    def shutdown(self) -> dict:
+        return self._request('POST', '/shutdown')
+
+
+def client_menu_options(client: ServiceClient, ui: UserInterface) -> List[Tuple[str, callable]]:
+    """Menu options of the console client of a running service."""
+
+    def show(result: dict) -> None:
+        for message in result.pop('messages', []):
+            ui.info_msg(message)
+        ui.info_msg(json.dumps(result, indent=4))
+
+    def find_module_by_file() -> None:
+        results = client.find(ui.get_user_input('file'))['results']
+        if len(results) == 0:
+            raise Exception('File not found')
+        if len(results) == 1 and results[0]['module id'] >= 0:
+            ui.info_msg(json.dumps(client.modules(results[0]['module id'])['files'], indent=4))
+        lines = []
+        for result in results:
+            module = str(result['module id']) if result['module id'] >= 0 else '-'
+            lines.append(f'module id: {module:>4}  {result["path"]}{" (similar)" if result["similar"] else ""}')
+        ui.info_msg('\n'.join(lines))
+
+    def display_module() -> None:
+        ui.info_msg(json.dumps(client.modules(ui.get_module_id(len(client.modules()['modules'])))['files'],
+                               indent=4))
+
+    def generate_module_file() -> None:
+        module_id = int(ui.get_user_input('module id'))
+        for path in client.generate(module_id, ui.get_user_input('module name'))['files']:
+            ui.info_msg(f'Module file generated: {path}')
+
+    return [('Status', lambda: show(client.status())),
+            ('List modules', lambda: show(client.modules())),
+            ('Display module', display_module),
+            ('Find module by file', find_module_by_file),
+            ('Generate module file', generate_module_file),
+            ('Recluster', lambda: show(client.recluster())),
+            ('Stop service', lambda: show(client.shutdown()))]
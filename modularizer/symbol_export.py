@@ -0,0 +1,183 @@
+import re
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+# scopes the declarations of can be exported, and the ones they cannot
+NAMESPACE = 'namespace'
+LINKAGE = 'linkage'
+ANONYMOUS = 'anonymous namespace'
+OTHER = 'other'
+
+# statements at namespace scope that go on after the closing brace of their body, until a semicolon
+_CONTINUED_STATEMENT = re.compile(r'\b(?:class|struct|union|enum|typedef|using)\b|=')
+_NOT_EXPORTABLE = ('export ', 'static ', 'namespace', 'using namespace', 'friend ', 'static_assert', '}', ';')
+# explicit specializations and instantiations declare no new name, so they cannot be exported
+_EXPLICIT_SPECIALIZATION = re.compile(r'\s*template\b\s*(?:<\s*>|(?=[^\s<]))')
+_CLASS_HEAD = re.compile(r'\s*(?:class|struct|union|enum)\b(?:\s+(?:class|struct)\b)?\s*(?:\[\[.*?\]\]\s*)*([\w:]*)')
+# the declarator of a member defined out of its class, or of an entity of another namespace
+_QUALIFIED_DECLARATOR = re.compile(r'::\s*(?:~\s*\w+|operator\b.*|\w+)\s*$')
+
+
+def exported_declaration_lines(rows: Iterable[Tuple[str, Hashable, int]], paths: List[str]) -> Dict[str, Set[int]]:
+    """Returns the lines of the declarations to export per file from the rows (path, entity hash, line) of the
+    declarations referenced from other modules. Only the first declaration of an entity in the order of the paths is
+    exported, the later ones (e.g. the definition of a function declared in a header) are redeclarations of it."""
+    order = {path: i for i, path in enumerate(paths)}
+    first: Dict[Hashable, Tuple[int, int, str]] = dict()
+    for path, entity_hash, line in rows:
+        if path not in order:
+            continue
+        declaration = (order[path], line, path)
+        if entity_hash not in first or declaration < first[entity_hash]:
+            first[entity_hash] = declaration
+    lines: Dict[str, Set[int]] = dict()
+    for _, line, path in first.values():
+        lines.setdefault(path, set()).add(line)
+    return lines
+
+
+def declaration_starts(content: str) -> Dict[int, Optional[Tuple[int, int]]]:
+    """Maps the lines of the content to the start (line, column) of the namespace scope declaration they belong to.
+
+    The lines inside the body of a class or a function belong to the class or the function, the lines inside an
+    anonymous namespace to none. Comments, string literals and preprocessing directives are skipped; the lines are
+    numbered from 1 like the locations of the AST nodes.
+    """
+    starts: Dict[int, Optional[Tuple[int, int]]] = dict()
+    # kind and declaration start of the open scopes
+    scopes: List[Tuple[str, Optional[Tuple[int, int]]]] = []
+    statement_start: Optional[Tuple[int, int]] = None
+    statement = ''
+    in_comment = False
+    continued_directive = False
+    for line_number, line in enumerate(content.splitlines(), start=1):
+        if continued_directive or (not in_comment and line.lstrip().startswith('#')):
+            continued_directive = line.endswith('\\')
+            continue
+        at_namespace_scope = all(kind in (NAMESPACE, LINKAGE) for kind, _ in scopes)
+        i = 0
+        while i < len(line):
+            if in_comment:
+                end = line.find('*/', i)
+                if end < 0:
+                    break
+                in_comment = False
+                i = end + 2
+                continue
+            c = line[i]
+            if line.startswith('//', i):
+                break
+            if line.startswith('/*', i):
+                in_comment = True
+                i += 2
+                continue
+            if c.isspace():
+                if at_namespace_scope:
+                    statement += ' '
+                i += 1
+                continue
+            if line_number not in starts:
+                if any(kind == ANONYMOUS for kind, _ in scopes):
+                    starts[line_number] = None
+                elif at_namespace_scope:
+                    if statement_start is None:
+                        statement_start = (line_number, i)
+                    starts[line_number] = statement_start
+                else:
+                    starts[line_number] = next(start for kind, start in scopes if kind not in (NAMESPACE, LINKAGE))
+            if c in '"\'':
+                # string and character literals, up to the closing quote on the same line
+                i += 1
+                while i < len(line) and line[i] != c:
+                    i += 2 if line[i] == '\\' else 1
+                if at_namespace_scope:
+                    statement += c + c
+                i += 1
+                continue
+            if c == '{':
+                if at_namespace_scope:
+                    if re.fullmatch(r'\s*(?:inline\s+)?namespace\s*', statement):
+                        scopes.append((ANONYMOUS, None))
+                    elif re.fullmatch(r'\s*(?:inline\s+)?namespace\s+[\w:\s]+', statement):
+                        scopes.append((NAMESPACE, None))
+                    elif re.fullmatch(r'\s*extern\s*""\s*', statement):
+                        scopes.append((LINKAGE, None))
+                    else:
+                        scopes.append((OTHER, statement_start))
+                    if scopes[-1][0] != OTHER:
+                        statement_start = None
+                        statement = ''
+                else:
+                    scopes.append((OTHER, None))
+            elif c == '}':
+                if len(scopes) > 0:
+                    kind, _ = scopes.pop()
+                    if kind == OTHER and all(k in (NAMESPACE, LINKAGE) for k, _ in scopes) and \
+                            _CONTINUED_STATEMENT.search(statement) is None:
+                        statement_start = None
+                        statement = ''
+            elif c == ';' and at_namespace_scope:
+                statement_start = None
+                statement = ''
+            elif at_namespace_scope:
+                statement += c
+            at_namespace_scope = all(kind in (NAMESPACE, LINKAGE) for kind, _ in scopes)
+            i += 1
+        statement += ' '
+    return starts
+
+
+def _declaration_head(content_lines: List[str], line_number: int, column: int) -> str:
+    """Returns the text of the declaration from its start up to its body or its end."""
+    head = ''
+    for line in content_lines[line_number - 1:]:
+        head += line[column:]
+        column = 0
+        match = re.search(r'[{;]', head)
+        if match is not None:
+            return head[:match.start()]
+    return head
+
+
+def _without_template_heads(head: str) -> str:
+    while True:
+        match = re.match(r'\s*template\s*<', head)
+        if match is None:
+            return head
+        depth = 1
+        i = match.end()
+        while i < len(head) and depth > 0:
+            depth += {'<': 1, '>': -1}.get(head[i], 0)
+            i += 1
+        head = head[i:]
+
+
+def is_exportable(head: str) -> bool:
+    """Returns whether the declaration starting with the head can be exported where it is."""
+    if head.startswith(_NOT_EXPORTABLE) or _EXPLICIT_SPECIALIZATION.match(head) is not None:
+        return False
+    head = _without_template_heads(head)
+    if head.lstrip().startswith('using '):
+        return True
+    class_head = _CLASS_HEAD.match(head)
+    if class_head is not None:
+        return '::' not in class_head.group(1)
+    declarator = re.split(r'[(=\[]', head, maxsplit=1)[0]
+    return _QUALIFIED_DECLARATOR.search(declarator) is None
+
+
+def export_declarations(content: str, lines: Iterable[int]) -> str:
+    """Exports the namespace scope declarations that start on, or contain, the given lines of the content.
+
+    A member of a class is exported with its class. Declarations in anonymous namespaces, internal (static)
+    declarations, the ones that are already exported, explicit specializations and the declarations of qualified
+    names (e.g. out of class member definitions) are left as they are.
+    """
+    starts = declaration_starts(content)
+    exported = {starts[line] for line in lines if starts.get(line) is not None}
+    content_lines = content.splitlines(keepends=True)
+    for line_number, column in exported:
+        line = content_lines[line_number - 1]
+        if not is_exportable(_declaration_head(content_lines, line_number, column)):
+            continue
+        content_lines[line_number - 1] = f'{line[:column]}export {line[column:]}'
+    return ''.join(content_lines)
@@ -0,0 +1,57 @@
+import networkx as nx
+from typing import List, Tuple
+
+from modularizer.user_interface.user_interface import UserInterface
+
+
+class BatchUserInterface(UserInterface):
+    """Non-interactive user interface of the batch analysis.
+
+    The messages are collected instead of printed, every closed question is answered with no (so the detected
+    build, generated and third-party directories are excluded) and asking for any other input is an error.
+    """
+    headless = True
+
+    def __init__(self):
+        self.messages: List[str] = []
+
+    def get_password(self) -> str:
+        raise Exception('Password required, add it to the connection config')
+
+    def get_database_connection(self) -> dict:
+        raise Exception('Database connection required, check the connection config')
+
+    def info_msg(self, msg: str) -> None:
+        self.messages.append(msg)
+
+    def get_user_input(self, msg: str) -> str:
+        raise Exception(f'User input required in batch mode: {msg}')
+
+    def load_menu_options(self, menu_options: List[Tuple[str, callable]]) -> None:
+        pass
+
+    def closed_question(self, question: str) -> bool:
+        return False
+
+    def get_existing_directory_path(self, msg: str) -> str:
+        raise Exception(f'User input required in batch mode: {msg}')
+
+    def get_existing_file_path(self) -> str:
+        raise Exception('User input required in batch mode: file path')
+
+    def get_module_id(self, max_id: int) -> int:
+        raise Exception('User input required in batch mode: module id')
+
+    def get_module_name(self, module, default: str = None) -> str:
+        if default is not None:
+            return default
+        raise Exception('User input required in batch mode: module name')
+
+    def display_dependency_graph(self, graph: nx.Graph) -> None:
+        pass
+
+    def display_all_modules(self, graph: nx.Graph, communities: list) -> None:
+        pass
+
+    def display_module(self, graph: nx.Graph) -> None:
+        pass
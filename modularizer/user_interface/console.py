@@ -6,25 +6,31 @@ from matplotlib import pyplot as plt
 import networkx as nx
 import pathlib
 from tkinter import Tk
-from typing import List, Tuple
+from typing import Callable, Hashable, List, Tuple
 
 from matplotlib.backends._backend_tk import NavigationToolbar2Tk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 from console import console_util
 from console.console_menu import ConsoleMenu
+from modularizer.data_source import is_offline_dump
 from modularizer.user_interface.user_interface import UserInterface
 
 
 class Console(UserInterface):
     _menu = None
+    _layout = None
 
     def get_password(self) -> str:
         return getpass('password: ')
 
     def get_database_connection(self) -> dict:
         connection = dict()
-        connection['database'] = input('database: ')
+        database = input('database (or path of an offline dump: a .sqlite file or a directory ending with /): ')
+        if is_offline_dump(database):
+            connection['path'] = database
+            return connection
+        connection['database'] = database
         connection['user'] = input('user: ')
         connection['host'] = input('host: ')
         connection['port'] = input('port: ')
@@ -64,10 +70,13 @@ class Console(UserInterface):
         else:
             raise Exception('Invalid module id')
 
-    def get_module_name(self, module) -> str:
+    def get_module_name(self, module, default: str = None) -> str:
         self.info_msg(f'Please name the following module: \n{json.dumps(module, indent=4)}\n')
         while True:
-            module_name = self.get_user_input('module name')
+            module_name = self.get_user_input(
+                'module name' if default is None else f'module name (empty for {default})')
+            if module_name == '' and default is not None:
+                return default
             if module_name.replace('.', '').replace(':', '').isidentifier():
                 return module_name
             else:
@@ -84,9 +93,23 @@ class Console(UserInterface):
     def display_module(self, graph: nx.Graph) -> None:
         self._display_graph(graph)
 
+    def prefetch_layout(self, graph: nx.Graph, label: Callable[[Hashable], Hashable] = None) -> None:
+        pos = self._get_layout(graph)
+        if label is not None:
+            pos = {label(node): p for node, p in pos.items()}
+        self._layout = ((graph.number_of_nodes(), graph.number_of_edges()), pos)
+
+    def _get_layout(self, graph: nx.Graph) -> dict:
+        # only the prefetched layout is kept, it is not used if the graph has changed since
+        layout = self._layout
+        if layout is not None and layout[0] == (graph.number_of_nodes(), graph.number_of_edges()) and \
+                all(node in layout[1] for node in graph.nodes):
+            return layout[1]
+        return nx.spring_layout(graph, seed=2, k=2/sqrt(len(graph.nodes)))
+
     def _display_graph(self, graph: nx.Graph, communities: list = None,
                        colors: List[Tuple[float, float, float]] = None) -> None:
-        pos = nx.spring_layout(graph, seed=2, k=2/sqrt(len(graph.nodes)))
+        pos = self._get_layout(graph)
         root = Tk()
         root.title('Modularizer')
         # root.iconphoto(False, 'info.png')
@@ -147,3 +170,11 @@ class Console(UserInterface):
 
         canvas.get_tk_widget().pack(fill='both', expand=True)
         canvas.draw()
+
+
+class ServiceConsole(Console):
+    """Console setting up the analysis of the service, whose menu operations are served over HTTP instead."""
+    headless = True
+
+    def load_menu_options(self, menu_options: List[Tuple[str, callable]]) -> None:
+        pass
@@ -1,9 +1,11 @@
 from abc import ABCMeta, abstractmethod
 import networkx as nx
-from typing import List, Tuple
+from typing import Callable, Hashable, List, Tuple
 
 
 class UserInterface(metaclass=ABCMeta):
+    # a headless user interface never displays a graph, so its layout is not prefetched
+    headless = False
 
     def __new__(cls):
         if cls is UserInterface:
@@ -47,7 +49,8 @@ class UserInterface(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def get_module_name(self, module) -> str:
+    def get_module_name(self, module, default: str = None) -> str:
+        """Asks for the name of the module, the default name is suggested if there is one."""
         pass
 
     @abstractmethod
@@ -61,3 +64,8 @@ class UserInterface(metaclass=ABCMeta):
     @abstractmethod
     def display_module(self, graph: nx.Graph) -> None:
         pass
+
+    def prefetch_layout(self, graph: nx.Graph, label: Callable[[Hashable], Hashable] = None) -> None:
+        """Called from a background thread so that the graph can be displayed without computing its layout, label
+        maps the nodes of the graph to the nodes of the displayed one."""
+        pass
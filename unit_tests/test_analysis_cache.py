@@ -0,0 +1,114 @@
+import networkx as nx
+import pathlib
+import sqlite3
+import tempfile
+import unittest
+
+from modularizer.app import Modularizer
+from modularizer.analysis_cache import AnalysisCache, AnalysisState, connection_key, data_source_key
+from modularizer.data_source import create_data_source
+from modularizer.offline_data_source import export_data_source
+from modularizer.path_table import PathTable, to_node_array
+from modularizer.user_interface.batch import BatchUserInterface
+from unit_tests.test_offline_data_source import CsvDataSource
+
+
+class ClosableSource:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def analysis_state(files: int = 10) -> AnalysisState:
+    path_table = PathTable('/project')
+    graph = nx.MultiDiGraph()
+    nx.add_path(graph, [path_table.intern(f'/project/file{i}.cpp') for i in range(files)])
+    return AnalysisState(ClosableSource(), graph, path_table, [to_node_array(graph.nodes)], None, '/project', [])
+
+
+class SwitchingUserInterface(BatchUserInterface):
+    """Answers the connection prompts with the given connections and retries after the failed ones."""
+    connections = []
+
+    def get_database_connection(self) -> dict:
+        return self.connections.pop(0)
+
+    def closed_question(self, question: str) -> bool:
+        return question == 'Connect to an other database?'
+
+
+class AnalysisCacheTest(unittest.TestCase):
+    def test_lru(self):
+        cache = AnalysisCache(max_entries=2)
+        states = [analysis_state() for _ in range(3)]
+        cache.put('a', states[0])
+        cache.put('b', states[1])
+        self.assertIs(cache.pop('a'), states[0])
+        cache.put('a', states[0])
+        cache.put('c', states[2])
+        self.assertEqual(cache.keys(), ['a', 'c'])
+        self.assertTrue(states[1].data_source.closed)
+        self.assertFalse(states[0].data_source.closed)
+        self.assertIsNone(cache.pop('b'))
+        cache.put('a', states[0])
+        self.assertFalse(states[0].data_source.closed)
+        self.assertEqual(cache.keys(), ['c', 'a'])
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertTrue(states[2].data_source.closed)
+
+    def test_memory_budget(self):
+        small = analysis_state(10)
+        large = analysis_state(1000)
+        self.assertGreater(large.estimate_size(), small.estimate_size())
+        cache = AnalysisCache(max_entries=4, memory_budget=large.estimate_size())
+        cache.put('small', small)
+        cache.put('large', large)
+        self.assertEqual(cache.keys(), ['large'])
+        self.assertTrue(small.data_source.closed)
+        cache.put('larger', analysis_state(2000))
+        self.assertEqual(len(cache), 0)
+        self.assertLessEqual(cache.size(), large.estimate_size())
+
+    def test_keys(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = export_data_source(CsvDataSource(), pathlib.Path(temp_dir).joinpath('CodeCompass'), 'sqlite')
+            data_source = create_data_source({'path': str(path)})
+            self.assertEqual(data_source_key(data_source), connection_key({'path': str(path)}))
+            data_source.close()
+        self.assertNotEqual(connection_key({'database': 'a', 'user': 'u', 'host': 'h', 'port': 5432}),
+                            connection_key({'database': 'b', 'user': 'u', 'host': 'h', 'port': 5432}))
+        self.assertEqual(connection_key({'database': 'a', 'user': 'u', 'host': 'h', 'port': 5432}),
+                         connection_key({'database': 'a', 'user': 'u', 'host': 'h', 'port': '5432', 'password': 'p'}))
+
+    def test_switch_database_connection(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first = export_data_source(CsvDataSource(), pathlib.Path(temp_dir).joinpath('CodeCompass'), 'sqlite')
+            second = export_data_source(CsvDataSource(), pathlib.Path(temp_dir).joinpath('second', 'CodeCompass'),
+                                        'sqlite')
+            empty = pathlib.Path(temp_dir).joinpath('empty.sqlite')
+            sqlite3.connect(empty).close()
+            data_source = create_data_source({'path': str(first)})
+            ui = SwitchingUserInterface()
+            ui.connections = [{'path': str(empty)}, {'path': str(second)}, {'path': str(first)}]
+            modularizer = Modularizer(ui, data_source, background_tasks=False,
+                                      project_root='/home/katilippa/projects/test/CodeCompass')
+            communities = modularizer.communities
+            timings = dict(modularizer.timings)
+            # the failed connection neither replaces the current one nor gets cached
+            modularizer.switch_database_connection()
+            self.assertEqual(data_source_key(modularizer.database_connection), connection_key({'path': str(second)}))
+            self.assertEqual(modularizer._analysis_cache.keys(), [connection_key({'path': str(first)})])
+            modularizer.switch_database_connection()
+            self.assertIs(modularizer.database_connection, data_source)
+            self.assertIs(modularizer.communities, communities)
+            self.assertEqual(modularizer.timings, timings)
+            self.assertEqual(modularizer._analysis_cache.keys(), [connection_key({'path': str(second)})])
+            modularizer._analysis_cache.clear()
+            data_source.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,8 +6,9 @@ import re
 from typing import List, Tuple
 import unittest
 
-from modularizer.app import Modularizer
+from modularizer.app import File, Modularizer
 from modularizer.app import RegexPattern
+from modularizer.symbol_export import exported_declaration_lines
 from modularizer.user_interface.console import Console
 from modularizer.database_connection import DatabaseConnection
 from modularizer.user_interface.user_interface import UserInterface
@@ -119,10 +120,35 @@ class ModularizerTest(unittest.TestCase):
         self.assertEqual(len(graph.nodes), 156)
         self.assertEqual(len(graph.edges), 368)
 
+    def test_build_compact_graph(self):
+        from_path_index, to_path_index = self.get_indexes()
+        project_root = '/home/katilippa/projects/test/CodeCompass'
+        graph, path_table = Modularizer.compact_graph_from_query_results(
+            self.dummy_cpp_edge_results, project_root, [f'{project_root}/Build'], from_path_index, to_path_index)
+        self.assertEqual(len(graph.nodes), 156)
+        self.assertEqual(len(graph.edges), 368)
+        self.assertEqual(len(path_table), 156)
+        self.assertSetEqual(set(graph.nodes), set(range(156)))
+        relabeled = nx.relabel_nodes(graph, {n: path_table.relative_path(n) for n in graph.nodes})
+        expected = self.get_graph_from_dummy_data()
+        self.assertSetEqual(set(relabeled.edges(keys=True)), set(expected.edges(keys=True)))
+
     def test_get_communities(self):
         communities = Modularizer.get_communities(self.get_graph_from_dummy_data())
         self.assertEqual(len(communities), 10)
 
+    def test_get_metrics(self):
+        graph = self.get_graph_from_dummy_data()
+        metrics = Modularizer.get_metrics(graph, Modularizer.get_communities(graph))
+        self.assertEqual(metrics['files'], 156)
+        self.assertEqual(metrics['dependencies'], 368)
+        self.assertEqual(metrics['modules'], 10)
+        self.assertEqual(metrics['files without module'], 0)
+        self.assertGreater(metrics['modularity'], 0)
+        metrics = Modularizer.get_metrics(graph, self.get_test_modules())
+        self.assertEqual(metrics['files without module'], 156 - 22)
+        self.assertNotIn('modularity', metrics)
+
     def test_load_modules_from_file(self):
         graph = self.get_graph_from_dummy_data()
         test_modules_file = pathlib.Path(__file__).resolve().parent.joinpath('data').joinpath(
@@ -209,6 +235,72 @@ class ModularizerTest(unittest.TestCase):
         expected_result = ['#include <memory>', '\n#include <workspaceservice.h>\n', '// #include <iostream>']
         self.assertSequenceEqual(expected_result, result)
 
+    def test_collapse_blank_lines(self):
+        text = 'module;\n\n\n\n#include <memory>\n\n\nint x;\n\n\n'
+        chunks = ['modu', 'le;\n\n', '\n', '\n#include <memory>\n', '\n', '\nint x;\n\n\n']
+        self.assertEqual(''.join(Modularizer.collapse_blank_lines(chunks)), re.sub(r'\n{3,}', '\n\n', text))
+        self.assertEqual(''.join(Modularizer.collapse_blank_lines([])), '')
+
+    def test_files_in_order(self):
+        description = tuple(Column(name=name, type_code=None) for name in ['id', 'path', 'filename', 'content'])
+        rows = [(2, '/p/b.h', 'b.h', 'int b;'), (1, '/p/a.cpp', 'a.cpp', memoryview('int á;'.encode()))]
+        files = Modularizer.files_in_order(description, iter(rows), ['/p/a.cpp', '/p/b.h'])
+        self.assertSequenceEqual([file.path for file in files], ['/p/a.cpp', '/p/b.h'])
+        self.assertEqual(files[0].content, 'int á;')
+        self.assertEqual(files[0].size, len('int á;'.encode()))
+        self.assertEqual(files[1], File(id=2, path='/p/b.h', filename='b.h', content='int b;'))
+        self.assertRaises(AttributeError, setattr, files[1], 'size_in_bytes', 0)
+        with self.assertRaises(Exception) as context:
+            Modularizer.files_in_order(description, rows, ['/p/c.cpp', '/p/a.cpp', '/p/d.cpp'])
+        self.assertIn('/p/c.cpp, /p/d.cpp', str(context.exception))
+
+    def test_generate_module(self):
+        files = [File(id=record[0], path=record[1], filename=record[2], content=record[3])
+                 for record in pandas.read_csv(pathlib.Path(__file__).resolve().parent.joinpath(
+                     'data', 'dummy_file_content_results.csv'), header=None).values]
+        modularizer = Modularizer.__new__(Modularizer)
+        modularizer._collect_file_contents_for_module = lambda module_id: files
+        modularizer._module_imports = lambda module_id, module_name, module_names: ([], dict())
+        modularizer._exported_declaration_lines = lambda module_id, module_files: None
+        module = modularizer._generate_module(0, 'cc.workspace', dict())
+        self.assertTrue(module.startswith('module;\n'))
+        self.assertIn('\nexport module cc.workspace;\n', module)
+        self.assertIn('// #include <workspaceservice/workspaceservice.h>', module)
+        self.assertIn('export namespace', module)
+        self.assertNotIn('\n\n\n', module)
+        self.assertLess(module.index('// #ifndef CC_SERVICE_WORKSPACE_WORKSPACESERVICE_H'),
+                        module.index('export module cc.workspace;'))
+        self.assertIn('\n#include <WorkspaceService.h>', module)
+
+        imported_header = '/home/katilippa/projects/test/CodeCompass/Build/gen/WorkspaceService.h'
+        modularizer._module_imports = lambda module_id, module_name, module_names: (
+            ['cc.service', 'cc.util'], {files[1].path: [imported_header]})
+        module = modularizer._generate_module(0, 'cc.workspace', dict())
+        self.assertIn('export module cc.workspace;\n\nimport cc.service;\nimport cc.util;\n', module)
+        self.assertIn('// #include <WorkspaceService.h>', module)
+        self.assertIn('\n#include <boost/filesystem.hpp>', module)
+        # only the includes of the imported files a file uses are commented out
+        modularizer._module_imports = lambda module_id, module_name, module_names: (
+            ['cc.service'], {files[0].path: [imported_header]})
+        module = modularizer._generate_module(0, 'cc.workspace', dict())
+        self.assertIn('\n#include <WorkspaceService.h>', module)
+
+        # the class and its member function are used by other modules, the definition of the member redeclares it
+        rows = [(files[1].path, 1, 13), (files[1].path, 2, 18), (files[0].path, 2, 16)]
+        modularizer._exported_declaration_lines = lambda module_id, module_files: exported_declaration_lines(
+            rows, [file.path for file in module_files])
+        module = modularizer._generate_module(0, 'cc.workspace', dict())
+        self.assertIn('\nexport class WorkspaceServiceHandler : virtual public WorkspaceServiceIf', module)
+        self.assertIn('\nvoid WorkspaceServiceHandler::getWorkspaces', module)
+        self.assertNotIn('export namespace', module)
+
+    def test_import_name(self):
+        self.assertEqual(Modularizer.import_name('cc.workspace', 'cc.util'), 'cc.util')
+        self.assertEqual(Modularizer.import_name('cc.workspace:a', 'cc.workspace:b'), ':b')
+        self.assertEqual(Modularizer.import_name('cc.workspace:a', 'cc.util:b'), 'cc.util')
+        self.assertEqual(Modularizer.import_name('cc.workspace', 'cc.workspace'), None)
+        self.assertEqual(Modularizer.import_name('cc.workspace', None), None)
+
 
 if __name__ == '__main__':
     unittest.main()
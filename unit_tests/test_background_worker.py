@@ -0,0 +1,84 @@
+import threading
+import time
+import unittest
+
+from modularizer.background_worker import BackgroundWorker, SkipTask
+
+
+class BackgroundWorkerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.worker = BackgroundWorker()
+
+    def tearDown(self) -> None:
+        self.worker.cancel()
+
+    def wait_until_done(self):
+        deadline = time.time() + 10
+        while self.worker.is_running() and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_results_are_cached(self):
+        self.worker.start([('a', lambda cancelled: 1), ('b', lambda cancelled: 2)])
+        self.wait_until_done()
+        self.assertEqual(self.worker.get('a'), 1)
+        self.assertEqual(self.worker.get('b'), 2)
+        self.assertEqual(self.worker.progress(), (2, 2, None))
+
+    def test_get_computes_missing_result(self):
+        self.worker.start([])
+        self.assertEqual(self.worker.get('a', lambda: 3), 3)
+        self.assertEqual(self.worker.get('a', lambda: 4), 3)
+        self.worker.discard('a')
+        self.assertIsNone(self.worker.get('a'))
+
+    def test_get_waits_for_running_task(self):
+        started = threading.Event()
+
+        def slow_task(cancelled):
+            started.set()
+            time.sleep(0.2)
+            return 'slow'
+        self.worker.start([('slow', slow_task)])
+        started.wait()
+        self.assertEqual(self.worker.get('slow', lambda: 'computed'), 'slow')
+
+    def test_errors_and_skipped_tasks(self):
+        def fail(cancelled):
+            raise Exception('error')
+
+        def skip(cancelled):
+            raise SkipTask()
+        self.worker.start([('fail', fail), ('skip', skip), ('ok', lambda cancelled: 1)])
+        self.wait_until_done()
+        self.assertIn('fail', self.worker.errors)
+        self.assertEqual(self.worker.skipped, 1)
+        self.assertEqual(self.worker.get('ok'), 1)
+        self.assertEqual(self.worker.get('fail', lambda: 2), 2)
+
+    def test_cancel(self):
+        started = threading.Event()
+
+        def long_task(cancelled):
+            started.set()
+            while not cancelled.is_set():
+                time.sleep(0.01)
+            return 'cancelled'
+        self.worker.start([('long', long_task), ('next', lambda cancelled: 1)])
+        started.wait()
+        self.assertTrue(self.worker.is_running())
+        self.worker.cancel()
+        self.assertFalse(self.worker.is_running())
+        self.assertIsNone(self.worker.get('long'))
+        self.assertIsNone(self.worker.get('next'))
+
+    def test_restart_clears_cache(self):
+        self.worker.start([('a', lambda cancelled: 1)])
+        self.wait_until_done()
+        self.worker.start([('b', lambda cancelled: 2)])
+        self.wait_until_done()
+        self.assertIsNone(self.worker.get('a'))
+        self.assertEqual(self.worker.get('b'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
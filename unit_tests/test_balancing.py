@@ -0,0 +1,57 @@
+import networkx as nx
+import pathlib
+import tempfile
+import unittest
+
+from modularizer.balancing import balance_communities, balance_report, critical_path, cut_edges, \
+    load_compile_times, module_costs, module_dependency_graph, set_node_weights
+
+
+class BalancingTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # a chain of 8 files and a pair, each file weighs 1
+        self.graph = nx.MultiDiGraph()
+        nx.add_path(self.graph, range(8))
+        self.graph.add_edge(8, 9)
+        for node in self.graph.nodes:
+            self.graph.nodes[node]['node_weight'] = 1
+
+    def test_set_node_weights(self):
+        set_node_weights(self.graph, {0: 4096, 1: 100})
+        self.assertAlmostEqual(self.graph.nodes[0]['node_weight'], 4 + 0.5)
+        self.assertAlmostEqual(self.graph.nodes[1]['node_weight'], 1 + 0.5 + 0.1)
+        self.assertAlmostEqual(self.graph.nodes[9]['node_weight'], 1 + 0.1)
+        set_node_weights(self.graph, {0: 4096, 1: 100}, {0: 9.0})
+        self.assertAlmostEqual(self.graph.nodes[0]['node_weight'], 9.0)
+        self.assertAlmostEqual(self.graph.nodes[1]['node_weight'], 1.6 * 2)
+
+    def test_load_compile_times(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = pathlib.Path(temp_dir).joinpath('times.csv')
+            path.write_text('path,seconds\n/project/a.cpp,1.5\nsrc/b.cpp, 2\n')
+            self.assertEqual(load_compile_times(str(path)), {'/project/a.cpp': 1.5, 'src/b.cpp': 2.0})
+
+    def test_balance_communities(self):
+        communities = [set(range(7)), {7, 8, 9}]
+        self.assertEqual(module_costs(self.graph, communities), [7, 3])
+        self.assertEqual(cut_edges(self.graph, communities), 1)
+        balanced = balance_communities(self.graph, communities, max_cut_increase=0)
+        self.assertEqual(balanced, [set(range(6)), {6, 7, 8, 9}])
+        self.assertEqual(cut_edges(self.graph, balanced), 1)
+        balanced = balance_communities(self.graph, [set(range(8)), {8, 9}], max_cut_increase=0)
+        self.assertEqual(balanced, [set(range(8)), {8, 9}])
+
+    def test_critical_path(self):
+        communities = [{0, 1}, {2, 3}, {4, 5, 6, 7}, {8, 9}]
+        module_graph = module_dependency_graph(self.graph, communities)
+        self.assertEqual(sorted(module_graph.edges(data='weight')), [(0, 1, 1), (1, 2, 1)])
+        self.assertEqual(critical_path(module_graph), (8, [[2], [1], [0]]))
+        self.graph.add_edge(4, 0)
+        self.assertEqual(critical_path(module_dependency_graph(self.graph, communities)), (8, [[0, 1, 2]]))
+        report = balance_report(self.graph, communities)
+        self.assertEqual(report['critical path cost'], 8)
+        self.assertEqual(report['parallelism (total / critical path)'], 10 / 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
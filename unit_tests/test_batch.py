@@ -0,0 +1,74 @@
+import json
+import pathlib
+import tempfile
+import unittest
+
+from modularizer.batch import analyze_database, load_batch_config, run_batch
+from modularizer.modularization_file import load_binary_modularization
+from modularizer.offline_data_source import export_data_source
+from modularizer.user_interface.batch import BatchUserInterface
+from unit_tests.test_offline_data_source import CsvDataSource
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.temp_dir.name)
+        self.dump = export_data_source(CsvDataSource(), self.dir.joinpath('CodeCompass'), 'sqlite')
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_batch_user_interface(self):
+        ui = BatchUserInterface()
+        ui.info_msg('msg')
+        self.assertSequenceEqual(ui.messages, ['msg'])
+        self.assertFalse(ui.closed_question('Include any of them in the analysis?'))
+        self.assertRaises(Exception, ui.get_user_input, 'directory')
+
+    def test_load_batch_config(self):
+        config_path = self.dir.joinpath('batch.json')
+        config_path.write_text(json.dumps({'path': str(self.dump)}))
+        self.assertRaises(Exception, load_batch_config, config_path)
+        config_path.write_text(json.dumps([{'path': str(self.dump)}]))
+        self.assertSequenceEqual(load_batch_config(config_path), [{'path': str(self.dump)}])
+
+    def test_analyze_database(self):
+        result = analyze_database({'path': str(self.dump), 'name': 'cc'}, str(self.dir))
+        self.assertNotIn('error', result.keys())
+        self.assertEqual(result['project_root'], '/home/katilippa/projects/test/CodeCompass')
+        self.assertSequenceEqual(result['dirs_to_exclude'], ['/home/katilippa/projects/test/CodeCompass/Build'])
+        self.assertEqual(result['metrics']['modules'], 11)
+        for step in ['connect', 'graph', 'clustering', 'metrics', 'save', 'total']:
+            self.assertIn(step, result['timings'].keys())
+        with open(result['files'][0], 'r') as f:
+            modules = json.load(f)
+        with load_binary_modularization(result['files'][1]) as modularization:
+            self.assertEqual(modularization.module_count, len(modules))
+
+        result = analyze_database({'path': str(self.dump), 'project_root': '/home/katilippa/projects/test/CodeCompass',
+                                   'dirs_to_exclude': ['Build', 'plugins']}, str(self.dir))
+        self.assertNotIn('error', result.keys())
+        self.assertSequenceEqual(result['dirs_to_exclude'], ['/home/katilippa/projects/test/CodeCompass/Build',
+                                                             '/home/katilippa/projects/test/CodeCompass/plugins'])
+        self.assertLess(result['metrics']['files'], 156)
+
+        result = analyze_database({'path': str(self.dir.joinpath('missing.sqlite'))}, str(self.dir))
+        self.assertIn('error', result.keys())
+
+    def test_run_batch(self):
+        configs = [{'path': str(self.dump), 'name': 'a'},
+                   {'path': str(self.dump), 'name': 'b', 'dirs_to_exclude': ['Build', 'plugins']},
+                   {'path': str(self.dir.joinpath('missing.sqlite')), 'name': 'c'}]
+        summary = run_batch(configs, str(self.dir), max_workers=2)
+        self.assertEqual((summary['databases'], summary['succeeded'], summary['failed']), (3, 2, 1))
+        self.assertEqual(summary['worker time'], sum(result['timings']['total'] for result in summary['results']))
+        self.assertSequenceEqual([result['name'] for result in summary['results']], ['a', 'b', 'c'])
+        self.assertEqual(summary['totals']['files'],
+                         summary['results'][0]['metrics']['files'] + summary['results'][1]['metrics']['files'])
+        self.assertTrue(pathlib.Path(summary['summary_path']).exists())
+        self.assertRaises(Exception, run_batch, [configs[0], configs[0]], str(self.dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
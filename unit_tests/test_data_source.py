@@ -0,0 +1,40 @@
+import pathlib
+import unittest
+
+from modularizer.data_source import build_cpp_edge_query, escape_like, is_offline_dump
+
+
+class DataSourceTest(unittest.TestCase):
+    def test_escape_like(self):
+        self.assertEqual(escape_like('/home/my_project/100%'), '/home/my\\_project/100\\%')
+        self.assertEqual(escape_like('C:\\src'), 'C:\\\\src')
+
+    def test_is_offline_dump(self):
+        self.assertTrue(is_offline_dump('dumps/CodeCompass.sqlite'))
+        self.assertTrue(is_offline_dump('CodeCompass.DB'))
+        self.assertTrue(is_offline_dump('dumps/CodeCompass/'))
+        self.assertFalse(is_offline_dump('CodeCompass'))
+        self.assertFalse(is_offline_dump('dumps/CodeCompass'))
+
+    def test_build_cpp_edge_query_without_filters(self):
+        query, params = build_cpp_edge_query('select * from "CppEdge" <CONDITIONS>')
+        self.assertEqual(query, 'select * from "CppEdge" ')
+        self.assertSequenceEqual(params, [])
+
+    def test_build_cpp_edge_query(self):
+        query, params = build_cpp_edge_query('select * from "CppEdge" <CONDITIONS>', '/home/project/',
+                                             [pathlib.PurePosixPath('/home/project/build')], [0, 2])
+        self.assertNotIn('<CONDITIONS>', query)
+        self.assertEqual(query.count('%s'), len(params))
+        self.assertEqual(query.count('fromFile.path like'), 1)
+        self.assertEqual(query.count('toFile.path not like'), 1)
+        self.assertSequenceEqual(params, ['/home/project/%', '/home/project/build', '/home/project/build/%',
+                                          '/home/project/%', '/home/project/build', '/home/project/build/%', 0, 2])
+
+    def test_build_cpp_edge_query_without_edge_types(self):
+        query, params = build_cpp_edge_query('<CONDITIONS>', edge_types=[])
+        self.assertIn('1 = 0', query)
+
+
+if __name__ == '__main__':
+    unittest.main()
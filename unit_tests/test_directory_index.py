@@ -0,0 +1,47 @@
+import unittest
+
+from modularizer.directory_index import DirectoryIndex
+
+
+class DirectoryIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        rows = [('/home/project/src/a.cpp', '/home/project/include/a.h'),
+                ('/home/project/src/b.cpp', '/home/project/include/a.h'),
+                ('/home/project/build/gen/a.pb.h', '/home/project/include/a.h'),
+                ('/home/project/src/b.cpp', '/home/project/third_party/lib/lib.h'),
+                ('/home/project/src/b.cpp', '/home/project/src/b.h'),
+                ('/home/project/src/out/writer.cpp', '/home/project/src/b.h'),
+                ('/home/project/src/b.cpp', '/home/project/deps/dep.h')]
+        self.index = DirectoryIndex.from_query_results(rows, 0, 1)
+
+    def test_counts(self):
+        self.assertEqual(self.index.file_count('/home/project'), 8)
+        self.assertEqual(self.index.edge_count('/home/project'), 7)
+        self.assertEqual(self.index.file_count('/home/project/src'), 4)
+        self.assertEqual(self.index.edge_count('/home/project/src'), 6)
+        self.assertEqual(self.index.edge_count('/home/project/include/'), 3)
+        self.assertEqual(self.index.file_count('/home/other'), 0)
+
+    def test_subdirectories(self):
+        self.assertSequenceEqual([d.name for d in self.index.subdirectories('/home/project')],
+                                 ['src', 'build', 'deps', 'include', 'third_party'])
+        self.assertSequenceEqual(self.index.subdirectories('/home/other'), [])
+
+    def test_find_project_root(self):
+        self.assertEqual(self.index.find_project_root('project'), '/home/project')
+        self.assertEqual(self.index.find_project_root('lib'), '/home/project/third_party/lib')
+        self.assertEqual(self.index.find_project_root('asd'), '')
+
+    def test_find_directories_to_exclude(self):
+        found = [(d.path, kind) for d, kind in self.index.find_directories_to_exclude('/home/project')]
+        # out is excluded only directly under the project root
+        self.assertSequenceEqual(found, [('/home/project/build', 'build'),
+                                         ('/home/project/deps', 'third-party'),
+                                         ('/home/project/third_party', 'third-party')])
+        found = [(d.path, kind) for d, kind in self.index.find_directories_to_exclude('/home/project/build',
+                                                                                      ['generated'])]
+        self.assertSequenceEqual(found, [('/home/project/build/gen', 'generated')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import networkx as nx
+import pathlib
+import tempfile
+import unittest
+
+from modularizer.graph_export import export_graph
+from modularizer.path_table import PathTable, to_node_array
+
+
+class GraphExportTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path_table = PathTable('/home/project')
+        a = self.path_table.intern('/home/project/src/a&b.cpp')
+        b = self.path_table.intern('/home/project/include/"a".h')
+        c = self.path_table.intern('/home/project/include/<c>.h')
+        self.graph = nx.MultiDiGraph()
+        self.graph.add_edge(a, b, label='uses')
+        self.graph.add_edge(a, b, label='depends on')
+        self.graph.add_edge(b, c, label='provides')
+        self.communities = [to_node_array([a, b])]
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def export(self, file_format: str) -> pathlib.Path:
+        return export_graph(self.graph, pathlib.Path(self.temp_dir.name).joinpath('project'), file_format,
+                            self.path_table, self.communities)
+
+    def test_graphml(self):
+        path = self.export('graphml')
+        self.assertEqual(path.suffix, '.graphml')
+        graph = nx.read_graphml(path, force_multigraph=True)
+        self.assertEqual(graph.number_of_nodes(), 3)
+        self.assertEqual(graph.number_of_edges(), 3)
+        self.assertEqual(graph.nodes['1'], {'path': '/home/project/include/"a".h', 'community': 0})
+        self.assertEqual(graph.nodes['2']['community'], -1)
+        self.assertEqual(sorted(label for _, _, label in graph.edges(data='type')), ['depends on', 'provides', 'uses'])
+
+    def test_gexf(self):
+        graph = nx.read_gexf(self.export('gexf'))
+        self.assertEqual(graph.number_of_nodes(), 3)
+        self.assertEqual(graph.nodes['0']['label'], '/home/project/src/a&b.cpp')
+        self.assertEqual(graph.nodes['1']['community'], 0)
+        self.assertEqual(graph.number_of_edges(), 3)
+
+    def test_edge_list(self):
+        try:
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError:
+            self.skipTest('pyarrow is not installed')
+        tables = [pyarrow.ipc.open_file(self.export('arrow')).read_all(),
+                  pyarrow.parquet.read_table(self.export('parquet'))]
+        for table in tables:
+            self.assertEqual(table.num_rows, 3)
+            rows = sorted(zip(*[table.column(name).to_pylist() for name in ['source', 'type', 'target_community']]))
+            self.assertSequenceEqual(rows, [('/home/project/include/"a".h', 'provides', -1),
+                                            ('/home/project/src/a&b.cpp', 'depends on', 0),
+                                            ('/home/project/src/a&b.cpp', 'uses', 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import networkx as nx
+import pandas
+import pathlib
+import unittest
+
+from modularizer.app import Modularizer
+from modularizer.graph_order import GraphOrder, GraphOrderCache
+
+
+class GraphOrderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        data_dir = pathlib.Path(__file__).resolve().parent.joinpath('data')
+        query_results = pandas.read_csv(data_dir.joinpath('dummy_cpp_edge_results.csv')).values
+        project_root = '/home/katilippa/projects/test/CodeCompass'
+        self.graph = Modularizer.graph_from_query_results(query_results, project_root, [f'{project_root}/Build'], 2, 5)
+        self.communities = Modularizer.get_communities(self.graph)
+
+    def assert_topological_order(self, graph: nx.DiGraph, order: list, component: dict):
+        position = {node: i for i, node in enumerate(order)}
+        self.assertEqual(len(position), len(graph))
+        for u, v in graph.edges():
+            if component[u] != component[v]:
+                self.assertLess(position[u], position[v])
+
+    def test_whole_graph_order(self):
+        graph_order = GraphOrder(self.graph)
+        self.assert_topological_order(self.graph, graph_order.order, graph_order.component)
+
+    def test_module_order(self):
+        graph_order = GraphOrderCache().get(self.graph)
+        # every other file of the graph holds parts of its cycles
+        for module in list(self.communities) + [list(self.graph.nodes)[::2]]:
+            subgraph = self.graph.subgraph(module)
+            order = graph_order.sort(module)
+            self.assertSequenceEqual(order, GraphOrder(self.graph).sort(module))
+            # every edge of the module outside its own cycles goes forward
+            self.assert_topological_order(subgraph, order, nx.condensation(subgraph).graph['mapping'])
+
+    def test_part_of_a_cycle(self):
+        graph = nx.MultiDiGraph([('a', 'b'), ('b', 'c'), ('c', 'a'), ('d', 'a')])
+        graph_order = GraphOrder(graph)
+        self.assertSequenceEqual(graph_order.sort(['a', 'c']), ['c', 'a'])
+        self.assertSequenceEqual(graph_order.sort(['a', 'c', 'd']), ['d', 'c', 'a'])
+        self.assertSequenceEqual(graph_order.sort(['a', 'b', 'c', 'd'])[0], 'd')
+
+    def test_acyclic_module_order(self):
+        graph = self.graph.subgraph(next(iter(c for c in self.communities if len(c) > 3)))
+        dag = Modularizer.convert_graph_to_dag(graph)
+        graph_order = GraphOrder(dag)
+        order = graph_order.sort(dag.nodes)
+        for u, v in dag.edges():
+            self.assertLess(order.index(u), order.index(v))
+
+    def test_cache(self):
+        cache = GraphOrderCache()
+        graph_order = cache.get(self.graph)
+        self.assertIs(cache.get(self.graph), graph_order)
+        self.assertIsNot(cache.get(self.graph.copy()), graph_order)
+        graph = self.graph.copy()
+        graph_order = cache.get(graph)
+        # the same number of nodes and edges after reversing an edge, the order is kept until the cache is cleared
+        u, v = next((u, v) for u, v in graph.edges() if not graph.has_edge(v, u))
+        graph.remove_edge(u, v)
+        graph.add_edge(v, u)
+        self.assertIs(cache.get(graph), graph_order)
+        cache.clear()
+        self.assertIsNot(cache.get(graph), graph_order)
+        self.assertSequenceEqual(cache.get(graph).order, GraphOrder(graph).order)
+        self.assertLess(cache.get(graph).position[v], cache.get(graph).position[u])
+
+
+if __name__ == '__main__':
+    unittest.main()
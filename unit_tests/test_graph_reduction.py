@@ -0,0 +1,78 @@
+import networkx as nx
+import pathlib
+import tempfile
+import unittest
+
+from modularizer.app import Modularizer
+from modularizer.data_source import create_data_source
+from modularizer.graph_reduction import ReducedGraph, reduced_louvain_communities
+from modularizer.offline_data_source import export_data_source
+from modularizer.user_interface.batch import BatchUserInterface
+from unit_tests.test_offline_data_source import CsvDataSource
+
+
+class GraphReductionTest(unittest.TestCase):
+    def test_contract_leaves(self):
+        # a tree of includes hanging off a triangle collapses into the triangle
+        graph = nx.MultiDiGraph([(0, 1), (1, 2), (2, 0), (0, 3), (3, 4), (3, 5), (5, 6)])
+        reduced = ReducedGraph(graph)
+        self.assertEqual(reduced.contract_leaves(), 4)
+        self.assertEqual(sorted(reduced.adjacency.keys()), [0, 1, 2])
+        self.assertEqual(sorted(reduced.members[0]), [0, 3, 4, 5, 6])
+        self.assertEqual(reduced.adjacency[0][0], 4)
+        self.assertEqual(reduced.strength[0], 2 + 4 * 2)
+
+    def test_contract_chains_and_twins(self):
+        graph = nx.MultiDiGraph([(0, 1), (1, 2), (0, 2), (2, 3), (3, 4), (3, 4), (4, 5), (5, 6), (6, 4),
+                                 (7, 0), (7, 1), (8, 0), (8, 1)])
+        reduced = ReducedGraph(graph)
+        self.assertEqual(reduced.contract_twins(), 1)
+        self.assertEqual(reduced.members[7], [7, 8])
+        self.assertEqual(reduced.adjacency[7], {0: 2, 1: 2})
+        reduced = ReducedGraph(graph)
+        self.assertEqual(reduced.contract_chains(), 3)
+        # 3 bridges the two triangles, 5 has the heavier neighbour 4 and 7 and 8 have the adjacent neighbours 0 and 1
+        self.assertIn(3, reduced.adjacency.keys())
+        self.assertEqual(reduced.members[4], [4, 5])
+        self.assertEqual(reduced.members[0], [0, 7, 8])
+
+    def test_reduce_and_expand(self):
+        # a core with include trees, chains and twins hanging off it
+        graph = nx.MultiDiGraph(nx.barabasi_albert_graph(200, 2, seed=1))
+        graph.add_edges_from((node, node % 200) for node in range(200, 400))
+        graph.add_edges_from((node, node - 200) for node in range(400, 500))
+        graph.add_edges_from((node, (node * 7) % 200) for node in range(400, 500))
+        graph.add_edges_from((node, 0) for node in range(500, 520))
+        graph.add_edges_from((node, 1) for node in range(500, 520))
+        reduced = ReducedGraph(graph)
+        reduced.reduce()
+        self.assertLess(len(reduced.adjacency), graph.number_of_nodes())
+        self.assertEqual(sum(reduced.strength.values()), 2 * graph.number_of_edges())
+        core = reduced.core
+        core_communities = nx.community.louvain_communities(core, weight='weight', seed=3)
+        communities = reduced.expand(core_communities)
+        self.assertEqual(sorted(n for c in communities for n in c), sorted(graph.nodes))
+        # contracting keeps the modularity of the partitions that keep the members with their anchors
+        self.assertAlmostEqual(nx.community.modularity(core, core_communities),
+                               nx.community.modularity(ReducedGraph(graph).core, communities))
+
+    def test_reduced_louvain_communities(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = export_data_source(CsvDataSource(), pathlib.Path(temp_dir).joinpath('CodeCompass'), 'sqlite')
+            data_source = create_data_source({'path': str(path)})
+            modularizer = Modularizer(BatchUserInterface(), data_source, background_tasks=False,
+                                      project_root='/home/katilippa/projects/test/CodeCompass',
+                                      dirs_to_exclude=['Build'], graph_reduction=True)
+            data_source.close()
+        graph = modularizer.multi_di_graph
+        communities, report = reduced_louvain_communities(graph)
+        self.assertEqual(sorted(n for c in communities for n in c), sorted(graph.nodes))
+        self.assertEqual(report['nodes'], graph.number_of_nodes())
+        self.assertLess(report['core nodes'], report['nodes'])
+        self.assertGreater(nx.community.modularity(nx.MultiGraph(graph), communities), 0.5)
+        self.assertEqual(modularizer.reduction_report['core nodes'], report['core nodes'])
+        self.assertIn('reduction', modularizer.timings.keys())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import networkx as nx
+import unittest
+
+from modularizer.app import Modularizer
+from modularizer.hierarchy import ModuleTree, _identifier, build_module_tree, merge_small_modules, node_cost, \
+    split_module
+
+
+class HierarchyTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # four cliques of 5 files in two directories, the cliques of a directory are coupled, plus a lone file
+        self.graph = nx.MultiDiGraph()
+        self.paths = dict()
+        for clique in range(4):
+            nodes = range(clique * 5, clique * 5 + 5)
+            for u in nodes:
+                self.paths[u] = f'/project/{"net" if clique < 2 else "io"}/file{u}.h'
+                for v in nodes:
+                    if u < v:
+                        self.graph.add_edge(u, v, label='uses')
+        self.graph.add_edge(0, 5, label='uses')
+        self.graph.add_edge(10, 15, label='uses')
+        self.graph.add_edge(4, 20, label='uses')
+        self.paths[20] = '/project/main.cpp'
+
+    def test_merge_small_modules(self):
+        communities = merge_small_modules(self.graph, [set(range(20)), {20}], 2)
+        self.assertSequenceEqual(communities, [set(range(21))])
+        self.graph.add_nodes_from([21, 22])
+        communities = merge_small_modules(self.graph, [set(range(10)), set(range(10, 20)), {20}, {21}, {22}], 2)
+        self.assertSequenceEqual(communities, [set(range(10)) | {20}, set(range(10, 20)), {21, 22}])
+
+    def test_split_module(self):
+        tree = split_module(self.graph, range(21), 12)
+        self.assertFalse(tree.is_leaf())
+        self.assertEqual(tree.size(), 21)
+        self.assertTrue(all(len(leaf.nodes) <= 12 for leaf in tree.leaves()))
+        self.assertTrue(split_module(self.graph, range(21), 21).is_leaf())
+        self.graph.nodes[0]['node_weight'] = 100
+        self.assertEqual(node_cost(self.graph, range(5)), 104)
+        self.assertFalse(split_module(self.graph, range(21), 21, max_cost=50).is_leaf())
+
+    def test_build_module_tree(self):
+        tree = build_module_tree(self.graph, [set(range(10)) | {20}, set(range(10, 20))], 5, min_size=3,
+                                 max_workers=1, path_of=self.paths.__getitem__)
+        self.assertEqual([child.name for child in tree.children], ['net', 'io'])
+        self.assertEqual(tree.size(), 21)
+        leaves = tree.leaves()
+        self.assertEqual(sorted(node for leaf in leaves for node in leaf.nodes), list(range(21)))
+        self.assertTrue(all(len(leaf.nodes) >= 3 for leaf in leaves))
+        names = tree.leaf_names()
+        self.assertEqual(len(names), len(leaves))
+        self.assertTrue(all(name.startswith('net.') for name in names[:len(tree.leaf_range(0))]))
+        self.assertEqual(tree.children[0].leaf_names(),
+                         [name[len('net.'):] for name in names[:len(tree.leaf_range(0))]])
+        self.assertEqual(tree.leaf_range(1).stop, len(leaves))
+        self.assertEqual(ModuleTree(nodes=[1]).leaf_names(), [''])
+
+    def test_identifier(self):
+        self.assertEqual(_identifier('Web-Server'), 'web_server')
+        self.assertEqual(_identifier('3rdparty'), 'm3rdparty')
+        self.assertEqual(_identifier('Module'), 'module_')
+        self.assertEqual(_identifier('new'), 'new_')
+        self.assertEqual(_identifier('newer'), 'newer')
+
+    def test_primary_module_interface(self):
+        self.assertEqual(Modularizer.primary_module_interface('core', ['io', 'io.net']),
+                         'export module core;\n\nexport import :io;\nexport import :io.net;\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import pandas
+import pathlib
+import tempfile
+import unittest
+
+from modularizer.app import Modularizer
+from modularizer import modularization_file
+
+
+class ModularizationFileTest(unittest.TestCase):
+    def setUp(self) -> None:
+        data_dir = pathlib.Path(__file__).resolve().parent.joinpath('data')
+        query_results = pandas.read_csv(data_dir.joinpath('dummy_cpp_edge_results.csv')).values
+        project_root = '/home/katilippa/projects/test/CodeCompass'
+        self.graph = Modularizer.graph_from_query_results(query_results, project_root, [f'{project_root}/Build'], 2, 5)
+        self.communities = Modularizer.load_modules_from_file(data_dir.joinpath('test_modules.json'), self.graph)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, 'CodeCompass' + modularization_file.SUFFIX)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def save(self, graph=None):
+        paths, assignment = Modularizer.modularization_to_assignment(graph or self.graph, self.communities)
+        modularization_file.save_binary_modularization(self.file_path, 'CodeCompass', paths, assignment,
+                                                       len(self.communities))
+
+    def assert_same_communities(self, communities):
+        self.assertEqual(len(communities), len(self.communities))
+        for loaded, expected in zip(communities, self.communities):
+            self.assertSetEqual(set(loaded), set(expected))
+
+    def test_round_trip(self):
+        self.save()
+        self.assertTrue(modularization_file.is_binary_modularization_file(self.file_path))
+        for use_mmap in [True, False]:
+            modularization = modularization_file.load_binary_modularization(self.file_path, use_mmap)
+            self.assertEqual(modularization.database, 'CodeCompass')
+            self.assertEqual(modularization.module_count, 3)
+            self.assertSequenceEqual(modularization.paths(),
+                                     sorted(data['path'] for _, data in self.graph.nodes(data=True)))
+            self.assert_same_communities(
+                Modularizer.load_modules_from_binary_file(self.file_path, self.graph, use_mmap))
+            modularization.close()
+            self.assertIsNone(modularization.assignment)
+        with modularization_file.load_binary_modularization(self.file_path) as modularization:
+            self.assertEqual(len(modularization.assignment), self.graph.number_of_nodes())
+        self.assertIsNone(modularization._mapped_file)
+
+    def test_empty_trailing_modules(self):
+        self.communities = list(self.communities) + [self.graph.subgraph([])]
+        self.save()
+        self.assertEqual(modularization_file.load_binary_modularization(self.file_path).module_count, 4)
+        self.assert_same_communities(Modularizer.load_modules_from_binary_file(self.file_path, self.graph))
+
+    def test_database_check(self):
+        self.save()
+        self.assert_same_communities(Modularizer.load_modules_from_file(self.file_path, self.graph,
+                                                                        database='CodeCompass'))
+        with self.assertRaises(Exception) as context:
+            Modularizer.load_modules_from_file(self.file_path, self.graph, database='other')
+        self.assertIn('CodeCompass', str(context.exception))
+
+    def test_load_into_different_graph(self):
+        self.save()
+        graph = self.graph.copy()
+        graph.add_node('new_file.h', path='/home/katilippa/projects/test/CodeCompass/new_file.h')
+        self.assert_same_communities(Modularizer.load_modules_from_file(self.file_path, graph))
+        graph.remove_node(next(iter(self.communities[1])))
+        with self.assertRaises(Exception):
+            Modularizer.load_modules_from_file(self.file_path, graph)
+
+    def test_smaller_than_json(self):
+        self.communities = Modularizer.get_communities(self.graph)
+        self.save()
+        modules = {i: [self.graph.nodes[n]['path'] for n in self.communities[i]] for i in range(len(self.communities))}
+        self.assertLess(os.path.getsize(self.file_path), len(Modularizer.modules_to_json(modules)) / 2)
+
+    def test_invalid_file(self):
+        with open(self.file_path, 'wb') as f:
+            f.write(b'MDLZ\xff\xff')
+        with self.assertRaises(Exception):
+            modularization_file.load_binary_modularization(self.file_path)
+        self.save()
+        with open(self.file_path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.file_path) - 1)
+        with self.assertRaises(Exception) as context:
+            modularization_file.load_binary_modularization(self.file_path)
+        self.assertIn('Not a modularization file', str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
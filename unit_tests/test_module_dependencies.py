@@ -0,0 +1,66 @@
+import networkx as nx
+import pathlib
+import tempfile
+import unittest
+
+from modularizer.app import Modularizer
+from modularizer.data_source import create_data_source
+from modularizer.module_dependencies import ModuleDependencyIndex
+from modularizer.offline_data_source import export_data_source
+from modularizer.user_interface.batch import BatchUserInterface
+from unit_tests.test_offline_data_source import CsvDataSource
+
+
+class ModuleDependencyIndexTest(unittest.TestCase):
+    def test_index(self):
+        # module 0 uses modules 1 and 2, module 1 uses module 2, modules 0 and 3 use each other
+        graph = nx.MultiDiGraph([(0, 2), (0, 2), (2, 4), (1, 5), (6, 7), (6, 0), (0, 6)])
+        index = ModuleDependencyIndex(graph, [[0, 1], [2, 3], [4, 5], [6, 7]])
+        self.assertEqual(index.graph[0][1]['weight'], 2)
+        self.assertEqual(index.imports(0), [2, 1])
+        self.assertEqual(index.imports(3), [])
+        self.assertEqual(index.imports(2), [])
+        self.assertEqual(index.dependency_order(), [2, 1, 0, 3])
+        self.assertEqual(index.cycles(), [[0, 3]])
+        self.assertEqual(index.cycle(3), [0, 3])
+        self.assertEqual(index.imported_files(0, 2), {5})
+        self.assertEqual(index.imported_files(0, 1), {2})
+        self.assertEqual(index.imported_files(2, 0), set())
+        self.assertEqual(index.used_files(0, [1, 2]), {2})
+        self.assertEqual(index.used_files(0, [2]), set())
+        self.assertEqual(index.used_files(1, [2]), {5})
+
+    def test_generate_imports(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = export_data_source(CsvDataSource(), pathlib.Path(temp_dir).joinpath('CodeCompass'), 'sqlite')
+            data_source = create_data_source({'path': str(path)})
+            modularizer = Modularizer(BatchUserInterface(), data_source, background_tasks=False,
+                                      project_root='/home/katilippa/projects/test/CodeCompass',
+                                      dirs_to_exclude=['Build'])
+            # only the workspace service has contents in the dummy data, and its module imports nothing
+            paths = modularizer.modules[modularizer._find_module_id_by_file_path('workspaceservice.cpp')]
+            files = Modularizer.files_in_order(*data_source.query_file_contents(paths), paths)
+            modularizer._collect_file_contents_for_module = lambda module_id: files
+            index = modularizer._get_module_dependency_index()
+            self.assertIs(modularizer._get_module_dependency_index(), index)
+            module_id = max(range(len(modularizer.communities)), key=lambda i: len(index.imports(i)))
+            dependencies = index.imports(module_id)
+            self.assertGreater(len(dependencies), 0)
+            module_names = {dependency: f'dependency{dependency}' for dependency in dependencies}
+            module = modularizer._generate_module(module_id, 'cc.module', module_names)
+            imports = [line for line in module.splitlines() if line.startswith('import ')]
+            self.assertEqual(imports, [f'import dependency{dependency};' for dependency in dependencies])
+            # without names the dependencies are imported by their default names, whatever was generated before
+            default_names = modularizer.default_module_names()
+            self.assertEqual(len(set(default_names.values())), len(modularizer.communities))
+            self.assertEqual(modularizer.default_module_names(), default_names)
+            module = modularizer._generate_module(module_id, 'cc.module')
+            imports = [line for line in module.splitlines() if line.startswith('import ')]
+            self.assertEqual(imports, [f'import {default_names[dependency]};' for dependency in dependencies])
+            modularizer.recluster()
+            self.assertIsNot(modularizer._get_module_dependency_index(), index)
+            data_source.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import pandas
+import pathlib
+import sqlite3
+import tempfile
+from typing import Iterable, Iterator, List, Optional, Tuple
+import unittest
+
+from modularizer.app import Modularizer
+from modularizer.data_source import DataSource, create_data_source, escape_like
+from modularizer.offline_data_source import OfflineDataSource, export_data_source
+
+
+class CsvDataSource(DataSource):
+    """Serves the CppEdge, File and FileContent tables rebuilt from the dummy query results."""
+
+    def __init__(self):
+        self.database = 'CodeCompass'
+        data_dir = pathlib.Path(__file__).resolve().parent.joinpath('data')
+        edges = pandas.read_csv(data_dir.joinpath('dummy_cpp_edge_results.csv'), header=None).values
+        contents = pandas.read_csv(data_dir.joinpath('dummy_file_content_results.csv'), header=None).values
+        files = dict()
+        for record in edges:
+            files[record[1]] = record[2]
+            files[record[4]] = record[5]
+        for record in contents:
+            files[record[0]] = record[1]
+        self.tables = {'CppEdge': [(int(r[0]), int(r[3]), int(r[6])) for r in edges],
+                       'File': [(int(i), p, pathlib.PurePosixPath(p).name, f'hash{i}') for i, p in files.items()],
+                       'FileContent': [(f'hash{r[0]}', r[3]) for r in contents]}
+
+    def get_table_names(self) -> List[str]:
+        return list(self.tables.keys())
+
+    def find_file_path(self, pattern: str) -> Optional[str]:
+        pass
+
+    def query_cpp_edges(self, project_root: str = '', dirs_to_exclude: Iterable = (),
+                        edge_types: Iterable[int] = None) -> Tuple[list, tuple]:
+        pass
+
+    def query_file_contents(self, paths: List[str]) -> Tuple[tuple, list]:
+        pass
+
+    def query_exported_declarations(self, paths: List[str]) -> Tuple[tuple, list]:
+        pass
+
+    def query_file_sizes(self, project_root: str = '') -> List[Tuple[str, int]]:
+        pass
+
+    def iter_table(self, table: str, chunk_size: int = 10000) -> Iterator[list]:
+        rows = self.tables[table]
+        for i in range(0, len(rows), chunk_size):
+            yield rows[i:i + chunk_size]
+
+
+class OfflineDataSourceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source = CsvDataSource()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def export_and_load(self, file_format: str) -> OfflineDataSource:
+        path = export_data_source(self.source, pathlib.Path(self.temp_dir.name).joinpath('CodeCompass'), file_format,
+                                  chunk_size=1000)
+        return create_data_source({'path': str(path)})
+
+    def check_data_source(self, data_source: OfflineDataSource):
+        self.assertEqual(data_source.database, 'CodeCompass')
+        self.assertTrue(all(t in data_source.get_table_names() for t in ['CppEdge', 'File', 'FileContent']))
+        results, description = data_source.query_cpp_edges()
+        self.assertEqual(len(results), 7217)
+        from_path_index = Modularizer.find_column_index(description, 'frompath')
+        to_path_index = Modularizer.find_column_index(description, 'topath')
+        type_index = Modularizer.find_column_index(description, 'type')
+        project_root = Modularizer.find_project_root('CodeCompass', results, from_path_index, to_path_index)
+        build_dir = Modularizer.find_build_dir(results, project_root, from_path_index, to_path_index)
+        graph = Modularizer.graph_from_query_results(results, project_root, [build_dir], from_path_index,
+                                                     to_path_index, type_index)
+        self.assertEqual(len(graph.nodes), 156)
+        self.assertEqual(len(graph.edges), 368)
+
+        path = data_source.find_file_path('%CodeCompass%/%')
+        self.assertEqual(Modularizer.project_root_from_path('CodeCompass', path), project_root)
+        self.assertIsNotNone(data_source.find_file_path(f'{escape_like(build_dir)}/%'))
+        self.assertIsNone(data_source.find_file_path(f'{escape_like(project_root)}/does\\_not\\_exist/%'))
+
+        filtered_results, _ = data_source.query_cpp_edges(project_root, [build_dir])
+        self.assertEqual(len(filtered_results), 368)
+        self.assertTrue(all(r[0].startswith(project_root + '/') and r[1].startswith(project_root + '/') and
+                            not r[0].startswith(build_dir) and not r[1].startswith(build_dir)
+                            for r in filtered_results))
+        graph = Modularizer.graph_from_query_results(filtered_results, project_root, [], from_path_index,
+                                                     to_path_index, type_index)
+        self.assertEqual(len(graph.nodes), 156)
+        self.assertEqual(len(graph.edges), 368)
+        filtered_results, _ = data_source.query_cpp_edges(project_root, [build_dir], [2])
+        self.assertTrue(0 < len(filtered_results) <= 368)
+        self.assertTrue(all(r[type_index] == 2 for r in filtered_results))
+
+        paths = [row[1] for row in self.source.tables['File'] if row[0] == -205229368886403172]
+        description, results = data_source.query_file_contents(paths)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][Modularizer.find_column_index(description, 'filename')], 'workspaceservice.cpp')
+        self.assertIn('namespace', results[0][Modularizer.find_column_index(description, 'content')])
+
+        sizes = dict(data_source.query_file_sizes(project_root))
+        self.assertEqual(sizes[paths[0]], len(results[0][Modularizer.find_column_index(description, 'content')]))
+        self.assertTrue(all(path.startswith(project_root + '/') for path in sizes.keys()))
+        self.assertLessEqual(len(sizes), len(data_source.query_file_sizes()))
+        self.assertRaises(Exception, data_source.query_exported_declarations, paths)
+        data_source.close()
+
+    def test_sqlite(self):
+        data_source = self.export_and_load('sqlite')
+        self.assertEqual(data_source.format, 'sqlite')
+        self.check_data_source(data_source)
+
+    def test_sqlite_exported_declarations(self):
+        path = export_data_source(self.source, pathlib.Path(self.temp_dir.name).joinpath('CodeCompass'), 'sqlite')
+        (first_id, first_path, _, _), (second_id, _, _, _) = self.source.tables['File'][:2]
+        connection = sqlite3.connect(path)
+        connection.execute('create table "CppEntity" ("entityHash")')
+        connection.execute('create table "CppAstNode" ("entityHash", location_file, location_range_start_line, '
+                           '"astType", "symbolType")')
+        connection.executemany('insert into "CppEntity" values (?)', [(1,), (2,), (3,)])
+        # 1 is used in the second file, 2 only where it is declared, 3 is a macro
+        connection.executemany('insert into "CppAstNode" values (?, ?, ?, ?, ?)',
+                               [(1, first_id, 10, 2, 1), (1, second_id, 20, 0, 1),
+                                (2, first_id, 30, 3, 1), (2, first_id, 40, 0, 1),
+                                (3, first_id, 50, 2, 5), (3, second_id, 60, 0, 5)])
+        connection.commit()
+        connection.close()
+        data_source = create_data_source({'path': str(path)})
+        description, results = data_source.query_exported_declarations([first_path])
+        self.assertEqual([tuple(column[0] for column in description), results],
+                         [('path', 'entityhash', 'line'), [(first_path, 1, 10)]])
+        data_source.close()
+
+    def test_csv(self):
+        data_source = self.export_and_load('csv')
+        self.assertEqual(data_source.format, 'csv')
+        self.check_data_source(data_source)
+
+    def test_parquet(self):
+        try:
+            import pyarrow
+        except ImportError:
+            self.skipTest('pyarrow is not installed')
+        data_source = self.export_and_load('parquet')
+        self.assertEqual(data_source.format, 'parquet')
+        self.check_data_source(data_source)
+
+    def test_missing_dump(self):
+        with self.assertRaises(Exception):
+            OfflineDataSource(pathlib.Path(self.temp_dir.name).joinpath('does_not_exist.sqlite'))
+
+    def test_abstract_data_source(self):
+        self.assertRaises(TypeError, DataSource)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import networkx as nx
+import numpy as np
+import unittest
+
+from modularizer.path_table import ModuleView, PathTable, node_path_getter, to_node_array
+
+
+class PathTableTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path_table = PathTable('/home/project')
+        self.a = self.path_table.intern('/home/project/src/a.cpp')
+        self.b = self.path_table.intern('/home/project/include/a.h')
+
+    def test_intern(self):
+        self.assertEqual((self.a, self.b), (0, 1))
+        self.assertEqual(self.path_table.intern('/home/project/src/a.cpp'), self.a)
+        self.assertEqual(len(self.path_table), 2)
+        self.assertEqual(self.path_table.id('/home/project/include/a.h'), self.b)
+        self.assertIsNone(self.path_table.id('/home/project/include/b.h'))
+
+    def test_paths(self):
+        self.assertEqual(self.path_table.path(self.b), '/home/project/include/a.h')
+        self.assertEqual(self.path_table.relative_path(self.a), 'src/a.cpp')
+        self.assertSequenceEqual(self.path_table.paths([self.b, self.a]),
+                                 ['/home/project/include/a.h', '/home/project/src/a.cpp'])
+        self.assertSequenceEqual(self.path_table.paths(), ['/home/project/src/a.cpp', '/home/project/include/a.h'])
+
+    def test_node_path_getter(self):
+        graph = nx.MultiDiGraph()
+        graph.add_node('src/a.cpp', path='/home/project/src/a.cpp')
+        self.assertEqual(node_path_getter(graph)('src/a.cpp'), '/home/project/src/a.cpp')
+        self.assertEqual(node_path_getter(graph, self.path_table)(self.b), '/home/project/include/a.h')
+
+    def test_module_view(self):
+        communities = [to_node_array({self.b, self.a}), to_node_array([])]
+        self.assertEqual(communities[0].dtype, np.int32)
+        modules = ModuleView(communities, self.path_table)
+        self.assertEqual(len(modules), 2)
+        self.assertSequenceEqual(modules[0], ['/home/project/src/a.cpp', '/home/project/include/a.h'])
+        self.assertSequenceEqual(modules[1], [])
+        self.assertDictEqual(dict(modules), {0: modules[0], 1: []})
+        with self.assertRaises(KeyError):
+            modules[2]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from modularizer.path_table import PathTable, to_node_array
+from modularizer.search_index import SearchIndex
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path_table = PathTable('/home/project')
+        for path in ['src/parser/Parser.cpp', 'include/parser/parser.h', 'src/util/parserutil.cpp',
+                     'src/main.cpp', 'test/parser/parser_test.cpp']:
+            self.path_table.intern(f'/home/project/{path}')
+        self.index = SearchIndex(self.path_table)
+
+    def paths(self, query: str, **kwargs):
+        return [self.path_table.relative_path(result.node_id) for result in self.index.search(query, **kwargs)]
+
+    def test_ranking(self):
+        self.assertSequenceEqual(self.paths('parser.h'), ['include/parser/parser.h'])
+        self.assertSequenceEqual(self.paths('PARSER'), ['src/parser/Parser.cpp', 'include/parser/parser.h',
+                                                       'src/util/parserutil.cpp', 'test/parser/parser_test.cpp'])
+        self.assertSequenceEqual(self.paths('parser', limit=1), ['src/parser/Parser.cpp'])
+        self.assertSequenceEqual(self.paths('util/parser'), ['src/util/parserutil.cpp'])
+        self.assertSequenceEqual(self.paths('/home/project/src/main.cpp'), ['src/main.cpp'])
+        self.assertSequenceEqual(self.paths('m'), ['src/main.cpp'])
+        self.assertSequenceEqual(self.paths(''), [])
+
+    def test_fuzzy(self):
+        results = self.index.search('parsr_test.cpp')
+        self.assertEqual(results[0].path, '/home/project/test/parser/parser_test.cpp')
+        self.assertEqual(results[0].rank[0], SearchIndex.FUZZY)
+        self.assertSequenceEqual(self.index.search('xyzxyz'), [])
+
+    def test_incremental_update(self):
+        communities = [to_node_array([0, 1]), to_node_array([2, 3, 4])]
+        self.assertEqual(self.index.update_modules(communities), 2)
+        self.assertEqual([result.module_id for result in self.index.search('parser.h')], [0])
+        self.assertEqual(self.index.update_modules(communities), 0)
+        self.assertEqual(self.index.update_modules([communities[0], to_node_array([2, 3]), to_node_array([4])]), 2)
+        self.assertEqual(self.index.module_id(4), 2)
+        self.assertEqual(self.index.update_modules([to_node_array([0, 1, 2, 3])]), 3)
+        self.assertEqual([self.index.module_id(i) for i in range(5)], [0, 0, 0, 0, -1])
+        new_file = self.path_table.intern('/home/project/src/lexer.cpp')
+        self.index.update_modules([to_node_array([0, 1, 2, 3, new_file])])
+        self.assertEqual(len(self.index), 6)
+        self.assertEqual([result.module_id for result in self.index.search('lexer')], [0])
+
+
+if __name__ == '__main__':
+    unittest.main()
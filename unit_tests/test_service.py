@@ -0,0 +1,99 @@
+import pathlib
+import tempfile
+import threading
+import unittest
+from urllib import error, request
+
+from modularizer.app import Modularizer
+from modularizer.background_worker import BackgroundWorker
+from modularizer.data_source import create_data_source
+from modularizer.offline_data_source import export_data_source
+from modularizer.service import ModularizerService, ServiceClient
+from modularizer.user_interface.batch import BatchUserInterface
+from unit_tests.test_offline_data_source import CsvDataSource
+
+
+class ServiceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.temp_dir.name)
+        path = export_data_source(CsvDataSource(), self.dir.joinpath('CodeCompass'), 'sqlite')
+        self.data_source = create_data_source({'path': str(path)})
+        self.modularizer = Modularizer(BatchUserInterface(), self.data_source, background_tasks=False,
+                                       project_root='/home/katilippa/projects/test/CodeCompass',
+                                       dirs_to_exclude=['Build'])
+        self.modularizer.results_dir = self.dir.joinpath('results')
+        self.service = ModularizerService(self.modularizer, port=0)
+        self.thread = threading.Thread(target=self.service.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = ServiceClient(self.service.url)
+
+    def tearDown(self) -> None:
+        self.client.shutdown()
+        self.thread.join(5)
+        self.data_source.close()
+        self.temp_dir.cleanup()
+
+    def test_queries(self):
+        status = self.client.status()
+        self.assertEqual(status['project root'], '/home/katilippa/projects/test/CodeCompass')
+        self.assertEqual(status['modules'], len(self.modularizer.communities))
+        modules = self.client.modules()['modules']
+        self.assertEqual(sum(module['files'] for module in modules), status['files'])
+        results = self.client.find('workspaceservice.cpp')['results']
+        self.assertEqual(results[0]['path'],
+                         '/home/katilippa/projects/test/CodeCompass/service/workspace/src/workspaceservice.cpp')
+        self.assertFalse(results[0]['similar'])
+        module = self.client.modules(results[0]['module id'])
+        self.assertIn(results[0]['path'], module['files'])
+        self.assertRaises(Exception, self.client.modules, len(modules))
+        self.assertRaises(Exception, self.client._request, 'GET', '/missing')
+        with self.assertRaises(Exception) as context:
+            self.client._request('GET', '/find', {'path': 'x', 'limit': 'many'})
+        self.assertIn('Invalid number', str(context.exception))
+
+    def test_generate_and_recluster(self):
+        module_id = self.client.find('workspaceservice.cpp')['results'][0]['module id']
+        files = self.client.generate(module_id, 'cc.workspace')['files']
+        self.assertEqual(pathlib.Path(files[0]).name, 'cc.workspace.cpp')
+        self.assertIn('export module cc.workspace;', pathlib.Path(files[0]).read_text())
+        self.assertRaises(Exception, self.client.generate, module_id, 'not a name')
+        result = self.client.recluster(graph_reduction=False)
+        self.assertFalse(self.modularizer.graph_reduction)
+        self.assertEqual(result['modules'], len(self.modularizer.communities))
+        self.assertNotIn('graph reduction', self.client.status().keys())
+        with request.urlopen(f'{self.service.url}/status') as response:
+            self.assertEqual(response.headers['Content-Type'], 'application/json')
+
+    def test_status_codes(self):
+        def status_code(req: request.Request) -> int:
+            try:
+                with request.urlopen(req) as response:
+                    return response.status
+            except error.HTTPError as ex:
+                return ex.code
+
+        # a cross-origin form POST must neither stop the service nor write files
+        for path in ['/shutdown', '/generate']:
+            req = request.Request(f'{self.service.url}{path}', data=b'{"id": 0, "name": "m"}', method='POST',
+                                  headers={'Content-Type': 'text/plain'})
+            self.assertEqual(status_code(req), 415)
+        self.assertFalse(self.modularizer.results_dir.exists())
+        self.assertEqual(status_code(request.Request(f'{self.service.url}/modules?id=-1')), 400)
+        self.assertEqual(status_code(request.Request(f'{self.service.url}/recluster', data=b'[]', method='POST',
+                                                     headers={'Content-Type': 'application/json'})), 400)
+        self.modularizer.communities = None
+        self.assertEqual(status_code(request.Request(f'{self.service.url}/status')), 500)
+        self.assertEqual(self.client.modules(0)['id'], 0)
+
+    def test_no_layout_prefetch(self):
+        self.modularizer._background_worker = BackgroundWorker()
+        self.client.recluster()
+        _, total, _ = self.modularizer._background_worker.progress()
+        self.modularizer._background_worker.cancel(timeout=5)
+        # graph order, search index, module dependencies and metrics, then the files of every module
+        self.assertEqual(total, 4 + len(self.modularizer.communities))
+
+
+if __name__ == '__main__':
+    unittest.main()
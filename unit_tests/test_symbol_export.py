@@ -0,0 +1,79 @@
+import unittest
+
+from modularizer.symbol_export import declaration_starts, export_declarations, exported_declaration_lines
+
+SOURCE = '''namespace a {
+namespace {
+int hidden;
+}
+template <typename T>
+struct S
+{
+  void f();
+};
+extern "C" {
+int c_function(int);
+}
+static int internal;
+void g() { int local; }
+enum class E { A, B };
+/* comment { */ int after_comment;
+const char* s = "{";
+int after_string;
+#define MACRO { \\
+}
+int after_macro;
+}
+'''
+
+
+class SymbolExportTest(unittest.TestCase):
+    def test_declaration_starts(self):
+        starts = declaration_starts(SOURCE)
+        self.assertIsNone(starts[3])
+        self.assertEqual(starts[5], (5, 0))
+        self.assertEqual(starts[8], (5, 0))
+        self.assertEqual(starts[9], (5, 0))
+        self.assertEqual(starts[11], (11, 0))
+        self.assertEqual(starts[16], (16, 16))
+        self.assertEqual(starts[18], (18, 0))
+        self.assertNotIn(19, starts.keys())
+        self.assertEqual(starts[21], (21, 0))
+
+    def test_export_declarations(self):
+        lines = export_declarations(SOURCE, [3, 8, 11, 13, 14, 15, 16, 18, 21]).splitlines()
+        self.assertEqual(lines[2], 'int hidden;')
+        self.assertEqual(lines[4], 'export template <typename T>')
+        self.assertEqual(lines[7], '  void f();')
+        self.assertEqual(lines[10], 'export int c_function(int);')
+        self.assertEqual(lines[12], 'static int internal;')
+        self.assertEqual(lines[13], 'export void g() { int local; }')
+        self.assertEqual(lines[14], 'export enum class E { A, B };')
+        self.assertEqual(lines[15], '/* comment { */ export int after_comment;')
+        self.assertEqual(lines[16], 'const char* s = "{";')
+        self.assertEqual(lines[17], 'export int after_string;')
+        self.assertEqual(lines[20], 'export int after_macro;')
+        self.assertEqual(export_declarations(SOURCE, []), SOURCE)
+
+    def test_declarations_that_cannot_be_exported(self):
+        source = '\n'.join(['void Foo::bar() {}',
+                             'template <> struct X<int> {};',
+                             'template<>',
+                             'void f<int>();',
+                             'template <typename T>',
+                             'Foo<T>::Foo() {}',
+                             'int Foo::count = 0;',
+                             'class Bar : public ns::Base {};',
+                             'template <typename T = int> struct Y;', ''])
+        lines = export_declarations(source, range(1, 10)).splitlines()
+        self.assertEqual(lines[:7], source.splitlines()[:7])
+        self.assertEqual(lines[7], 'export class Bar : public ns::Base {};')
+        self.assertEqual(lines[8], 'export template <typename T = int> struct Y;')
+
+    def test_exported_declaration_lines(self):
+        rows = [('b.cpp', 1, 3), ('a.h', 1, 10), ('a.h', 2, 20), ('b.cpp', 3, 5), ('other.h', 4, 1)]
+        self.assertEqual(exported_declaration_lines(rows, ['a.h', 'b.cpp']), {'a.h': {10, 20}, 'b.cpp': {5}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -38,7 +38,7 @@ class UIChildWithImplementations(UserInterface):
     def get_module_id(self, max_id: int) -> int:
         pass
 
-    def get_module_name(self, module) -> str:
+    def get_module_name(self, module, default: str = None) -> str:
         pass
 
     def display_dependency_graph(self, graph: nx.Graph) -> None: